@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+"""
+ZIP to rate lookup over the California ambulance rate tables.
+
+Reads california_ambulance_rates.csv (one row per provider and rate type, one
+column per HCPCS code) and california_ambulance_rates_long.csv (one row per
+rate) once, into an index keyed by pickup ZIP, HCPCS code and rate type.
+
+- ZIPs: a rate's service ZIPs may list exact ZIPs ("95630") and prefixes
+  ("956xx" matches 95600-95699). An exact ZIP beats a prefix, and a longer
+  prefix beats a shorter one.
+- Ties: among the rates matching a key equally well, the latest effective
+  date wins, then the long file, then file order.
+- Rate types: "911" or "IFT"; the wide file's "Emergency (911)" and
+  "Non-Emergency (IFT)" are accepted too.
+- Storage: the index is a sorted array of integer keys pointing into a table
+  of rate records. It is saved to INDEX_FILE and reused while both CSVs keep
+  their size and mtime, so loading it is a few array reads.
+
+lookup() answers one (zip, HCPCS code, rate type) from a dict.
+lookup_batch() resolves whole arrays of claim ZIPs with one array gather per
+ZIP prefix length, no row loop.
+
+Rate versions: the ZIP index keeps only the latest rate per key. For dates
+of service, RateIndex.versions() orders every rate by (county, EOA, HCPCS
+code, rate type, effective date); a version applies from its effective date
+until the next version of the same group. as_of() and as_of_batch() find
+the version in force on a date with a binary search, not a table scan.
+
+Usage:
+    python ambulance_rates.py 94501 A0427 911
+    python ambulance_rates.py 95630 A0428 "Non-Emergency (IFT)" --rebuild
+    python ambulance_rates.py 94501 A0427 911 --as-of 2025-03-15
+"""
+
+import argparse
+import logging
+import os
+import re
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Warnings about the rate files and the saved index; the CLI prints them,
+# importers see them through their own logging setup
+logger = logging.getLogger(__name__)
+
+# Configuration
+WIDE_RATES_FILE = Path(__file__).parent / "california_ambulance_rates.csv"
+LONG_RATES_FILE = Path(__file__).parent / "california_ambulance_rates_long.csv"
+INDEX_FILE = Path(__file__).parent / "california_ambulance_rates.index.npz"
+
+# Bumped whenever the index layout or the record selection rules change, so
+# older index files are rebuilt
+INDEX_VERSION = 1
+
+# Rate type spellings (lower case) to the canonical rate type
+RATE_TYPES = {
+    "911": "911",
+    "emergency": "911",
+    "emergency (911)": "911",
+    "ift": "IFT",
+    "non-emergency": "IFT",
+    "non-emergency (ift)": "IFT",
+}
+RATE_TYPE_CODES = ["911", "IFT"]
+
+# Wide file: HCPCS rate columns look like "A0428 (BLS-NE)"
+WIDE_RATE_COLUMN = re.compile(r"^(A\d{4}) \(")
+WIDE_COLUMNS = {
+    "Service Counties": "county",
+    "EOA Name": "eoa_name",
+    "Contracted Ambulance Provider Name": "provider_name",
+    "Contracted Ambulance Provider NPI": "provider_npi",
+    "Effective Date": "effective_date",
+    "Rate Type": "rate_type",
+    "Service ZIPs": "service_zips",
+}
+LONG_COLUMNS = {
+    "county": "county",
+    "eoa_name": "eoa_name",
+    "provider_name": "provider_name",
+    "NPI": "provider_npi",
+    "effective_date": "effective_date",
+    "rate_type_service": "rate_type",
+    "service_zip_codes": "service_zips",
+    "HCPCS_Code": "hcpcs",
+    "rate": "rate",
+}
+
+# Columns of the record table, in RateRecord order; source is "long" or
+# "wide" and source_row the row in that file (0 = first data row)
+RECORD_COLUMNS = ["hcpcs", "rate_type", "rate", "county", "eoa_name", "provider_name", "provider_npi",
+                  "effective_date", "source", "source_row"]
+
+# Service ZIP entries: 1-5 digits padded to five characters with x (or *)
+ZIP_SPEC = re.compile(r"(\d{1,5})[xX*]*")
+ZIP_LEVELS = 5
+SOURCE_PRIORITY = {"long": 0, "wide": 1}
+
+# Rate versions: effective dates as days since DATE_ORIGIN (plus one), so a
+# version key is group * DAY_SPAN + day. Rates with no effective date get day
+# 0: they apply before the group's first dated version.
+DATE_ORIGIN = np.datetime64("1900-01-01", "D")
+DAY_SPAN = 1 << 20
+
+
+@dataclass(frozen=True)
+class RateRecord:
+    """One published rate, and the service ZIP entry it was matched through."""
+    hcpcs: str
+    rate_type: str
+    rate: float
+    county: str
+    eoa_name: str
+    provider_name: str
+    provider_npi: str
+    effective_date: str
+    source: str
+    source_row: int
+    matched_zip: str = ""
+
+
+def file_signature(path: Path) -> List[int]:
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """Effective dates as ISO strings ("" when missing or unreadable); both files mix formats."""
+    text = values.fillna("").str.replace(r"(\d)(st|nd|rd|th)\b", r"\1", regex=True)
+    dates = pd.to_datetime(text, format="mixed", errors="coerce")
+    return dates.dt.strftime("%Y-%m-%d").fillna("")
+
+
+def wide_rates(path: Path) -> pd.DataFrame:
+    """The wide file as one row per rate, in record columns plus service_zips."""
+    df = pd.read_csv(path, dtype=str)
+    rate_columns = {col: WIDE_RATE_COLUMN.match(col).group(1) for col in df.columns if WIDE_RATE_COLUMN.match(col)}
+    df = df.rename(columns=WIDE_COLUMNS)
+    df["source_row"] = np.arange(len(df))
+    rates = df.melt(id_vars=list(WIDE_COLUMNS.values()) + ["source_row"], value_vars=list(rate_columns),
+                    var_name="hcpcs", value_name="rate")
+    rates["hcpcs"] = rates["hcpcs"].map(rate_columns)
+    rates["source"] = "wide"
+    return rates
+
+
+def long_rates(path: Path) -> pd.DataFrame:
+    """The long file in record columns plus service_zips."""
+    df = pd.read_csv(path, dtype=str)[list(LONG_COLUMNS)].rename(columns=LONG_COLUMNS)
+    df["source_row"] = np.arange(len(df))
+    df["source"] = "long"
+    return df
+
+
+def rate_records(wide_path: Path, long_path: Path) -> pd.DataFrame:
+    """Every rate of both files with a usable amount and rate type, cleaned to record columns."""
+    rates = pd.concat([long_rates(long_path), wide_rates(wide_path)], ignore_index=True)
+    rates["rate"] = pd.to_numeric(rates["rate"].str.replace(r"[$,]", "", regex=True), errors="coerce")
+    rates["rate_type"] = rates["rate_type"].str.strip().str.lower().map(RATE_TYPES)
+    rates = rates[rates["rate"].notna() & rates["rate_type"].notna()].reset_index(drop=True)
+
+    rates["hcpcs"] = rates["hcpcs"].str.strip().str.upper()
+    rates["effective_date"] = parse_dates(rates["effective_date"])
+    # NPIs come through as floats ("1205948765.0") in the wide file
+    rates["provider_npi"] = rates["provider_npi"].str.replace(r"\.0$", "", regex=True)
+    for col in ["county", "eoa_name", "provider_name", "provider_npi", "service_zips"]:
+        rates[col] = rates[col].fillna("").str.strip()
+    return rates
+
+
+def zip_entries(service_zips: pd.Series):
+    """(record number, level, ZIP value) per service ZIP entry, and the entries that could not be read.
+
+    The level is the number of digits given: 5 for an exact ZIP, 3 for "956xx"
+    (value 956).
+    """
+    tokens = service_zips.str.split(r"[,;\s]+").explode()
+    tokens = tokens[tokens.notna() & (tokens != "")]
+    spec = tokens.str.fullmatch(r"\d{5}|\d{1,4}[xX*]{1,4}") & (tokens.str.len() == 5)
+    digits = tokens[spec].str.extract(ZIP_SPEC, expand=False)
+    return (digits.index.to_numpy(), digits.str.len().to_numpy(), digits.astype(np.int64).to_numpy(),
+            sorted(set(tokens[~spec])))
+
+
+class RateIndex:
+    """Rate records and the sorted (ZIP entry, HCPCS code, rate type) keys that point at them."""
+
+    def __init__(self, records: pd.DataFrame, codes: List[str], keys: np.ndarray, record_ids: np.ndarray,
+                 signature: List[int]):
+        self.records = records
+        self.codes = codes
+        self.keys = keys
+        self.record_ids = record_ids
+        self.signature = signature
+        self.code_index = {code: i for i, code in enumerate(codes)}
+        # ZIP entry levels present, most specific first
+        self.levels = sorted(set((keys // (len(codes) * len(RATE_TYPE_CODES) * 100_000)).tolist()), reverse=True)
+        self._positions = None
+        self._rows = None
+        self._columns = None
+        self._dense = {}
+        self._versions = None
+
+    def key(self, level, value, code, rate_type):
+        return encode_key(level, value, code, rate_type, len(self.codes))
+
+    @classmethod
+    def build(cls, wide_path: Path = WIDE_RATES_FILE, long_path: Path = LONG_RATES_FILE) -> "RateIndex":
+        rates = rate_records(wide_path, long_path)
+        record_nums, levels, values, unreadable = zip_entries(rates["service_zips"])
+        if unreadable:
+            logger.warning(f"Ignored {len(unreadable)} service ZIP entries that are not ZIPs or ZIP prefixes: "
+                           f"{', '.join(unreadable[:10])}")
+        unindexed = (rates["service_zips"] == "").sum()
+        if unindexed:
+            logger.warning(f"{unindexed} rates have no service ZIPs and cannot be looked up by ZIP")
+
+        codes = sorted(rates["hcpcs"].unique())
+        code_of = pd.Categorical(rates["hcpcs"], categories=codes).codes.astype(np.int64)
+        type_of = pd.Categorical(rates["rate_type"], categories=RATE_TYPE_CODES).codes.astype(np.int64)
+
+        # One candidate per (key, record); keep the best record per key
+        candidates = pd.DataFrame({
+            "key": encode_key(levels, values, code_of[record_nums], type_of[record_nums], len(codes)),
+            "record": record_nums,
+            "effective_date": rates["effective_date"].to_numpy()[record_nums],
+            "source": rates["source"].map(SOURCE_PRIORITY).to_numpy()[record_nums],
+        })
+        candidates = candidates.sort_values(["key", "effective_date", "source", "record"],
+                                            ascending=[True, False, True, True], kind="stable")
+        best = candidates.drop_duplicates("key")
+        return cls(rates[RECORD_COLUMNS].copy(), codes, best["key"].to_numpy(np.int64),
+                   best["record"].to_numpy(np.int64),
+                   file_signature(wide_path) + file_signature(long_path) + [INDEX_VERSION])
+
+    def save(self, path: Path = INDEX_FILE):
+        """Write the index with numpy only (no pickle), replacing path atomically."""
+        arrays = {f"record_{col}": self.records[col].to_numpy(dtype=float if col == "rate" else str)
+                  for col in RECORD_COLUMNS}
+        arrays["record_source_row"] = self.records["source_row"].to_numpy(np.int64)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, keys=self.keys, record_ids=self.record_ids, codes=np.array(self.codes, dtype=str),
+                     signature=np.array(self.signature, dtype=np.int64), **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path = INDEX_FILE) -> "RateIndex":
+        with np.load(path, allow_pickle=False) as data:
+            records = pd.DataFrame({col: data[f"record_{col}"] for col in RECORD_COLUMNS})
+            for col in RECORD_COLUMNS:
+                if records[col].dtype.kind == "U":
+                    records[col] = records[col].astype(object)
+            return cls(records, data["codes"].tolist(), data["keys"], data["record_ids"],
+                       data["signature"].tolist())
+
+    def record(self, record_id: int, matched_zip: str = "") -> RateRecord:
+        if self._rows is None:
+            self._rows = list(zip(*(self.records[col].tolist() for col in RECORD_COLUMNS)))
+        return RateRecord(*self._rows[record_id], matched_zip=matched_zip)
+
+    def lookup(self, zip_code, hcpcs: str, rate_type: str) -> Optional[RateRecord]:
+        """The rate for one pickup ZIP, HCPCS code and rate type, or None."""
+        if self._positions is None:
+            self._positions = dict(zip(self.keys.tolist(), self.record_ids.tolist()))
+        value = zip_value(zip_code)
+        code = self.code_index.get(str(hcpcs).strip().upper())
+        rate_type = RATE_TYPES.get(str(rate_type).strip().lower())
+        if value < 0 or code is None or rate_type is None:
+            return None
+        type_code = RATE_TYPE_CODES.index(rate_type)
+        for level in self.levels:
+            record_id = self._positions.get(self.key(level, value // 10 ** (ZIP_LEVELS - level), code, type_code))
+            if record_id is not None:
+                return self.record(record_id, zip_entry(value, level))
+        return None
+
+    def lookup_batch(self, zips, hcpcs, rate_types) -> pd.DataFrame:
+        """Rates for arrays of claims: one row per ZIP, in input order, with nulls where nothing matched.
+
+        hcpcs and rate_types are arrays of the same length or single values
+        for every claim. record_id is the row of the record table (-1 for no
+        match) and matched_zip the service ZIP entry that matched ("94501" or
+        "956xx", "" for no match).
+        """
+        index = zips.index if isinstance(zips, pd.Series) else pd.RangeIndex(len(zips))
+        values = zip_values(zips)
+        record_ids, match_levels = self.find(values, self.hcpcs_codes(hcpcs, len(values)),
+                                             rate_type_codes(rate_types, len(values)))
+        return self.take(record_ids, zip_entries_for(values, match_levels), index)
+
+    def dense_table(self, level: int) -> np.ndarray:
+        """Record id (or -1) for every possible key of a ZIP level, indexed by encode_key at level 0.
+
+        A gather from this table replaces a binary search per claim; an exact
+        ZIP level is 100,000 ZIPs x codes x rate types, a few MB.
+        """
+        if level not in self._dense:
+            size = 10 ** level * len(self.codes) * len(RATE_TYPE_CODES)
+            table = np.full(size, -1, dtype=np.int32)
+            offset = self.key(level, 0, 0, 0)
+            in_level = (self.keys >= offset) & (self.keys < offset + size)
+            table[self.keys[in_level] - offset] = self.record_ids[in_level]
+            self._dense[level] = table
+        return self._dense[level]
+
+    def hcpcs_codes(self, hcpcs, count: int) -> np.ndarray:
+        """Positions in self.codes for one HCPCS code or an array of count codes; -1 where unknown."""
+        return category_codes(hcpcs, count, self.codes, lambda s: s.str.strip().str.upper())
+
+    def find(self, values: np.ndarray, codes: np.ndarray, types: np.ndarray):
+        """(record ids, matched ZIP levels) for encoded claims: ZIPs from zip_values, codes from
+        hcpcs_codes and rate types from rate_type_codes; -1 and 0 where nothing matched."""
+        count = len(values)
+        record_ids = np.full(count, -1, dtype=np.int64)
+        match_levels = np.zeros(count, dtype=np.int64)
+        todo = np.flatnonzero((values >= 0) & (codes >= 0) & (types >= 0))
+        for level in self.levels:
+            if not len(todo):
+                break
+            table = self.dense_table(level)
+            slots = self.key(0, values[todo] // 10 ** (ZIP_LEVELS - level), codes[todo], types[todo])
+            found = table[slots]
+            hit = found >= 0
+            record_ids[todo[hit]] = found[hit]
+            match_levels[todo[hit]] = level
+            todo = todo[~hit]
+        return record_ids, match_levels
+
+    def versions(self) -> "RateVersions":
+        """Effective-date versions of the records, built on first use."""
+        if self._versions is None:
+            self._versions = RateVersions(self)
+        return self._versions
+
+    def take(self, record_ids: np.ndarray, matched_zips: Optional[np.ndarray], index) -> pd.DataFrame:
+        """Record columns for an array of record ids, null where the id is -1.
+
+        Text columns come back categorical: taking codes is far cheaper than
+        copying millions of strings, and -1 is already a null code.
+        """
+        if self._columns is None:
+            self._columns = {col: pd.Categorical(self.records[col]) for col in RECORD_COLUMNS
+                             if col not in ("rate", "source_row")}
+        result = {"record_id": record_ids}
+        for col in RECORD_COLUMNS:
+            if col in self._columns:
+                categorical = self._columns[col]
+                codes = np.append(categorical.codes, -1)[record_ids]
+                result[col] = pd.Categorical.from_codes(codes, dtype=categorical.dtype)
+            else:
+                null = np.nan if col == "rate" else -1
+                result[col] = np.append(self.records[col].to_numpy(), null)[record_ids]
+        if matched_zips is not None:
+            result["matched_zip"] = matched_zips
+        return pd.DataFrame(result, index=index)
+
+
+class RateVersions:
+    """Effective-date intervals of the rates per (county, EOA, HCPCS code, rate type).
+
+    Versions are sorted integer keys (group * DAY_SPAN + effective day)
+    pointing at record ids. Two rates of a group with the same effective date
+    (several providers in one EOA, or both files) resolve like the ZIP index:
+    the long file, then file order.
+    """
+
+    def __init__(self, index: RateIndex):
+        self.index = index
+        records = index.records
+        counties = sorted(set(records["county"].str.lower()))
+        eoa_names = sorted(set(records["eoa_name"].str.lower()))
+        self.counties = {county: i for i, county in enumerate(counties)}
+        self.eoa_names = {eoa_name: i for i, eoa_name in enumerate(eoa_names)}
+        self.shape = (len(counties), len(eoa_names), len(index.codes), len(RATE_TYPE_CODES))
+
+        groups = np.ravel_multi_index((
+            pd.Categorical(records["county"].str.lower(), categories=counties).codes,
+            pd.Categorical(records["eoa_name"].str.lower(), categories=eoa_names).codes,
+            pd.Categorical(records["hcpcs"], categories=index.codes).codes,
+            pd.Categorical(records["rate_type"], categories=RATE_TYPE_CODES).codes,
+        ), self.shape).astype(np.int64)
+        days = date_days(records["effective_date"])
+        candidates = pd.DataFrame({
+            "key": groups * DAY_SPAN + np.maximum(days, 0),
+            "source": records["source"].map(SOURCE_PRIORITY).to_numpy(),
+            "record": np.arange(len(records)),
+        }).sort_values(["key", "source", "record"], kind="stable").drop_duplicates("key")
+        self.keys = candidates["key"].to_numpy(np.int64)
+        self.record_ids = candidates["record"].to_numpy(np.int64)
+
+        # A version ends where the next version of its group starts
+        next_keys = np.append(self.keys[1:], -1)
+        same_group = next_keys // DAY_SPAN == self.keys // DAY_SPAN
+        self.valid_until = np.where(same_group, day_dates(next_keys % DAY_SPAN), "").astype(object)
+
+    def group_ids(self, counties, eoa_names, hcpcs, rate_types, count: int) -> np.ndarray:
+        """Group per claim for single values or arrays of count values; -1 where any part is unknown."""
+        lower = lambda s: s.str.strip().str.lower()
+        parts = [category_codes(counties, count, list(self.counties), lower),
+                 category_codes(eoa_names, count, list(self.eoa_names), lower),
+                 self.index.hcpcs_codes(hcpcs, count),
+                 rate_type_codes(rate_types, count)]
+        known = np.logical_and.reduce([part >= 0 for part in parts])
+        groups = np.ravel_multi_index([np.maximum(part, 0) for part in parts], self.shape)
+        return np.where(known, groups, -1)
+
+    def find(self, groups: np.ndarray, days: np.ndarray) -> np.ndarray:
+        """Positions in self.keys of the version in force per (group, day); -1 where there is none."""
+        queries = groups * DAY_SPAN + days
+        positions = np.searchsorted(self.keys, queries, side="right") - 1
+        found = self.keys[np.maximum(positions, 0)]
+        hit = (groups >= 0) & (days >= 0) & (positions >= 0) & (found // DAY_SPAN == groups)
+        return np.where(hit, positions, -1)
+
+    def as_of(self, county: str, eoa_name: str, hcpcs: str, rate_type: str, service_date) -> Optional[RateRecord]:
+        """The rate in force on service_date (date or "2025-03-15"), or None."""
+        rate_type = RATE_TYPES.get(str(rate_type).strip().lower())
+        parts = (self.counties.get(str(county).strip().lower()), self.eoa_names.get(str(eoa_name).strip().lower()),
+                 self.index.code_index.get(str(hcpcs).strip().upper()),
+                 RATE_TYPE_CODES.index(rate_type) if rate_type else None)
+        day = date_day(service_date)
+        if None in parts or day < 0:
+            return None
+        group = int(np.ravel_multi_index(parts, self.shape))
+        position = int(np.searchsorted(self.keys, group * DAY_SPAN + day, side="right")) - 1
+        if position < 0 or self.keys[position] // DAY_SPAN != group:
+            return None
+        return self.index.record(self.record_ids[position])
+
+    def as_of_batch(self, counties, eoa_names, hcpcs, rate_types, service_dates) -> pd.DataFrame:
+        """Rates in force for arrays of service dates: one row per date, in input order, nulls where none.
+
+        The other arguments are arrays of the same length or single values.
+        valid_until is the next version's effective date ("" for the current
+        version); record_id is -1 where nothing matched.
+        """
+        dates = service_dates if isinstance(service_dates, pd.Series) else pd.Series(np.asarray(service_dates))
+        count = len(dates)
+        positions = self.find(self.group_ids(counties, eoa_names, hcpcs, rate_types, count), date_days(dates))
+        result = self.index.take(np.append(self.record_ids, -1)[positions], None, dates.index)
+        result["valid_until"] = np.append(self.valid_until, None)[positions]
+        return result
+
+    def history(self, county: str, eoa_name: str, hcpcs: str, rate_type: str) -> pd.DataFrame:
+        """Every version of one group, oldest first, with valid_until."""
+        group = self.group_ids(county, eoa_name, hcpcs, rate_type, 1)[0]
+        start, stop = np.searchsorted(self.keys, [group * DAY_SPAN, (group + 1) * DAY_SPAN])
+        positions = np.arange(start, stop) if group >= 0 else np.arange(0)
+        result = self.index.take(self.record_ids[positions], None, pd.RangeIndex(len(positions)))
+        result["valid_until"] = self.valid_until[positions]
+        return result
+
+
+def encode_key(level, value, code, rate_type, code_count: int):
+    """Integer key of (ZIP entry level, ZIP entry value, HCPCS code, rate type); scalars or numpy arrays."""
+    return ((level * 100_000 + value) * code_count + code) * len(RATE_TYPE_CODES) + rate_type
+
+
+def date_days(dates: pd.Series) -> np.ndarray:
+    """Dates (ISO strings, dates, datetimes) as version days, parsing each distinct string once; -1 where
+    missing or unreadable."""
+    if dates.dtype == object:
+        codes, uniques = pd.factorize(dates)
+        parsed = pd.to_datetime(pd.Series(uniques, dtype=object).astype(str), format="mixed", errors="coerce")
+        return np.append(date_days(parsed), -1)[codes]
+    parsed = pd.to_datetime(dates, errors="coerce").to_numpy("datetime64[D]")
+    days = (parsed - DATE_ORIGIN).astype(np.int64) + 1
+    return np.where(np.isnat(parsed), -1, np.clip(days, 0, DAY_SPAN - 1))
+
+
+def date_day(date) -> int:
+    """date_days for one date."""
+    try:
+        parsed = pd.Timestamp(date)
+    except (TypeError, ValueError):
+        return -1
+    if pd.isna(parsed):
+        return -1
+    days = (parsed.to_datetime64().astype("datetime64[D]") - DATE_ORIGIN).astype(np.int64) + 1
+    return int(min(max(days, 0), DAY_SPAN - 1))
+
+
+def day_dates(days: np.ndarray) -> np.ndarray:
+    """Version days back to ISO strings ("" for day 0)."""
+    dates = np.datetime_as_string(DATE_ORIGIN + (np.asarray(days) - 1).astype("timedelta64[D]"), unit="D")
+    return np.where(np.asarray(days) > 0, dates, "")
+
+
+def zip_entry(value: int, level: int) -> str:
+    """The service ZIP entry matching a five-digit ZIP at a level: "94501" or "945xx"."""
+    return f"{value // 10 ** (ZIP_LEVELS - level):0{level}d}" + "x" * (ZIP_LEVELS - level)
+
+
+def zip_entries_for(values: np.ndarray, levels: np.ndarray) -> np.ndarray:
+    """zip_entry over arrays, computed once per distinct (ZIP, level); "" where the level is 0 (no match)."""
+    codes, uniques = pd.factorize(values * 10 + levels)
+    entries = np.array([zip_entry(pair // 10, pair % 10) if pair % 10 else "" for pair in uniques.tolist()],
+                       dtype=object)
+    return entries[codes]
+
+
+def zip_value(zip_code) -> int:
+    """A ZIP (int, "95630" or "95630-1234") as an int, -1 if it isn't one."""
+    if isinstance(zip_code, (int, np.integer)):
+        return int(zip_code) if 0 <= zip_code < 100_000 else -1
+    match = re.match(r"\s*(\d{5})(?!\d)", str(zip_code))
+    return int(match.group(1)) if match else -1
+
+
+def zip_values(zips) -> np.ndarray:
+    """zip_value over an array of ZIPs, parsing each distinct string once."""
+    zips = zips if isinstance(zips, pd.Series) else pd.Series(np.asarray(zips))
+    if pd.api.types.is_integer_dtype(zips.dtype):
+        values = zips.to_numpy(np.int64)
+        return np.where((values >= 0) & (values < 100_000), values, -1)
+    if pd.api.types.is_float_dtype(zips.dtype):
+        values = zips.to_numpy(float)
+        valid = np.isfinite(values) & (values >= 0) & (values < 100_000) & (values == np.floor(values))
+        return np.where(valid, np.nan_to_num(values), -1).astype(np.int64)
+    codes, uniques = pd.factorize(zips)
+    parsed = pd.Series(uniques, dtype=object).astype(str).str.extract(r"^\s*(\d{5})(?!\d)", expand=False)
+    values = np.append(pd.to_numeric(parsed).fillna(-1).to_numpy(np.int64), -1)
+    return values[codes]
+
+
+def category_codes(values, count: int, categories: List[str], normalize) -> np.ndarray:
+    """Positions in categories for a single value or an array of count values; -1 where unknown."""
+    if np.ndim(values) == 0:
+        values = pd.Series([values], dtype=object)
+        return np.full(count, category_codes(values, 1, categories, normalize)[0], dtype=np.int64)
+    codes, uniques = pd.factorize(pd.Series(np.asarray(values, dtype=object)))
+    normalized = normalize(pd.Series(uniques, dtype=object).astype(str))
+    positions = np.append(pd.Categorical(normalized, categories=categories).codes.astype(np.int64), -1)
+    return positions[codes]
+
+
+def rate_type_codes(rate_types, count: int) -> np.ndarray:
+    """Positions in RATE_TYPE_CODES for one rate type or an array of count; -1 where unknown."""
+    return category_codes(rate_types, count, RATE_TYPE_CODES, lambda s: s.str.strip().str.lower().map(RATE_TYPES))
+
+
+def load_index(wide_path: Path = WIDE_RATES_FILE, long_path: Path = LONG_RATES_FILE,
+               index_path: Optional[Path] = INDEX_FILE, rebuild: bool = False) -> RateIndex:
+    """The saved index if it matches both CSVs, otherwise a fresh one (saved unless index_path is None)."""
+    signature = file_signature(wide_path) + file_signature(long_path) + [INDEX_VERSION]
+    if index_path is not None and index_path.exists() and not rebuild:
+        try:
+            index = RateIndex.load(index_path)
+            if index.signature == signature:
+                return index
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Rebuilding unreadable rate index {index_path}: {e}")
+
+    index = RateIndex.build(wide_path, long_path)
+    if index_path is not None:
+        try:
+            index.save(index_path)
+        except OSError as e:
+            logger.warning(f"Could not save rate index {index_path}: {e}")
+    return index
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Look up a California ambulance rate by pickup ZIP, HCPCS code and rate type",
+        epilog='example: python ambulance_rates.py 95630 A0428 "Non-Emergency (IFT)"',
+    )
+    parser.add_argument("zip", help="Pickup ZIP")
+    parser.add_argument("hcpcs", help="HCPCS code, e.g. A0427")
+    parser.add_argument("rate_type", help='"911" or "IFT" (or the wide file\'s Rate Type)')
+    parser.add_argument("--as-of", metavar="DATE",
+                        help="Date of service: the rate in force then for the matched rate's county and EOA "
+                             "(default: the latest rate)")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from the CSVs")
+    parser.add_argument("--index-file", type=Path, default=INDEX_FILE,
+                        help=f"Saved index (default: {INDEX_FILE.name} next to this script)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(message)s")
+    args = parse_args()
+    rate_index = load_index(index_path=args.index_file, rebuild=args.rebuild)
+    found = rate_index.lookup(args.zip, args.hcpcs, args.rate_type)
+    if found is None:
+        raise SystemExit(f"No {args.rate_type} rate for {args.hcpcs} at ZIP {args.zip}")
+    if args.as_of:
+        matched_zip = found.matched_zip
+        found = rate_index.versions().as_of(found.county, found.eoa_name, args.hcpcs, args.rate_type, args.as_of)
+        if found is None:
+            raise SystemExit(f"No {args.rate_type} rate for {args.hcpcs} at ZIP {args.zip} in force on {args.as_of}")
+        found = replace(found, matched_zip=matched_zip)
+    for name, value in vars(found).items():
+        print(f"{name:<16}{value}")
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the ambulance rate index and transport charge calculator.
+
+- Transport charges: generates a synthetic claim batch (pickup ZIPs from the
+  rate tables plus out-of-area and malformed ones, mixed service levels and
+  emergency flags, loaded miles, supplies) and times price_claims on it.
+  A sample is priced again one claim at a time with RateIndex.lookup and
+  Decimal arithmetic, and its totals and unmatched reasons must be the same.
+- Rate versions: as-of lookups for random (county, EOA, HCPCS code, rate
+  type) groups and service dates with RateVersions.as_of_batch. A sample is
+  answered again by scanning and filtering the record table, as before the
+  version index, and must pick the same records.
+
+Usage:
+    python benchmark_ambulance.py [claims]
+    python benchmark_ambulance.py 1000000 --check-sample 50000
+    python benchmark_ambulance.py 5000000 --suite versions
+"""
+
+import argparse
+import time
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+import numpy as np
+import pandas as pd
+
+import ambulance_rates
+import transport_charges
+
+# Configuration
+DEFAULT_CLAIMS = 10_000_000
+DEFAULT_CHECK_SAMPLE = 20_000
+SEED = 42
+
+# Share of claims with a pickup ZIP outside the rate tables, and with a
+# malformed ZIP or service level
+OUT_OF_AREA_FRACTION = 0.05
+MALFORMED_FRACTION = 0.005
+
+SERVICE_LEVELS = np.array(["BLS", "ALS1", "ALS2", "SCT", "bls", " ALS ", "CCT"], dtype=object)
+SERVICE_LEVEL_WEIGHTS = [0.45, 0.3, 0.05, 0.05, 0.08, 0.05, 0.02]
+EMERGENCY_FLAGS = np.array(["Y", "N", "true", "0", "911", "IFT", 911], dtype=object)
+
+# Service dates for the version benchmark, and the share of lookups for a
+# county that has no rates
+SERVICE_DATES = ("2023-01-01", "2026-12-31")
+UNKNOWN_COUNTY_FRACTION = 0.02
+
+
+def indexed_zips(index: ambulance_rates.RateIndex) -> np.ndarray:
+    """The exact ZIPs in the index, as five-digit strings."""
+    per_level = len(index.codes) * len(ambulance_rates.RATE_TYPE_CODES)
+    level = index.keys // (per_level * 100_000)
+    values = (index.keys // per_level) % 100_000
+    return np.array([f"{value:05d}" for value in np.unique(values[level == ambulance_rates.ZIP_LEVELS])],
+                    dtype=object)
+
+
+def synthetic_claims(index: ambulance_rates.RateIndex, count: int) -> pd.DataFrame:
+    rng = np.random.default_rng(SEED)
+    zips = rng.choice(indexed_zips(index), count)
+    out_of_area = rng.random(count) < OUT_OF_AREA_FRACTION
+    zips[out_of_area] = rng.choice(np.array(["10001", "60601", "73301-0001", "02139"], dtype=object),
+                                   int(out_of_area.sum()))
+    levels = rng.choice(SERVICE_LEVELS, count, p=SERVICE_LEVEL_WEIGHTS)
+    malformed = rng.random(count) < MALFORMED_FRACTION
+    zips[malformed] = "9563"
+    levels[rng.random(count) < MALFORMED_FRACTION] = "MICU"
+
+    miles = rng.gamma(2.0, 6.0, count).round(1)
+    miles[rng.random(count) < 0.03] = 0.0
+    supplies = np.where(rng.random(count) < 0.2, rng.uniform(10, 250, count).round(2), np.nan).astype(object)
+    supplies[rng.random(count) < MALFORMED_FRACTION] = "n/a"
+    return pd.DataFrame({
+        "claim_id": np.arange(count),
+        "pickup_zip": zips,
+        "service_level": levels,
+        "emergency": rng.choice(EMERGENCY_FLAGS, count),
+        "loaded_miles": miles,
+        "supplies": supplies,
+    })
+
+
+def cents(amount: Decimal) -> Decimal:
+    return amount.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def price_one(index: ambulance_rates.RateIndex, claim) -> tuple:
+    """(total or None, unmatched reason or None) for one claim, with scalar lookups and exact decimals."""
+    zip_code = ambulance_rates.zip_value(claim.pickup_zip)
+    codes = transport_charges.SERVICE_LEVELS.get(str(claim.service_level).strip().upper())
+    emergency = transport_charges.EMERGENCY_VALUES.get(str(claim.emergency).strip().lower())
+    miles = claim.loaded_miles
+    if zip_code < 0:
+        return None, "invalid ZIP"
+    if codes is None:
+        return None, "unknown service level"
+    if emergency is None:
+        return None, "unknown emergency flag"
+    if not miles >= 0:
+        return None, "invalid loaded miles"
+    if pd.isna(claim.supplies) or not str(claim.supplies).strip():
+        supplies = Decimal(0)
+    else:
+        try:
+            supplies = Decimal(str(claim.supplies).strip())
+        except InvalidOperation:
+            return None, "invalid supplies"
+        if not supplies.is_finite():
+            return None, "invalid supplies"
+    rate_type = "911" if emergency else "IFT"
+    base = index.lookup(zip_code, codes[0] if emergency else codes[1], rate_type)
+    if base is None:
+        return None, "no base rate"
+    mileage = Decimal(0)
+    if miles > 0:
+        mileage_record = index.lookup(zip_code, transport_charges.MILEAGE_CODE, rate_type)
+        if mileage_record is None:
+            return None, "no mileage rate"
+        mileage = cents(Decimal(str(mileage_record.rate)) * Decimal(str(miles)))
+    return float(cents(Decimal(str(base.rate)) + mileage + supplies)), None
+
+
+def benchmark_charges(count: int, check_sample: int):
+    index = ambulance_rates.load_index()
+    claims = synthetic_claims(index, count)
+    print(f"Transport charge benchmark: {count:,} claims, {len(index.keys):,} index keys")
+
+    start = time.perf_counter()
+    result = transport_charges.price_claims(claims, index)
+    seconds = time.perf_counter() - start
+    print(result.summary())
+    print(f"price_claims: {seconds:.2f}s, {count / seconds:,.0f} claims/sec")
+
+    sample = claims.sample(min(check_sample, count), random_state=SEED)
+    totals = result.priced["total"]
+    reasons = result.unmatched["reason"]
+    mismatches = 0
+    start = time.perf_counter()
+    for claim in sample.itertuples():
+        expected_total, expected_reason = price_one(index, claim)
+        if expected_reason is None:
+            same = claim.Index in totals.index and totals[claim.Index] == expected_total
+        else:
+            same = claim.Index in reasons.index and reasons[claim.Index] == expected_reason
+        mismatches += not same
+    loop_seconds = time.perf_counter() - start
+    print(f"Row loop on {len(sample):,} claims: {loop_seconds:.2f}s, {len(sample) / loop_seconds:,.0f} claims/sec; "
+          f"matches vectorized: {'yes' if not mismatches else f'NO ({mismatches:,} differ)'}")
+
+
+def synthetic_as_of_queries(records: pd.DataFrame, count: int) -> pd.DataFrame:
+    """Groups drawn from the records (so most exist), ISO service dates across SERVICE_DATES."""
+    rng = np.random.default_rng(SEED)
+    groups = records[["county", "eoa_name", "hcpcs", "rate_type"]].drop_duplicates()
+    queries = groups.iloc[rng.integers(0, len(groups), count)].reset_index(drop=True)
+    queries.loc[rng.random(count) < UNKNOWN_COUNTY_FRACTION, "county"] = "Nowhere"
+    first, last = (np.datetime64(date, "D") for date in SERVICE_DATES)
+    days = rng.integers(0, (last - first).astype(int) + 1, count).astype("timedelta64[D]")
+    queries["service_date"] = np.datetime_as_string(first + days, unit="D").astype(object)
+    return queries
+
+
+def as_of_scan(records: pd.DataFrame, query) -> int:
+    """Record id in force for one query by filtering the whole record table; -1 if none."""
+    rows = records[(records["county"].str.lower() == query.county.lower())
+                   & (records["eoa_name"].str.lower() == query.eoa_name.lower())
+                   & (records["hcpcs"] == query.hcpcs) & (records["rate_type"] == query.rate_type)
+                   & (records["effective_date"] <= query.service_date)]
+    if rows.empty:
+        return -1
+    rows = rows.assign(priority=rows["source"].map(ambulance_rates.SOURCE_PRIORITY))
+    return int(rows.sort_values(["effective_date", "priority"], ascending=[False, True], kind="stable").index[0])
+
+
+def benchmark_versions(count: int, check_sample: int):
+    index = ambulance_rates.load_index()
+    start = time.perf_counter()
+    versions = index.versions()
+    build_seconds = time.perf_counter() - start
+    queries = synthetic_as_of_queries(index.records, count)
+    print(f"Rate version benchmark: {count:,} as-of lookups, {len(versions.keys):,} versions "
+          f"(built in {build_seconds * 1000:.1f}ms)")
+
+    start = time.perf_counter()
+    result = versions.as_of_batch(queries["county"], queries["eoa_name"], queries["hcpcs"], queries["rate_type"],
+                                  queries["service_date"])
+    seconds = time.perf_counter() - start
+    print(f"as_of_batch: {seconds:.2f}s, {count / seconds:,.0f} lookups/sec; "
+          f"{(result['record_id'] >= 0).sum():,} found")
+
+    sample = queries.sample(min(check_sample, count), random_state=SEED)
+    batch_rows = [(row.source, row.source_row) if row.record_id >= 0 else None
+                  for row in result.loc[sample.index].itertuples()]
+    start = time.perf_counter()
+    found = [versions.as_of(query.county, query.eoa_name, query.hcpcs, query.rate_type, query.service_date)
+             for query in sample.itertuples()]
+    scalar_seconds = time.perf_counter() - start
+    mismatches = sum(expected != (record and (record.source, record.source_row))
+                     for expected, record in zip(batch_rows, found))
+    print(f"as_of on {len(sample):,} lookups: {scalar_seconds / len(sample) * 1e6:.1f}us each; "
+          f"matches as_of_batch: {'yes' if not mismatches else f'NO ({mismatches:,} differ)'}")
+
+    start = time.perf_counter()
+    expected = np.array([as_of_scan(index.records, query) for query in sample.itertuples()])
+    scan_seconds = time.perf_counter() - start
+    mismatches = (result["record_id"].to_numpy()[sample.index] != expected).sum()
+    print(f"Table scan on {len(sample):,} lookups: {scan_seconds / len(sample) * 1e6:.1f}us each; "
+          f"matches as_of_batch: {'yes' if not mismatches else f'NO ({mismatches:,} differ)'}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the ambulance transport charge calculator")
+    parser.add_argument("claims", nargs="?", type=int, default=DEFAULT_CLAIMS,
+                        help=f"Claims (or as-of lookups) in the synthetic batch (default: {DEFAULT_CLAIMS:,})")
+    parser.add_argument("--check-sample", type=int, default=DEFAULT_CHECK_SAMPLE,
+                        help=f"Claims re-priced one at a time to check the batch (default: {DEFAULT_CHECK_SAMPLE:,})")
+    parser.add_argument("--suite", choices=["all", "charges", "versions"], default="all",
+                        help="Benchmarks to run (default: all)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.suite in ("all", "charges"):
+        benchmark_charges(args.claims, args.check_sample)
+    if args.suite in ("all", "versions"):
+        benchmark_versions(args.claims, args.check_sample)
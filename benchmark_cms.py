@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the CMS IDR combiner (cms_test).
+
+- Chunk processing: writes a synthetic IDR-style CSV (OON Emergency file
+  layout: dispute columns, provider and issuer names, numeric and missing
+  values), reads it the way process_files does and times the row-by-row
+  path (process_chunk_rowwise) against the vectorized one (process_chunk).
+  The CSV text each path writes must be byte for byte the same, and the
+  name caches' hit rates are reported.
+- Rule matching: checks the compiled issuer, legal suffix and abbreviation
+  matchers against the original one-pattern-at-a-time loops (kept here as
+  sequential_*) on randomly built names, scalar and vectorized, then times
+  both.
+
+Usage:
+    python benchmark_cms.py [rows]
+    python benchmark_cms.py 1000000 --chunk-size 50000
+    python benchmark_cms.py --suite rules --names 200000
+"""
+
+import argparse
+import importlib.util
+import io
+import random
+import re
+import tempfile
+import time
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Configuration
+CMS_SCRIPT = Path(__file__).parent / "cms_test"
+DEFAULT_ROWS = 1_000_000
+SEED = 42
+
+# Share of cells replaced by one of the combiner's MISSING_VALUES tokens
+MISSING_FRACTION = 0.05
+
+# Distinct provider and issuer names in the synthetic file; real IDR files
+# repeat a few thousand names across millions of rows
+PROVIDER_NAMES = 5_000
+FACILITY_GROUPS = 800
+
+PROVIDER_WORDS = ["Emergency", "Physicians", "Medical", "Group", "Anesthesia", "Radiology", "Partners",
+                  "Health", "Care", "Associates", "Valley", "Coastal", "Metro", "Regional", "Air",
+                  "Ambulance", "Critical", "Transport", "Specialists", "Surgical"]
+PROVIDER_SUFFIXES = ["", " Inc.", ", LLC", " P.A.", " MD", " PC", " PLLC", " Corp", " Company", " LLP",
+                     " L.L.C.", " Ltd"]
+ISSUER_NAMES = [
+    "Cigna Health and Life Insurance Company", "CIGNA", "Evernorth Behavioral Health",
+    "Blue Cross Blue Shield of Texas", "BCBS of Illinois", "Anthem Blue Cross", "Highmark Inc.",
+    "UnitedHealthcare Insurance Company", "UHC of California", "UMR, Inc.", "Optum",
+    "Aetna Life Insurance Company", "CVS Health", "Humana Insurance Company", "Kaiser Permanente",
+    "Ambetter from Superior", "Health Net", "Molina Healthcare", "Oscar Insurance", "Lincoln National",
+    "Meritain Health", "Allied Benefit Systems, LLC", "Surest", "HealthSmart Benefit Solutions Inc",
+    "Imagine360", "  Independent   Health ", "Baylor Scott & White Health Plan",
+]
+DISPUTE_TYPES = ["Single", "Bundled", "Batched"]
+SERVICE_CODES = ["99285", "99284", "A0429", "A0427", "A0436", "36556", "99291", "31500"]
+OUTCOMES = ["In Favor of Provider/Facility", "In Favor of Health Plan/Issuer", "Split Decision"]
+STATES = ["TX", "FL", "GA", "NY", "AZ", "TN", "NJ", "CA", "NC", "VA"]
+MISSING_TOKENS = ["N/A", "N/R", "+", "^", "*", ""]
+
+# Names per rule-matching run; the equivalence check uses the same count
+DEFAULT_RULE_NAMES = 100_000
+
+# Pieces random names are built from: issuer keywords (several per name, so
+# patterns compete for priority), legal suffixes, abbreviations, odd case,
+# spacing and non-ASCII letters
+RULE_ATOMS = [
+    "cigna", "Evernorth", "blue cross", "BlueShield", "blue  cross blue shield", "bc bs", "BCBS", "Anthem",
+    "empire blue", "highmark", "carefist", "United Health Care", "unitedhealthcare", "UHC", "optum", "UMR",
+    "aetna", "CVS Health", "humana", "kaiser", "ambetter", "health net", "molina", "medicare", "medicaid",
+    "tricare", "lincoln national", "lincoln", "emblem health", "oscar", "bright health", "alignment",
+    "Inc", "Inc.", "LLC", "L.L.C.", "P.A.", "PA", "MD", "M.D.", "PC", "Co", "Co.", "Corp", "Corporation",
+    "Company", "LLP", "PLLC", "Ltd", "of", "Texas", "Group", "Physicians", "Medical", "&", "-", "'s", "x",
+    "ÉMPIRE BLUE", "Straße", "İstanbul", "ǅenan", "Ωmega", "uhcx", "xcigna",
+]
+RULE_SEPARATORS = [" ", " ", " ", "", "  ", ", ", "\t"]
+
+
+def load_cms_module():
+    """Import the combiner script (it has no .py extension) as a module."""
+    loader = SourceFileLoader("cms_combiner", str(CMS_SCRIPT))
+    spec = importlib.util.spec_from_loader("cms_combiner", loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+def provider_names(count: int, rng: np.random.Generator) -> np.ndarray:
+    """Distinct provider names with mixed case, spacing and legal suffixes."""
+    names = []
+    for i in range(count):
+        words = " ".join(rng.choice(PROVIDER_WORDS, rng.integers(2, 5)))
+        style = i % 4
+        if style == 1:
+            words = words.upper()
+        elif style == 2:
+            words = words.lower().replace(" ", "  ")
+        names.append(f"{words} {i}{rng.choice(PROVIDER_SUFFIXES)}")
+    return np.array(names, dtype=object)
+
+
+def with_missing(values: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Replace MISSING_FRACTION of the values with missing tokens."""
+    values = values.astype(object)
+    missing = rng.random(len(values)) < MISSING_FRACTION
+    values[missing] = rng.choice(MISSING_TOKENS, int(missing.sum()))
+    return values
+
+
+def write_idr_file(path: Path, rows: int):
+    """Write a synthetic OON Emergency IDR file."""
+    rng = np.random.default_rng(SEED)
+    providers = provider_names(PROVIDER_NAMES, rng)
+    groups = provider_names(FACILITY_GROUPS, rng)
+    offers = rng.uniform(50, 5000, rows).round(2).astype(object)
+    offers[rng.random(rows) < 0.1] = "N/A"
+
+    pd.DataFrame({
+        "Dispute Number": [f"DISP-{i:08d}" for i in range(rows)],
+        "Type of Dispute": rng.choice(DISPUTE_TYPES, rows),
+        "Provider/Facility Group Name": with_missing(rng.choice(groups, rows), rng),
+        "Provider/Facility Name": with_missing(rng.choice(providers, rows), rng),
+        "Provider/Facility NPI Number": rng.integers(1_000_000_000, 2_000_000_000, rows),
+        "Health Plan/Issuer Name": with_missing(rng.choice(np.array(ISSUER_NAMES, dtype=object), rows), rng),
+        "Service Code": with_missing(rng.choice(SERVICE_CODES, rows), rng),
+        "Location of Service": rng.choice(STATES, rows),
+        "Payment Determination Outcome": with_missing(rng.choice(OUTCOMES, rows), rng),
+        "Prevailing Offer": offers,
+        "QPA": rng.uniform(20, 2000, rows).round(2),
+        "Offer as % of QPA": with_missing(rng.uniform(50, 900, rows).round(1).astype(str), rng),
+        "Length of Time to Make Determination": rng.integers(1, 200, rows),
+        "Initiating Party": rng.choice(["Provider/Facility", "Health Plan/Issuer"], rows),
+    }).to_csv(path, index=False)
+
+
+def run_path(cms, process, path: Path, chunk_size: int):
+    """Process the file in chunks as process_files does; return (CSV text, processing seconds)."""
+    all_columns = cms.get_all_columns([path])
+    out = io.StringIO()
+    busy = 0.0
+    for chunk_num, chunk in enumerate(pd.read_csv(path, chunksize=chunk_size, low_memory=False)):
+        start = time.perf_counter()
+        processed = process(chunk, "emergency", "Q1").reindex(columns=all_columns, fill_value="")
+        busy += time.perf_counter() - start
+        processed.to_csv(out, index=False, header=chunk_num == 0)
+    return out.getvalue(), busy
+
+
+def benchmark_chunks(cms, rows: int, chunk_size: int):
+    """Time process_chunk_rowwise against process_chunk and check they write the same CSV."""
+    with tempfile.TemporaryDirectory(prefix="cms_bench_") as tmp:
+        path = Path(tmp) / "2025 Q1 OON Emergency & Non-Emergency.csv"
+        write_idr_file(path, rows)
+        size_mb = path.stat().st_size / 2**20
+        print(f"Chunk benchmark: {rows:,} rows, {size_mb:.0f} MB, chunks of {chunk_size:,}")
+
+        rowwise_text, rowwise_secs = run_path(cms, cms.process_chunk_rowwise, path, chunk_size)
+        vector_text, vector_secs = run_path(cms, cms.process_chunk, path, chunk_size)
+
+    speedup = rowwise_secs / vector_secs if vector_secs else float("inf")
+    print(f"{'path':<12}{'seconds':>10}{'rows/sec':>14}")
+    print(f"{'rowwise':<12}{rowwise_secs:>10.2f}{rows / rowwise_secs:>14,.0f}")
+    print(f"{'vectorized':<12}{vector_secs:>10.2f}{rows / vector_secs:>14,.0f}")
+    print(f"Speedup {speedup:.1f}x; output identical: {'yes' if rowwise_text == vector_text else 'NO'}")
+    print(f"Name cache: {cms.name_cache.stats()}")
+    print(f"Issuer cache: {cms.issuer_cache.stats()}")
+
+
+def sequential_remove_legal_suffixes(cms, name: str) -> str:
+    """remove_legal_suffixes as it was before the suffixes were compiled."""
+    for suffix_pattern in cms.LEGAL_SUFFIXES:
+        name = re.sub(suffix_pattern, "", name, flags=re.IGNORECASE)
+    return name.strip()
+
+
+def sequential_expand_abbreviations(cms, name: str) -> str:
+    """expand_abbreviations as it was before the abbreviations were compiled."""
+    name_upper = name.upper()
+    for abbrev, expansion in cms.ABBREVIATIONS.items():
+        pattern = r"\b" + re.escape(abbrev) + r"\b"
+        if re.search(pattern, name_upper):
+            name = re.sub(pattern, expansion, name, flags=re.IGNORECASE)
+    return name
+
+
+def sequential_issuer_canonical_name(cms, name_lower: str):
+    """First ISSUER_PATTERNS match, one re.search per pattern."""
+    for pattern, canonical_name in cms.ISSUER_PATTERNS:
+        if re.search(pattern, name_lower):
+            return canonical_name
+    return None
+
+
+def sequential_normalize_name(cms, name: str) -> str:
+    if not name:
+        return ""
+    name = " ".join(name.split())
+    name = sequential_expand_abbreviations(cms, name).title()
+    return sequential_remove_legal_suffixes(cms, name).strip()
+
+
+def sequential_normalize_issuer_name(cms, name: str) -> str:
+    if not name:
+        return ""
+    canonical_name = sequential_issuer_canonical_name(cms, name.lower())
+    return canonical_name if canonical_name is not None else sequential_normalize_name(cms, name)
+
+
+def random_names(count: int) -> list:
+    """Names of 1-6 random RULE_ATOMS in random case, plus the synthetic file's issuer names."""
+    rng = random.Random(SEED)
+    names = list(ISSUER_NAMES)
+    while len(names) < count:
+        name = ""
+        for _ in range(rng.randint(1, 6)):
+            atom = rng.choice(RULE_ATOMS)
+            atom = rng.choice([atom, atom, atom.upper(), atom.lower(), atom.title()])
+            name += rng.choice(RULE_SEPARATORS) + atom
+        names.append(name)
+    return names[:count]
+
+
+def check_rules(cms, names: list) -> bool:
+    """Compare every compiled matcher with its sequential loop; print and count mismatches."""
+    checks = [
+        ("remove_legal_suffixes", cms.remove_legal_suffixes, lambda n: sequential_remove_legal_suffixes(cms, n)),
+        ("expand_abbreviations", cms.expand_abbreviations, lambda n: sequential_expand_abbreviations(cms, n)),
+        ("issuer_canonical_name", lambda n: cms.issuer_canonical_name(n.lower()),
+         lambda n: sequential_issuer_canonical_name(cms, n.lower())),
+        ("normalize_issuer_name", cms.normalize_issuer_name, lambda n: sequential_normalize_issuer_name(cms, n)),
+    ]
+    results = [(label, [compiled(n) for n in names], [sequential(n) for n in names])
+               for label, compiled, sequential in checks]
+
+    series = pd.Series(names, dtype=object)
+    results.append(("normalize_names", cms.normalize_names(series).tolist(),
+                    [sequential_normalize_name(cms, n) for n in names]))
+    results.append(("normalize_issuer_names", cms.normalize_issuer_names(series).tolist(),
+                    [sequential_normalize_issuer_name(cms, n) for n in names]))
+
+    failures = 0
+    for label, got, expected in results:
+        bad = [i for i, (a, b) in enumerate(zip(got, expected)) if a != b]
+        failures += len(bad)
+        print(f"{label:<24}{'ok' if not bad else f'{len(bad):,} mismatches'}")
+        for i in bad[:3]:
+            print(f"    {names[i]!r}: {got[i]!r} != {expected[i]!r}")
+    return failures == 0
+
+
+def benchmark_rules(cms, count: int):
+    """Check the compiled rule matchers against the sequential loops, then time both."""
+    names = random_names(count)
+    print(f"Rule benchmark: {count:,} random names, {len(cms.ISSUER_PATTERNS)} issuer patterns, "
+          f"{len(cms.LEGAL_SUFFIXES)} legal suffixes, {len(cms.ABBREVIATIONS)} abbreviations")
+    identical = check_rules(cms, names)
+
+    lowered = [n.lower() for n in names]
+    timings = [
+        ("remove_legal_suffixes", lambda: [sequential_remove_legal_suffixes(cms, n) for n in names],
+         lambda: [cms.remove_legal_suffixes(n) for n in names]),
+        ("expand_abbreviations", lambda: [sequential_expand_abbreviations(cms, n) for n in names],
+         lambda: [cms.expand_abbreviations(n) for n in names]),
+        ("issuer_canonical_name", lambda: [sequential_issuer_canonical_name(cms, n) for n in lowered],
+         lambda: [cms.issuer_canonical_name(n) for n in lowered]),
+        ("normalize_issuer_name", lambda: [sequential_normalize_issuer_name(cms, n) for n in names],
+         lambda: [cms.normalize_issuer_name(n) for n in names]),
+    ]
+    print(f"{'function':<24}{'sequential':>12}{'compiled':>12}{'speedup':>10}")
+    for label, sequential, compiled in timings:
+        start = time.perf_counter()
+        sequential()
+        sequential_secs = time.perf_counter() - start
+        start = time.perf_counter()
+        compiled()
+        compiled_secs = time.perf_counter() - start
+        print(f"{label:<24}{sequential_secs:>12.3f}{compiled_secs:>12.3f}{sequential_secs / compiled_secs:>9.1f}x")
+    print(f"Compiled matchers identical to sequential rules: {'yes' if identical else 'NO'}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the CMS IDR combiner")
+    parser.add_argument("rows", nargs="?", type=int, default=DEFAULT_ROWS,
+                        help=f"Rows in the synthetic IDR file (default: {DEFAULT_ROWS:,})")
+    parser.add_argument("--chunk-size", type=int, help="Rows per chunk (default: the combiner's CHUNK_SIZE)")
+    parser.add_argument("--suite", choices=["all", "chunks", "rules"], default="all",
+                        help="Which benchmark to run (default: all)")
+    parser.add_argument("--names", type=int, default=DEFAULT_RULE_NAMES,
+                        help=f"Random names for the rule benchmark (default: {DEFAULT_RULE_NAMES:,})")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    cms_module = load_cms_module()
+    if args.suite in ("all", "rules"):
+        benchmark_rules(cms_module, args.names)
+    if args.suite in ("all", "chunks"):
+        benchmark_chunks(cms_module, args.rows, args.chunk_size or cms_module.CHUNK_SIZE)
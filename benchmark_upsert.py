@@ -0,0 +1,759 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the CSV to SQL Server upsert script.
+
+- Cleaning: times the row-by-row path (clean_dataframe_rowwise) against the
+  vectorized engine (clean_dataframe) one column type at a time, and checks
+  that both produce the same values.
+- Staging load: pushes cleaned rows through the SQLite stand-in loader to
+  measure client-side loader throughput without SQL Server.
+- Pipeline: generates synthetic PartnerFile_MMDDYYYY.csv files matching
+  COLUMNS and times each stage in isolation (read_csv, clean_dataframe,
+  staging load, merge) with SQLite standing in for SQL Server. Results can
+  be saved as JSON and compared against an earlier run.
+- Memory: traces one synthetic chunk through prepare_staging_frame and each
+  staging loader and reports the peak traced memory as a multiple of the raw
+  chunk (target: about MEMORY_TARGET_RATIO).
+- Faults: loads and merges synthetic files through the connection pool and
+  retry layer over a SQLite stand-in that drops the connection at random,
+  and checks the main table matches a fault-free run.
+
+Usage:
+    python benchmark_upsert.py [rows]
+    python benchmark_upsert.py 1000000 --suite pipeline --width 40 --dirtiness 0.1 \\
+        --files 3 --json results.json --compare baseline.json
+    python benchmark_upsert.py 500000 --suite memory
+    python benchmark_upsert.py 50000 --suite faults --fault-rate 0.05
+"""
+
+import argparse
+import gc
+import importlib.util
+import json
+import math
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Configuration
+UPSERT_SCRIPT = Path(__file__).parent / "test.py"   # deployed as csv_sql_upsert.py
+DEFAULT_ROWS = 200_000
+SEED = 42
+
+# Share of cells that get a dirty/unusual value instead of a clean one
+DIRTY_FRACTION = 0.05
+
+# Pipeline benchmark defaults: CSV columns per file (COLUMNS plus filler),
+# share of dirty cells, number of daily files, and share of each file's keys
+# that are new (the rest update keys from the previous file)
+DEFAULT_WIDTH = 20
+DEFAULT_FILES = 2
+NEW_KEY_FRACTION = 0.1
+FIRST_FILE_DATE = datetime(2026, 1, 1)
+
+# Memory benchmark: loaders traced, and the peak-to-raw-chunk ratio aimed for
+MEMORY_LOADERS = ["executemany", "tvp", "sqlite"]
+MEMORY_TARGET_RATIO = 1.5
+
+# Fault benchmark: share of statements that fail with a dropped connection,
+# retries allowed per step, and the backoff base (kept short for the benchmark)
+DEFAULT_FAULT_RATE = 0.02
+FAULT_RETRY_ATTEMPTS = 10
+FAULT_RETRY_BASE_SECONDS = 0.001
+
+# Dirty values per column type, mixed in with generated clean values
+DIRTY_VALUES = {
+    "date": ["1/13/2026", "13-Jan-2026", " 2026-01-14 ", "NULL", "", "not a date"],
+    "datetime": ["1/13/2026 8:15 AM", "2026-01-13", "N/A"],
+    "integer": [" 4,567 ", "89.0", "", "abc", "1 000"],
+    "decimal": ["$1,234.56", "(100.00)", "€5", "-", "n/a", "  7 "],
+    "boolean": ["yes", "No", "maybe", ""],
+    "string": ["NULL", "", " status "],
+}
+
+
+def clean_value(kind: str, rng: random.Random) -> str:
+    """A well-formed value of the given column type."""
+    if kind == "date":
+        return f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    if kind == "datetime":
+        return f"2026-01-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+    if kind == "integer":
+        return str(rng.randint(1, 10_000_000))
+    if kind == "decimal":
+        return f"{rng.uniform(-1000, 100_000):.2f}"
+    if kind == "boolean":
+        return rng.choice(["Y", "N", "1", "0"])
+    return rng.choice(["Acme Corp", "  widget ", "Active", "Closed "])
+
+
+def make_values(kind: str, rows: int, rng: random.Random) -> list:
+    """Generate a column of mostly clean values with DIRTY_FRACTION dirty ones."""
+    return [
+        rng.choice(DIRTY_VALUES[kind]) if rng.random() < DIRTY_FRACTION else clean_value(kind, rng)
+        for _ in range(rows)
+    ]
+
+
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%d-%b-%Y"]
+DATETIME_FORMATS = ["%Y-%m-%d %H:%M:%S", "%m/%d/%Y %I:%M %p"]
+BOOLEAN_MAPPING = {"Y": True, "N": False, "Yes": True, "No": False, "1": True, "0": False}
+
+
+def load_upsert_module():
+    """Import the upsert script as a module."""
+    spec = importlib.util.spec_from_file_location("csv_sql_upsert", UPSERT_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_config(upsert, kind: str):
+    """Build a Config whose cleaning rules cover only the benchmark column."""
+    config = upsert.Config(
+        server="", database="", archive_path="", recent_path="",
+        date_columns={}, datetime_columns={}, integer_columns=[],
+        decimal_columns=[], boolean_columns={},
+    )
+    if kind == "date":
+        config.date_columns = {"col": DATE_FORMATS}
+    elif kind == "datetime":
+        config.datetime_columns = {"col": DATETIME_FORMATS}
+    elif kind == "integer":
+        config.integer_columns = ["col"]
+    elif kind == "decimal":
+        config.decimal_columns = ["col"]
+    elif kind == "boolean":
+        config.boolean_columns = {"col": BOOLEAN_MAPPING}
+    return config
+
+
+def expected_values(upsert, kind: str, values: list, config) -> list:
+    """What the row-by-row parsers return for each (null-mapped, trimmed) value."""
+    parsers = {
+        "date": lambda v: (lambda d: d.date() if d else None)(upsert.parse_date(v, DATE_FORMATS)),
+        "datetime": lambda v: upsert.parse_date(v, DATETIME_FORMATS),
+        "integer": upsert.parse_integer,
+        "decimal": upsert.parse_decimal,
+        "boolean": lambda v: upsert.parse_boolean(v, BOOLEAN_MAPPING),
+        "string": lambda v: v,
+    }
+    parser = parsers[kind]
+    return [None if v in config.null_values else parser(v.strip()) for v in values]
+
+
+def same_value(a, b) -> bool:
+    if a is None or b is None:
+        return a is b
+    if isinstance(a, float) and math.isnan(a):
+        return isinstance(b, float) and math.isnan(b)
+    return type(a) is type(b) and a == b
+
+
+def benchmark_cleaning(upsert, rows: int):
+    """Time row-by-row vs vectorized cleaning for each column type."""
+    print(f"Cleaning benchmark: {rows:,} rows per column type")
+    print(f"{'type':<10}{'row-by-row':>14}{'vectorized':>14}{'speedup':>10}  match")
+
+    rng = random.Random(SEED)
+    for kind in DIRTY_VALUES:
+        values = make_values(kind, rows, rng)
+        df = pd.DataFrame({"col": values}, dtype=object)
+        config = make_config(upsert, kind)
+
+        start = time.perf_counter()
+        upsert.clean_dataframe_rowwise(df, config)
+        rowwise_secs = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cleaned = upsert.clean_dataframe(df, config)
+        vector_secs = time.perf_counter() - start
+
+        expected = expected_values(upsert, kind, values, config)
+        match = all(same_value(a, b) for a, b in zip(cleaned["col"], expected))
+
+        speedup = rowwise_secs / vector_secs if vector_secs else float("inf")
+        print(f"{kind:<10}{rowwise_secs:>13.3f}s{vector_secs:>13.3f}s{speedup:>9.1f}x  {'yes' if match else 'NO'}")
+
+
+def benchmark_staging_load(upsert, rows: int):
+    """Time prepare_staging_frame + the SQLite stand-in loader on a synthetic COLUMNS frame."""
+    rng = random.Random(SEED)
+    config = upsert.Config(server="", database="", archive_path="", recent_path="", loader="sqlite")
+    df = pd.DataFrame({
+        "uniqueID": [str(i) for i in range(rows)],
+        "name": make_values("string", rows, rng),
+        "value": make_values("decimal", rows, rng),
+        "status": make_values("string", rows, rng),
+    })
+
+    conn = sqlite3.connect(":memory:")
+    loader = upsert.get_staging_loader(config)
+    loader.ensure_objects(conn)
+
+    start = time.perf_counter()
+    staged = upsert.prepare_staging_frame(config, df, "PartnerFile_01012026.csv")
+    prepare_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    loaded = 0
+    for offset in range(0, len(staged), config.batch_size):
+        loaded += loader.load(conn, staged.iloc[offset:offset + config.batch_size])
+    load_secs = time.perf_counter() - start
+    conn.close()
+
+    print(f"\nStaging load benchmark ({loader.name} loader): {loaded:,} rows")
+    print(f"  prepare: {prepare_secs:.3f}s ({rows / prepare_secs:,.0f} rows/sec)")
+    print(f"  load:    {load_secs:.3f}s ({loaded / load_secs:,.0f} rows/sec)")
+
+
+def column_kind(sql_type: str) -> str:
+    """Benchmark value kind (a DIRTY_VALUES key) for a SQL Server column type."""
+    sql_type = sql_type.upper()
+    if sql_type.startswith(("INT", "BIGINT", "SMALLINT", "TINYINT")):
+        return "integer"
+    if sql_type.startswith(("DECIMAL", "NUMERIC", "FLOAT", "REAL", "MONEY")):
+        return "decimal"
+    if sql_type.startswith(("DATETIME", "SMALLDATETIME")):
+        return "datetime"
+    if sql_type.startswith("DATE"):
+        return "date"
+    if sql_type.startswith("BIT"):
+        return "boolean"
+    return "string"
+
+
+def synthetic_column(kind: str, rows: int, dirtiness: float, rng: np.random.Generator) -> np.ndarray:
+    """Vectorized make_values: well-formed values of a kind with a dirtiness share of DIRTY_VALUES."""
+    if kind == "integer":
+        values = rng.integers(1, 10_000_000, rows).astype(str)
+    elif kind == "decimal":
+        values = np.char.mod("%.2f", rng.uniform(-1000, 100_000, rows))
+    elif kind in ("date", "datetime"):
+        seconds = rng.integers(0, 365 * 86400, rows)
+        stamps = pd.Timestamp("2026-01-01") + pd.to_timedelta(seconds, unit="s")
+        fmt = DATE_FORMATS[0] if kind == "date" else DATETIME_FORMATS[0]
+        values = np.asarray(stamps.strftime(fmt))
+    elif kind == "boolean":
+        values = rng.choice(["Y", "N", "1", "0"], rows)
+    else:
+        values = rng.choice(["Acme Corp", "  widget ", "Active", "Closed ", "Pending review"], rows)
+
+    values = values.astype(object)
+    dirty = rng.random(rows) < dirtiness
+    values[dirty] = rng.choice(DIRTY_VALUES[kind], int(dirty.sum()))
+    return values
+
+
+def write_partner_file(upsert, directory: Path, file_date: datetime, keys: np.ndarray, width: int,
+                       dirtiness: float, rng: np.random.Generator) -> Path:
+    """
+    Write one synthetic PartnerFile_MMDDYYYY.csv with the given unique keys.
+
+    Columns follow upsert.COLUMNS (CSV names via COLUMN_MAPPING), padded with
+    filler text columns up to width. The unique key is never dirtied.
+    """
+    csv_names = {sql: csv for csv, sql in upsert.COLUMN_MAPPING.items()}
+    data = {}
+    for col, sql_type in upsert.COLUMNS.items():
+        if col == upsert.UNIQUE_KEY:
+            values = keys.astype(str)
+        else:
+            values = synthetic_column(column_kind(sql_type), len(keys), dirtiness, rng)
+        data[csv_names.get(col, col)] = values
+    for i in range(len(data), width):
+        data[f"filler_{i:02d}"] = synthetic_column("string", len(keys), dirtiness, rng)
+
+    file_path = directory / f"{upsert.FILE_PREFIX}{file_date.strftime(upsert.DATE_FORMAT)}.csv"
+    pd.DataFrame(data).to_csv(file_path, index=False)
+    return file_path
+
+
+def generate_partner_files(upsert, directory: Path, rows: int, width: int, dirtiness: float,
+                           files: int) -> list:
+    """Write consecutive daily files; each reuses most keys of the previous one so the merge updates."""
+    rng = np.random.default_rng(SEED)
+    new_keys = max(int(rows * NEW_KEY_FRACTION), 1)
+    paths = []
+    for day in range(files):
+        keys = np.arange(day * new_keys, day * new_keys + rows) + 1
+        paths.append(write_partner_file(
+            upsert, directory, FIRST_FILE_DATE + timedelta(days=day), keys, width, dirtiness, rng
+        ))
+    return paths
+
+
+def make_pipeline_config(upsert):
+    """Config over COLUMNS with the SQLite loader; typed columns without parse rules get the benchmark formats."""
+    config = upsert.Config(server="", database="", archive_path="", recent_path="", loader="sqlite")
+    for col, sql_type in config.columns.items():
+        kind = column_kind(sql_type)
+        if kind == "date":
+            config.date_columns.setdefault(col, DATE_FORMATS)
+        elif kind == "datetime":
+            config.datetime_columns.setdefault(col, DATETIME_FORMATS)
+        elif kind == "boolean":
+            config.boolean_columns.setdefault(col, BOOLEAN_MAPPING)
+        elif kind == "integer" and col not in config.integer_columns:
+            config.integer_columns.append(col)
+        elif kind == "decimal" and col not in config.decimal_columns:
+            config.decimal_columns.append(col)
+    return config
+
+
+def sqlite_merge(conn, config) -> int:
+    """SQLite stand-in for merge_staging_to_target: an upsert from staging into a main table."""
+    data_columns = list(config.columns.keys())
+    col_list = ", ".join([f"[{c}]" for c in data_columns])
+    audit_list = ", ".join([f"[{c}]" for c in config.audit_columns])
+    update_set = ", ".join([f"[{c}] = excluded.[{c}]" for c in data_columns if c != config.unique_key])
+    conn.execute(f"""
+        INSERT INTO [{config.main_table}] ({col_list}, {audit_list})
+        SELECT {col_list}, datetime('now'), '{config.system_user}', datetime('now'), '{config.system_user}'
+        FROM [{config.staging_table}] WHERE true
+        ON CONFLICT ([{config.unique_key}]) DO UPDATE SET
+            {update_set}, [modified_dt] = datetime('now'), [modified_by] = '{config.system_user}'
+    """)
+    merged = conn.execute("SELECT changes()").fetchone()[0]
+    conn.commit()
+    return merged
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far in MB, or None where it is not available."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return getattr(info, "peak_wset", info.rss) / 2**20
+
+
+class StageTimer:
+    """Accumulates rows, bytes and seconds per stage across files."""
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, stage: str, rows: int, seconds: float, size: int = 0):
+        totals = self.stages.setdefault(stage, {"rows": 0, "bytes": 0, "seconds": 0.0})
+        totals["rows"] += rows
+        totals["bytes"] += size
+        totals["seconds"] += seconds
+        totals["peak_rss_mb"] = peak_rss_mb()
+
+    def results(self) -> dict:
+        return {
+            stage: dict(totals, rows_per_sec=totals["rows"] / totals["seconds"] if totals["seconds"] else None)
+            for stage, totals in self.stages.items()
+        }
+
+
+def benchmark_pipeline(upsert, rows: int, width: int, dirtiness: float, files: int,
+                       data_dir: Path = None) -> dict:
+    """
+    Time read_csv, clean_dataframe, staging load and merge over synthetic files.
+
+    Each stage is timed on its own: the clean stage starts from chunks already
+    read, the load stage from frames already prepared. Peak RSS is the process
+    high-water mark after each stage, so it only grows across stages.
+    """
+    config = make_pipeline_config(upsert)
+    timer = StageTimer()
+
+    with tempfile.TemporaryDirectory(prefix="partner_bench_") as tmp:
+        directory = Path(data_dir or tmp)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        start = time.perf_counter()
+        paths = generate_partner_files(upsert, directory, rows, width, dirtiness, files)
+        generate_secs = time.perf_counter() - start
+        print(f"Pipeline benchmark: {files} file(s) x {rows:,} rows, {width} columns, "
+              f"{dirtiness:.0%} dirty (generated in {generate_secs:.1f}s, {directory})")
+
+        conn = sqlite3.connect(":memory:")
+        loader = upsert.get_staging_loader(config)
+        loader.ensure_objects(conn)
+        main_defs = ", ".join(
+            [f"[{c}] {t}{' PRIMARY KEY' if c == config.unique_key else ''}" for c, t in config.columns.items()]
+            + [f"[{c}] {t}" for c, t in config.audit_columns.items()]
+        )
+        conn.execute(f"CREATE TABLE [{config.main_table}] ({main_defs})")
+
+        for path in paths:
+            start = time.perf_counter()
+            chunks = list(upsert.read_csv_chunks(config, path))
+            timer.add("read_csv", sum(len(c) for c in chunks), time.perf_counter() - start, path.stat().st_size)
+
+            start = time.perf_counter()
+            for chunk in chunks:
+                upsert.clean_dataframe(chunk, config)
+            timer.add("clean_dataframe", sum(len(c) for c in chunks), time.perf_counter() - start)
+
+            start = time.perf_counter()
+            prepared = [upsert.prepare_staging_frame(config, chunk, path.name) for chunk in chunks]
+            timer.add("prepare_staging_frame", sum(len(p) for p in prepared), time.perf_counter() - start)
+            del chunks
+
+            conn.execute(f"DELETE FROM [{config.staging_table}]")
+            start = time.perf_counter()
+            loaded = sum(upsert.insert_staging_rows(conn, config, frame) for frame in prepared)
+            timer.add("staging_load", loaded, time.perf_counter() - start)
+            del prepared
+
+            start = time.perf_counter()
+            merged = sqlite_merge(conn, config)
+            timer.add("merge", merged, time.perf_counter() - start)
+
+        conn.close()
+
+    results = timer.results()
+    print(f"{'stage':<24}{'rows':>12}{'seconds':>10}{'rows/sec':>14}{'peak RSS':>12}")
+    for stage, r in results.items():
+        rss = f"{r['peak_rss_mb']:.0f} MB" if r["peak_rss_mb"] is not None else "n/a"
+        print(f"{stage:<24}{r['rows']:>12,}{r['seconds']:>10.3f}{r['rows_per_sec']:>14,.0f}{rss:>12}")
+
+    return {
+        "params": {"rows": rows, "width": width, "dirtiness": dirtiness, "files": files,
+                   "batch_size": config.batch_size, "loader": config.loader},
+        "stages": results,
+    }
+
+
+def run_metadata() -> dict:
+    """Versions and commit identifying the code a result was measured on."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=UPSERT_SCRIPT.parent,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def compare_results(current: dict, baseline_path: Path):
+    """Print the change in rows/sec per stage against a saved JSON result."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('meta', {}).get('commit')}):")
+    if baseline.get("params") != current["params"]:
+        print(f"  note: parameters differ: {baseline.get('params')} vs {current['params']}")
+    print(f"{'stage':<24}{'baseline':>14}{'current':>14}{'change':>10}")
+    for stage, r in current["stages"].items():
+        before = baseline.get("stages", {}).get(stage, {}).get("rows_per_sec")
+        after = r["rows_per_sec"]
+        if not before or not after:
+            print(f"{stage:<24}{'-':>14}{after or 0:>14,.0f}{'':>10}")
+            continue
+        print(f"{stage:<24}{before:>14,.0f}{after:>14,.0f}{(after / before - 1):>+10.1%}")
+
+
+class NullCursor:
+    """pyodbc cursor stand-in that consumes the parameter rows it is given, without a server."""
+    fast_executemany = False
+
+    def executemany(self, sql, rows):
+        for _ in rows:
+            pass
+
+    def execute(self, sql, *params):
+        return self
+
+
+class NullConnection:
+    """pyodbc connection stand-in for the executemany and TVP loaders."""
+
+    def cursor(self):
+        return NullCursor()
+
+    def commit(self):
+        pass
+
+
+def benchmark_memory(upsert, rows: int, width: int, dirtiness: float, data_dir: Path = None) -> dict:
+    """
+    Peak traced memory of one chunk through prepare_staging_frame and each loader.
+
+    The raw chunk is what read_csv_chunks returns; peaks are tracemalloc
+    high-water marks from the start of cleaning, including the chunk itself,
+    so a ratio of 1.0 would mean no memory beyond the raw chunk. The pyodbc
+    loaders feed a stand-in cursor that only consumes the rows.
+    """
+    config = make_pipeline_config(upsert)
+    config.batch_size = rows
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix="partner_bench_") as tmp:
+        directory = Path(data_dir or tmp)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = generate_partner_files(upsert, directory, rows, width, dirtiness, 1)[0]
+
+        print(f"Memory benchmark: one {rows:,}-row chunk, {width} CSV columns, {dirtiness:.0%} dirty "
+              f"(target {MEMORY_TARGET_RATIO:.1f}x raw)")
+        print(f"{'loader':<14}{'raw chunk':>12}{'prepare peak':>14}{'load peak':>12}")
+
+        for loader in MEMORY_LOADERS:
+            config.loader = loader
+            if loader == "sqlite":
+                conn = sqlite3.connect(":memory:")
+                upsert.get_staging_loader(config).ensure_objects(conn)
+            else:
+                conn = NullConnection()
+
+            gc.collect()
+            tracemalloc.start()
+            chunk = next(iter(upsert.read_csv_chunks(config, path)))
+            gc.collect()
+            raw = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+            staged = upsert.prepare_staging_frame(config, chunk, path.name)
+            del chunk
+            prepare_peak = tracemalloc.get_traced_memory()[1]
+            upsert.insert_staging_rows(conn, config, staged)
+            load_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            del staged
+            if loader == "sqlite":
+                conn.close()
+
+            results[loader] = {
+                "raw_mb": raw / 2**20,
+                "prepare_peak_ratio": prepare_peak / raw,
+                "load_peak_ratio": load_peak / raw,
+            }
+            print(f"{loader:<14}{raw / 2**20:>9.1f} MB{prepare_peak / raw:>13.2f}x{load_peak / raw:>11.2f}x")
+
+    return results
+
+
+class FaultyCursor:
+    """Cursor of a FaultyConnection."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.db.cursor()
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+    def execute(self, sql, *params):
+        self.conn.maybe_fail()
+        self.cursor.execute(sql, params)
+        return self
+
+    def executemany(self, sql, rows):
+        self.conn.maybe_fail()
+        self.cursor.executemany(sql, rows)
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+
+class FaultyConnection:
+    """
+    pyodbc connection stand-in over a SQLite file that fails like a flaky network.
+
+    Each call fails with probability fault_rate with a communication link
+    failure (SQLSTATE 08S01), before reaching SQLite. From then on every call
+    fails until the connection is replaced, and its uncommitted work is lost,
+    as with a dropped pyodbc connection.
+    """
+
+    def __init__(self, upsert, path: Path, fault_rate: float, rng: random.Random):
+        self.upsert = upsert
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.fault_rate = fault_rate
+        self.rng = rng
+        self.broken = False
+        self.faults = 0
+
+    def maybe_fail(self):
+        if not self.broken and self.rng.random() < self.fault_rate:
+            self.broken = True
+            self.faults += 1
+        if self.broken:
+            raise self.upsert.pyodbc.OperationalError(
+                "08S01", "[08S01] [Microsoft][ODBC Driver 17 for SQL Server]Communication link failure")
+
+    def cursor(self):
+        self.maybe_fail()
+        return FaultyCursor(self)
+
+    def execute(self, sql, params=()):
+        self.maybe_fail()
+        return self.db.execute(sql, params)
+
+    def executemany(self, sql, rows):
+        self.maybe_fail()
+        return self.db.executemany(sql, rows)
+
+    def commit(self):
+        self.maybe_fail()
+        self.db.commit()
+
+    def rollback(self):
+        self.maybe_fail()
+        self.db.rollback()
+
+    def close(self):
+        self.db.close()
+
+
+def benchmark_faults(upsert, rows: int, width: int, dirtiness: float, files: int, fault_rate: float,
+                     data_dir: Path = None) -> dict:
+    """
+    Load and merge synthetic files through ConnectionPool and with_retry with injected faults.
+
+    The staging load (clear + insert every chunk) and the merge are retried as
+    units, as in process_file. Runs once without faults and once with them,
+    then compares the data columns of the main table.
+    """
+    config = make_pipeline_config(upsert)
+    config.retry_attempts = FAULT_RETRY_ATTEMPTS
+    upsert.RETRY_BASE_SECONDS = FAULT_RETRY_BASE_SECONDS
+    rng = random.Random(SEED)
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix="partner_bench_") as tmp:
+        directory = Path(data_dir or tmp)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = generate_partner_files(upsert, directory, rows, width, dirtiness, files)
+        prepared = [
+            (path, [upsert.prepare_staging_frame(config, chunk, path.name)
+                    for chunk in upsert.read_csv_chunks(config, path)])
+            for path in paths
+        ]
+        print(f"Fault benchmark: {files} file(s) x {rows:,} rows, {fault_rate:.1%} of calls drop the connection, "
+              f"up to {config.retry_attempts} retries per step")
+        print(f"{'run':<10}{'faults':>8}{'retries':>9}{'reconnects':>12}{'seconds':>10}")
+
+        tables = {}
+        for run, rate in (("clean", 0.0), ("faulty", fault_rate)):
+            db_path = Path(tmp) / f"{run}.db"
+            connections = []
+
+            def connect():
+                conn = FaultyConnection(upsert, db_path, rate, rng)
+                connections.append(conn)
+                return conn
+
+            setup = sqlite3.connect(db_path)
+            main_defs = ", ".join(
+                [f"[{c}] {t}{' PRIMARY KEY' if c == config.unique_key else ''}" for c, t in config.columns.items()]
+                + [f"[{c}] {t}" for c, t in config.audit_columns.items()]
+            )
+            setup.execute(f"CREATE TABLE [{config.main_table}] ({main_defs})")
+            upsert.get_staging_loader(config).ensure_objects(setup)
+            setup.close()
+
+            upsert.metrics.start_run()
+            pool = upsert.ConnectionPool(config, connect=connect)
+            conn = pool.acquire()
+            start = time.perf_counter()
+            for path, frames in prepared:
+                def load_staging():
+                    conn.execute(f"DELETE FROM [{config.staging_table}]")
+                    return sum(upsert.insert_staging_rows(conn, config, frame) for frame in frames)
+
+                upsert.with_retry(config, "staging_load", load_staging, conn)
+                upsert.with_retry(config, "merge", lambda: sqlite_merge(conn, config), conn)
+            seconds = time.perf_counter() - start
+            conn.close()
+            pool.close()
+
+            check = sqlite3.connect(db_path)
+            tables[run] = check.execute(
+                f"SELECT {', '.join(f'[{c}]' for c in config.columns)} FROM [{config.main_table}] "
+                f"ORDER BY [{config.unique_key}]"
+            ).fetchall()
+            check.close()
+
+            summary = upsert.metrics.summary()
+            results[run] = {
+                "faults": sum(c.faults for c in connections),
+                "retries": summary["retries"],
+                "reconnects": pool.reconnects,
+                "seconds": seconds,
+            }
+            r = results[run]
+            print(f"{run:<10}{r['faults']:>8}{r['retries']:>9}{r['reconnects']:>12}{seconds:>10.2f}")
+
+    results["identical"] = tables["clean"] == tables["faulty"]
+    print(f"Main table after faults matches the fault-free run: {results['identical']} "
+          f"({len(tables['faulty']):,} rows)")
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the CSV to SQL Server upsert script")
+    parser.add_argument("rows", nargs="?", type=int, default=DEFAULT_ROWS,
+                        help=f"Rows per column type / per file (default: {DEFAULT_ROWS:,})")
+    parser.add_argument("--suite", default="all", choices=["all", "cleaning", "staging", "pipeline", "memory", "faults"],
+                        help="Benchmarks to run (default: all)")
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH,
+                        help=f"Pipeline/memory/faults: CSV columns per file, COLUMNS plus filler (default: {DEFAULT_WIDTH})")
+    parser.add_argument("--dirtiness", type=float, default=DIRTY_FRACTION,
+                        help=f"Pipeline/memory/faults: share of dirty cells (default: {DIRTY_FRACTION})")
+    parser.add_argument("--files", type=int, default=DEFAULT_FILES,
+                        help=f"Pipeline/faults: number of daily files (default: {DEFAULT_FILES})")
+    parser.add_argument("--fault-rate", type=float, default=DEFAULT_FAULT_RATE,
+                        help=f"Faults: share of database calls that drop the connection (default: {DEFAULT_FAULT_RATE})")
+    parser.add_argument("--data-dir", type=Path, help="Pipeline: keep the generated files here instead of a temp folder")
+    parser.add_argument("--json", type=Path, help="Pipeline: save results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="Pipeline: compare rows/sec with a saved JSON result")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    upsert_module = load_upsert_module()
+    if args.suite in ("all", "cleaning"):
+        benchmark_cleaning(upsert_module, args.rows)
+    if args.suite in ("all", "staging"):
+        benchmark_staging_load(upsert_module, args.rows)
+    if args.suite in ("all", "pipeline"):
+        print()
+        result = benchmark_pipeline(upsert_module, args.rows, args.width, args.dirtiness, args.files, args.data_dir)
+        result = {"meta": run_metadata(), **result}
+        if args.compare:
+            compare_results(result, args.compare)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
+            print(f"\nResults saved to {args.json}")
+    if args.suite in ("all", "memory"):
+        print()
+        benchmark_memory(upsert_module, args.rows, args.width, args.dirtiness, args.data_dir)
+    if args.suite in ("all", "faults"):
+        print()
+        benchmark_faults(upsert_module, args.rows, args.width, args.dirtiness, args.files, args.fault_rate,
+                         args.data_dir)
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Multi-feed job runner for the CSV to SQL Server upsert script.
+
+Runs the daily (or rebuild) pipeline of several partner feeds at once, each
+in its own csv_sql_upsert.py process, so all feeds finish inside one batch
+window. A jobs file lists the feeds; each feed is a set of Config fields
+(tables, paths, columns, cleaning rules) on top of shared defaults.
+
+- Connection limit: a feed holds one connection, plus merge_connections more
+  when its MERGE runs in parallel slices. A feed only starts once its
+  connections fit in the global limit (max_connections).
+- Per-feed limit: a feed's own max_connections caps its parallel MERGE
+  connections.
+- Order: feeds start longest first, using the durations in the previous
+  status file, so a long feed does not start last and overrun the window.
+- Status: a JSON status file is rewritten on every feed start and finish,
+  and a summary table is logged at the end. The exit code is 1 if any feed
+  failed or had failed files.
+- Files: each feed runs in its own directory under the log directory, where
+  its csv_sql_upsert.log goes. Metrics, manifest and Prometheus files belong
+  to one feed, so they can't be set in the defaults or shared by two feeds.
+
+Jobs file (JSON):
+    {
+      "max_connections": 8,
+      "max_parallel_feeds": 4,
+      "defaults": {"server": "SQLSERVER", "database": "MyDB", "batch_size": 20000},
+      "feeds": [
+        {"name": "acme", "max_connections": 3,
+         "config": {"archive_path": "\\\\\\\\server\\\\acme\\\\archive",
+                    "recent_path": "\\\\\\\\server\\\\acme\\\\recent",
+                    "main_table": "AcmeMain", "history_table": "AcmeHistory",
+                    "merge_slices": 8, "merge_connections": 4}}
+      ]
+    }
+
+Usage:
+    python feed_runner.py feeds.json
+    python feed_runner.py feeds.json --feed acme --feed globex --rebuild --start-date 01012026
+    python feed_runner.py feeds.json --max-connections 6 --window-minutes 240 --log-dir D:\\feed_logs
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Configuration
+UPSERT_SCRIPT = Path(__file__).parent / "test.py"   # deployed as csv_sql_upsert.py
+DEFAULT_MAX_CONNECTIONS = 8
+DEFAULT_MAX_PARALLEL_FEEDS = 4
+DEFAULT_LOG_DIR = "feed_logs"
+STATUS_FILE_NAME = "feed_status.json"
+
+# Config fields naming files a feed run owns; two feeds writing one would
+# read each other's metrics and overwrite each other's manifest
+PER_FEED_FILES = ("metrics_file", "manifest_path", "prometheus_file")
+
+# Config fields holding paths, made absolute before a feed starts in its own directory
+PATH_FIELDS = ("archive_path", "recent_path", "metrics_file", "prometheus_file", "manifest_path", "cache_dir")
+
+# Seconds between checks on the running feeds, and between progress lines
+POLL_SECONDS = 1.0
+PROGRESS_SECONDS = 60.0
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(console_handler)
+
+
+@dataclass
+class FeedJob:
+    """One feed of the jobs file and the state of its run."""
+    name: str
+    config: Dict[str, object]
+    connections: int
+    status: str = "queued"
+    log_path: Optional[Path] = None
+    metrics_path: Optional[Path] = None
+    metrics_offset: int = 0
+    process: Optional[subprocess.Popen] = None
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    exit_code: Optional[int] = None
+    summary: Dict[str, object] = field(default_factory=dict)
+
+    @property
+    def seconds(self) -> Optional[float]:
+        if self.started is None:
+            return None
+        return (self.finished or time.time()) - self.started
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "status": self.status,
+            "main_table": self.config.get("main_table"),
+            "connections": self.connections,
+            "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds") if self.started else None,
+            "seconds": round(self.seconds, 1) if self.seconds is not None else None,
+            "exit_code": self.exit_code,
+            "files": self.summary.get("files"),
+            "file_outcomes": self.summary.get("file_outcomes"),
+            "rows": self.summary.get("rows"),
+            "log": str(self.log_path) if self.log_path else None,
+        }
+
+
+def feed_connections(config: Dict[str, object]) -> int:
+    """Connections a feed's run holds at most: its own plus parallel MERGE workers."""
+    merge_connections = int(config.get("merge_connections", 1))
+    if int(config.get("merge_slices", 1)) > 1 and merge_connections > 1:
+        return 1 + merge_connections
+    return 1
+
+
+def load_jobs(jobs_file: dict, max_connections: int, only: Optional[List[str]] = None) -> List[FeedJob]:
+    """
+    Build the feed jobs from a parsed jobs file.
+
+    A feed's parallel MERGE connections are reduced to fit its own
+    max_connections and the global limit, so every feed can eventually start.
+    """
+    defaults = jobs_file.get("defaults", {})
+    shared = [key for key in PER_FEED_FILES if defaults.get(key)]
+    if shared:
+        raise ValueError(f"{', '.join(shared)} can't be set in defaults: every feed needs its own")
+
+    jobs = []
+    tables = {}
+    files = {}
+    for feed in jobs_file.get("feeds", []):
+        name = feed["name"]
+        if only and name not in only:
+            continue
+        config = {**defaults, **feed.get("config", {})}
+
+        limit = min(int(feed.get("max_connections", max_connections)), max_connections)
+        if feed_connections(config) > limit:
+            merge_connections = max(limit - 1, 1) if limit > 2 else 1
+            logger.warning(
+                f"{name}: merge_connections {config.get('merge_connections')} needs "
+                f"{feed_connections(config)} connections, limit is {limit}; using {merge_connections}"
+            )
+            config["merge_connections"] = merge_connections
+
+        # Two feeds writing the same tables would truncate and merge over each other
+        table = (config.get("server"), config.get("database"), config.get("schema", "dbo"), config.get("main_table", "MainTable"))
+        if table in tables:
+            raise ValueError(f"Feeds {tables[table]} and {name} both load {table[2]}.{table[3]} on {table[0]}/{table[1]}")
+        tables[table] = name
+        for key in PER_FEED_FILES:
+            if config.get(key):
+                path = os.path.abspath(config[key])
+                if path in files:
+                    raise ValueError(f"Feeds {files[path]} and {name} both write {path}")
+                files[path] = name
+
+        jobs.append(FeedJob(name=name, config=config, connections=feed_connections(config)))
+
+    if only:
+        missing = sorted(set(only) - {job.name for job in jobs})
+        if missing:
+            raise ValueError(f"Unknown feeds: {', '.join(missing)}")
+    return jobs
+
+
+def longest_first(jobs: List[FeedJob], status_file: Path) -> List[FeedJob]:
+    """Order feeds by their duration in the previous run, unknown ones first."""
+    try:
+        with open(status_file, encoding="utf-8") as f:
+            previous = {feed["name"]: feed.get("seconds") for feed in json.load(f).get("feeds", [])}
+    except (OSError, ValueError):
+        return jobs
+    return sorted(jobs, key=lambda job: -(previous.get(job.name) or float("inf")))
+
+
+def start_job(job: FeedJob, log_dir: Path, verbose: bool):
+    """Write the feed's config file and start its upsert process in its own directory."""
+    config = {key: os.path.abspath(value) if key in PATH_FIELDS and value else value
+              for key, value in job.config.items()}
+    job.metrics_path = Path(config.get("metrics_file") or log_dir / f"{job.name}.metrics.jsonl")
+    config["metrics_file"] = str(job.metrics_path)
+    job.metrics_offset = job.metrics_path.stat().st_size if job.metrics_path.exists() else 0
+
+    config_path = log_dir / f"{job.name}.config.json"
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+    command = [sys.executable, str(UPSERT_SCRIPT.resolve()), "--config-file", str(config_path)]
+    if verbose:
+        command.append("--verbose")
+
+    job.log_path = log_dir / f"{job.name}.log"
+    with open(job.log_path, "a", encoding="utf-8") as log:
+        log.write(f"\n=== {datetime.now().isoformat(timespec='seconds')} {' '.join(command)}\n")
+        log.flush()
+        # The upsert script logs to csv_sql_upsert.log in its working directory
+        work_dir = log_dir / job.name
+        work_dir.mkdir(exist_ok=True)
+        job.process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, cwd=work_dir)
+    job.started = time.time()
+    job.status = "running"
+
+
+def run_summary(job: FeedJob) -> Dict[str, object]:
+    """The run record the feed appended to its metrics file, if any."""
+    try:
+        with open(job.metrics_path, encoding="utf-8") as f:
+            f.seek(job.metrics_offset)
+            records = [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError) as e:
+        logger.warning(f"{job.name}: could not read metrics from {job.metrics_path}: {e}")
+        return {}
+    runs = [record for record in records if record.get("type") == "run"]
+    return runs[-1] if runs else {}
+
+
+def finish_job(job: FeedJob):
+    """Record the exit code and run totals of a finished feed."""
+    job.finished = time.time()
+    job.exit_code = job.process.returncode
+    job.summary = run_summary(job)
+    failed_files = (job.summary.get("file_outcomes") or {}).get("failed", 0)
+    if job.exit_code != 0:
+        job.status = "failed"
+    elif failed_files:
+        job.status = "partial"
+    else:
+        job.status = "succeeded"
+
+
+def write_status(status_file: Path, jobs: List[FeedJob], mode: str, run_started: datetime):
+    """Rewrite the status file (atomic rename) so monitoring sees a complete file."""
+    status = {
+        "run_started": run_started.isoformat(timespec="seconds"),
+        "updated": datetime.now().isoformat(timespec="seconds"),
+        "mode": mode,
+        "counts": {s: sum(job.status == s for job in jobs) for s in sorted({job.status for job in jobs})},
+        "feeds": [job.as_dict() for job in jobs],
+    }
+    tmp_path = f"{status_file}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(status, f, indent=2)
+        os.replace(tmp_path, status_file)
+    except OSError as e:
+        logger.warning(f"Could not write status to {status_file}: {e}")
+
+
+def log_summary(jobs: List[FeedJob], elapsed: float):
+    """Log one line per feed and the run totals."""
+    logger.info(f"{'Feed':<20} {'Status':<10} {'Conns':>5} {'Seconds':>9} {'Files':>6} {'Rows':>12}  Outcomes")
+    for job in jobs:
+        outcomes = ", ".join(f"{o} {n}" for o, n in (job.summary.get("file_outcomes") or {}).items())
+        seconds = f"{job.seconds:.1f}" if job.seconds is not None else "-"
+        logger.info(
+            f"{job.name:<20} {job.status:<10} {job.connections:>5} {seconds:>9} "
+            f"{job.summary.get('files', '-'):>6} {job.summary.get('rows', 0):>12,}  {outcomes}"
+        )
+    counts = {s: sum(job.status == s for job in jobs) for s in ("succeeded", "partial", "failed", "cancelled")}
+    logger.info(
+        f"{len(jobs)} feeds in {elapsed:.0f}s: "
+        + ", ".join(f"{n} {s}" for s, n in counts.items() if n)
+    )
+
+
+def run_feeds(jobs: List[FeedJob], max_connections: int, max_parallel_feeds: int, log_dir: Path,
+              status_file: Path, mode: str, window_minutes: Optional[float] = None, verbose: bool = False) -> bool:
+    """
+    Run the feeds, at most max_parallel_feeds at a time within max_connections.
+
+    Feeds start in list order; one that does not fit the free connections
+    yet is passed over for a later one that does. Returns True if every feed
+    succeeded.
+    """
+    run_started = datetime.now()
+    started = time.perf_counter()
+    pending = list(jobs)
+    running: List[FeedJob] = []
+    free_connections = max_connections
+    last_progress = started
+    window_warned = False
+
+    try:
+        while pending or running:
+            for job in list(pending):
+                if len(running) >= max_parallel_feeds:
+                    break
+                if job.connections > free_connections:
+                    continue
+                start_job(job, log_dir, verbose)
+                pending.remove(job)
+                running.append(job)
+                free_connections -= job.connections
+                logger.info(f"Started {job.name} ({job.connections} connections, {free_connections} free)")
+                write_status(status_file, jobs, mode, run_started)
+
+            time.sleep(POLL_SECONDS)
+
+            for job in list(running):
+                if job.process.poll() is None:
+                    continue
+                finish_job(job)
+                running.remove(job)
+                free_connections += job.connections
+                log = logger.info if job.status == "succeeded" else logger.error
+                log(
+                    f"Finished {job.name}: {job.status} (exit {job.exit_code}) in {job.seconds:.1f}s, "
+                    f"{job.summary.get('rows', 0):,} rows; {len(jobs) - len(pending) - len(running)}/{len(jobs)} done"
+                )
+                write_status(status_file, jobs, mode, run_started)
+
+            now = time.perf_counter()
+            if now - last_progress >= PROGRESS_SECONDS:
+                last_progress = now
+                logger.info(
+                    f"Running: {', '.join(f'{job.name} {job.seconds:.0f}s' for job in running) or 'none'}; "
+                    f"{len(pending)} queued, {free_connections}/{max_connections} connections free"
+                )
+            if window_minutes and not window_warned and now - started > window_minutes * 60:
+                window_warned = True
+                logger.warning(
+                    f"Batch window of {window_minutes:g} minutes exceeded with "
+                    f"{len(running)} feeds running and {len(pending)} queued"
+                )
+    except KeyboardInterrupt:
+        logger.warning("Interrupted, stopping running feeds")
+        for job in running:
+            job.process.terminate()
+        for job in running:
+            job.process.wait()
+            job.finished = time.time()
+            job.exit_code = job.process.returncode
+            job.status = "cancelled"
+        for job in pending:
+            job.status = "cancelled"
+        write_status(status_file, jobs, mode, run_started)
+        raise
+
+    write_status(status_file, jobs, mode, run_started)
+    log_summary(jobs, time.perf_counter() - started)
+    return all(job.status == "succeeded" for job in jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run several feeds of the CSV to SQL Server upsert concurrently",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Daily run of every feed in the jobs file
+  python feed_runner.py feeds.json
+
+  # Rebuild two feeds from a start date
+  python feed_runner.py feeds.json --feed acme --feed globex --rebuild --start-date 01012026
+
+  # Tighter connection budget, warn if the run passes 4 hours
+  python feed_runner.py feeds.json --max-connections 6 --window-minutes 240
+        """
+    )
+    parser.add_argument("jobs_file", help="JSON jobs file listing the feeds and their Config fields")
+    parser.add_argument("--feed", action="append", help="Run only this feed (repeatable; default: all feeds)")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild every selected feed from --start-date")
+    parser.add_argument("--start-date", help="Start date for rebuild (format: MMDDYYYY)")
+    parser.add_argument("--max-connections", type=int,
+                        help=f"Database connections across all feeds (default: jobs file, else {DEFAULT_MAX_CONNECTIONS})")
+    parser.add_argument("--max-parallel-feeds", type=int,
+                        help=f"Feeds running at once (default: jobs file, else {DEFAULT_MAX_PARALLEL_FEEDS})")
+    parser.add_argument("--log-dir", default=DEFAULT_LOG_DIR,
+                        help=f"Per-feed logs, config and metrics files, and working directories (default: {DEFAULT_LOG_DIR})")
+    parser.add_argument("--status-file",
+                        help=f"JSON status of the run; also orders the next run (default: LOG_DIR/{STATUS_FILE_NAME})")
+    parser.add_argument("--window-minutes", type=float, help="Warn when the run exceeds this batch window")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging in every feed")
+    args = parser.parse_args()
+
+    if args.rebuild and not args.start_date:
+        parser.error("--start-date is required with --rebuild")
+
+    jobs_path = Path(args.jobs_file)
+    try:
+        with open(jobs_path, encoding="utf-8") as f:
+            jobs_file = json.load(f)
+        max_connections = args.max_connections or jobs_file.get("max_connections", DEFAULT_MAX_CONNECTIONS)
+        max_parallel_feeds = args.max_parallel_feeds or jobs_file.get("max_parallel_feeds", DEFAULT_MAX_PARALLEL_FEEDS)
+        jobs = load_jobs(jobs_file, max_connections, args.feed)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(f"Could not read jobs file {jobs_path}: {e}")
+    if not jobs:
+        parser.error(f"No feeds in {jobs_path}")
+
+    mode = "rebuild" if args.rebuild else "daily"
+    for job in jobs:
+        job.config["rebuild"] = args.rebuild
+        job.config["start_date"] = args.start_date
+
+    log_dir = Path(args.log_dir).resolve()
+    log_dir.mkdir(parents=True, exist_ok=True)
+    status_file = Path(args.status_file).resolve() if args.status_file else log_dir / STATUS_FILE_NAME
+    jobs = longest_first(jobs, status_file)
+
+    logger.info(
+        f"Starting {mode.upper()} of {len(jobs)} feeds: {max_parallel_feeds} at a time, "
+        f"{max_connections} connections"
+    )
+    if not run_feeds(jobs, max_connections, max_parallel_feeds, log_dir, status_file, mode,
+                     args.window_minutes, args.verbose):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
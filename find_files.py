@@ -3,14 +3,25 @@ Search a set of directories for .xls/.xlsx/.xlsb files whose name contains a giv
 stub, look inside them for CASE_IDs from an input list, and write a CSV of
 (CASE_ID, SOURCE_FILE) pairs for every match found.
 
+Reading a workbook is CPU-bound, so with WORKERS > 1 files are scanned in a
+pool of worker processes. FILE_TIMEOUT (which also runs the scan in a worker
+process) stops a worker stuck on one file, skips that file and starts a new
+worker. Matches are appended to OUTPUT_FILE as each file finishes, so an
+interrupted run keeps what it found; a finished run rewrites the file sorted.
+
 Edit the CONFIG section below, then run:  python3 find_case_ids.py
 """
 
 from __future__ import annotations
 
 import csv
+import multiprocessing as mp
+import os
 import sys
+import time
+from multiprocessing.connection import Connection, wait
 from pathlib import Path
+from typing import Iterator
 
 import pandas as pd
 
@@ -26,6 +37,8 @@ CASE_ID_FILE = "case_ids.txt"                # one CASE_ID per line
 OUTPUT_FILE = "case_id_matches.csv"
 RECURSIVE = True                             # walk sub-directories too
 CASE_INSENSITIVE = False                     # match CASE_IDs case-insensitively
+WORKERS = 1                                  # processes reading files in parallel
+FILE_TIMEOUT: float | None = None            # seconds per file before it is skipped (None = no limit)
 
 # ---------------------------------------------------------------------------
 
@@ -86,6 +99,100 @@ def case_ids_in_file(path: Path, case_ids: set[str]) -> set[str]:
     return found
 
 
+def scan_worker(conn: Connection, case_ids: set[str], parent: int) -> None:
+    """Worker process: scan each path received on conn and send back its CASE_IDs, until None."""
+    while True:
+        while not conn.poll(1):
+            if os.getppid() != parent:              # the scan itself was killed
+                return
+        path = conn.recv()
+        if path is None:
+            return
+        conn.send(case_ids_in_file(path, case_ids))
+
+
+def scan_sequential(files: list[Path], case_ids: set[str]) -> Iterator[tuple[Path, set[str]]]:
+    for f in files:
+        yield f, case_ids_in_file(f, case_ids)
+
+
+def scan_parallel(
+    files: list[Path], case_ids: set[str], workers: int, timeout: float | None
+) -> Iterator[tuple[Path, set[str]]]:
+    """Yield (file, CASE_IDs found) as worker processes finish files, in completion order.
+
+    Each worker has its own pipe and one file at a time, so a file that runs
+    past timeout, or whose worker dies, is known exactly: it is skipped with a
+    warning (no CASE_IDs) and its worker replaced.
+    """
+    todo = list(enumerate(files))[::-1]
+    busy: dict[Connection, tuple[mp.Process, int, float]] = {}  # -> (worker, file index, start time)
+    processes: list[mp.Process] = []
+
+    def start_worker() -> None:
+        conn, child_conn = mp.Pipe()
+        process = mp.Process(target=scan_worker, args=(child_conn, case_ids, os.getpid()), daemon=True)
+        process.start()
+        child_conn.close()
+        processes.append(process)
+        assign(conn, process)
+
+    def assign(conn: Connection, process: mp.Process) -> None:
+        if todo:
+            index, path = todo.pop()
+            conn.send(path)
+            busy[conn] = (process, index, time.monotonic())
+        else:
+            conn.send(None)
+            conn.close()
+
+    try:
+        for _ in range(min(workers, len(files))):
+            start_worker()
+        while busy:
+            for conn in wait(list(busy), timeout=1):
+                process, index, _ = busy.pop(conn)
+                try:
+                    hits = conn.recv()
+                except EOFError:
+                    process.join()
+                    print(f"warning: worker exited with code {process.exitcode} reading {files[index]}",
+                          file=sys.stderr)
+                    conn.close()
+                    if todo:
+                        start_worker()
+                    hits = set()
+                else:
+                    assign(conn, process)
+                yield files[index], hits
+
+            now = time.monotonic()
+            for conn, (process, index, started) in list(busy.items()):
+                if timeout is not None and now - started > timeout:
+                    process.terminate()
+                    process.join()
+                    print(f"warning: no result after {timeout:g}s, skipping: {files[index]}", file=sys.stderr)
+                    del busy[conn]
+                    conn.close()
+                    if todo:
+                        start_worker()
+                    yield files[index], set()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+
+def write_matches(path: Path, matches: list[tuple[str, str]]) -> None:
+    """Write the sorted matches to path, replacing it only once complete."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["CASE_ID", "SOURCE_FILE"])
+        writer.writerows(sorted(matches))
+    os.replace(tmp_path, path)
+
+
 def main() -> int:
     case_id_path = Path(CASE_ID_FILE)
     if not case_id_path.is_file():
@@ -100,19 +207,23 @@ def main() -> int:
     files = find_excel_files(DIRECTORIES, FILE_STUB)
     print(f"scanning {len(files)} file(s) for {len(case_ids)} CASE_ID(s)...")
 
-    matches: list[tuple[str, str]] = []
-    for f in files:
-        hits = case_ids_in_file(f, case_ids)
-        for cid in sorted(hits):
-            matches.append((cid, str(f)))
-
-    matches.sort()
+    if WORKERS > 1 or FILE_TIMEOUT is not None:
+        scan = scan_parallel(files, case_ids, WORKERS, FILE_TIMEOUT)
+    else:
+        scan = scan_sequential(files, case_ids)
 
+    # Append each file's matches as it finishes, then rewrite sorted
     out_path = Path(OUTPUT_FILE)
+    matches: list[tuple[str, str]] = []
     with out_path.open("w", newline="") as fh:
         writer = csv.writer(fh)
         writer.writerow(["CASE_ID", "SOURCE_FILE"])
-        writer.writerows(matches)
+        for f, hits in scan:
+            rows = [(cid, str(f)) for cid in sorted(hits)]
+            writer.writerows(rows)
+            fh.flush()
+            matches.extend(rows)
+    write_matches(out_path, matches)
 
     found_ids = {cid for cid, _ in matches}
     missing = case_ids - found_ids
@@ -15,18 +15,49 @@ Usage:
 """
 
 import argparse
+import hashlib
+import json
 import logging
+import math
 import os
+import queue
+import random
 import re
+import subprocess
 import sys
-from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from datetime import date, datetime, timedelta
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
 
+import numpy as np
 import pandas as pd
 import pyodbc
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil  # Optional: peak memory on Windows
+except ImportError:
+    psutil = None
+
+try:
+    import pyarrow as pa  # Optional: cleaned file cache (--cache-dir)
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -137,6 +168,16 @@ AUDIT_COLUMNS: Dict[str, str] = {
 # System user for audit trail
 SYSTEM_USER = 'CSV_UPSERT_SCRIPT'
 
+# Last-run totals stored on each table's metadata row
+RUN_SUMMARY_COLUMNS: Dict[str, str] = {
+    'last_run_started': 'DATETIME',
+    'last_run_seconds': 'FLOAT',
+    'last_run_files': 'INT',
+    'last_run_failed': 'INT',
+    'last_run_rows': 'BIGINT',
+    'last_run_metrics': 'NVARCHAR(MAX)',
+}
+
 # File pattern prefix
 FILE_PREFIX = 'PartnerFile_'
 
@@ -158,7 +199,40 @@ class Config:
     batch_size: int = 10000
     rebuild: bool = False
     start_date: Optional[str] = None
+    # Retries of a database step after a transient error (0 = fail at once)
     retry_attempts: int = 2
+    # Pipelined rebuild: worker processes for reading/cleaning (1 = sequential)
+    # and how many files may be prepared ahead of the one being loaded
+    workers: int = 1
+    prefetch: int = 2
+    # Streaming load: overlap CSV read, cleaning and staging inserts within a file
+    stream: bool = False
+    queue_size: int = 4
+    # Staging loader backend (see STAGING_LOADERS) and bcp executable for the bcp loader
+    loader: str = 'executemany'
+    bcp_command: str = 'bcp'
+    # Row-hash change detection: MERGE only updates rows whose content hash changed
+    row_hash: bool = False
+    row_hash_column: str = 'row_hash'
+    # History storage: 'full' copies every file, 'delta' keeps row versions (SCD type 2)
+    history_mode: str = 'full'
+    # Validation: load staging as text, quarantine rows that fail the column
+    # types or repeat the unique key, and merge only the clean rows
+    validate: bool = False
+    # Partitioned MERGE: slices per file (1 = single MERGE), 'range' or 'hash'
+    # slicing, and connections merging slices in parallel
+    merge_slices: int = 1
+    merge_partition: str = 'range'
+    merge_connections: int = 1
+    # Metrics output: JSON lines per file and run, Prometheus text file (None = off)
+    metrics_file: Optional[str] = None
+    prometheus_file: Optional[str] = None
+    # File manifest (JSON): skip files already loaded with identical content (None = disabled)
+    manifest_path: Optional[str] = None
+    # Cleaned file cache: local Parquet copies of staging-ready files (None = disabled)
+    # and the size the least recently used entries are evicted down to
+    cache_dir: Optional[str] = None
+    cache_max_mb: int = 4096
     columns: Dict[str, str] = field(default_factory=lambda: COLUMNS.copy())
     column_mapping: Dict[str, str] = field(default_factory=lambda: COLUMN_MAPPING.copy())
     source_file_column: Optional[str] = SOURCE_FILE_COLUMN
@@ -186,6 +260,16 @@ class Config:
         """Fully qualified history table name."""
         return f"[{self.schema}].[{self.history_table}]"
 
+    @property
+    def history_log_table(self) -> str:
+        """Table recording each snapshot loaded in delta history mode."""
+        return f"{self.history_table}_Snapshots"
+
+    @property
+    def history_log_table_fq(self) -> str:
+        """Fully qualified delta history snapshot log table name."""
+        return f"[{self.schema}].[{self.history_log_table}]"
+
     @property
     def metadata_table_fq(self) -> str:
         """Fully qualified metadata table name."""
@@ -201,6 +285,358 @@ class Config:
         """Fully qualified staging table name."""
         return f"[{self.schema}].[{self.staging_table}]"
 
+    @property
+    def raw_staging_table(self) -> str:
+        """Text-typed staging table loaded in validation mode."""
+        return f"{self.main_table}_StagingRaw"
+
+    @property
+    def raw_staging_table_fq(self) -> str:
+        """Fully qualified raw staging table name."""
+        return f"[{self.schema}].[{self.raw_staging_table}]"
+
+    @property
+    def errors_table(self) -> str:
+        """Table receiving rows quarantined by validation."""
+        return f"{self.main_table}_Errors"
+
+    @property
+    def errors_table_fq(self) -> str:
+        """Fully qualified errors table name."""
+        return f"[{self.schema}].[{self.errors_table}]"
+
+    @property
+    def errors_source_file(self) -> bool:
+        """Whether the errors table has its own source_file column (not when it is one of the data columns)."""
+        return 'source_file' not in self.columns
+
+    @property
+    def load_table(self) -> str:
+        """Table the staging loaders write to."""
+        return self.raw_staging_table if self.validate else self.staging_table
+
+    @property
+    def load_table_fq(self) -> str:
+        """Fully qualified name of the table the staging loaders write to."""
+        return f"[{self.schema}].[{self.load_table}]"
+
+    @property
+    def merge_progress_table(self) -> str:
+        """Table recording merged slices of partially merged files."""
+        return f"{self.main_table}_MergeProgress"
+
+    @property
+    def merge_progress_table_fq(self) -> str:
+        """Fully qualified merge progress table name."""
+        return f"[{self.schema}].[{self.merge_progress_table}]"
+
+    @property
+    def staging_columns(self) -> List[str]:
+        """Columns loaded into staging: data columns plus the row hash if enabled."""
+        columns = list(self.columns.keys())
+        if self.row_hash:
+            columns.append(self.row_hash_column)
+        return columns
+
+    @property
+    def parsed_columns(self) -> set:
+        """Columns the cleaning step parses into dates, numbers or booleans."""
+        return (
+            set(self.date_columns) | set(self.datetime_columns) | set(self.integer_columns)
+            | set(self.decimal_columns) | set(self.boolean_columns)
+        )
+
+    @property
+    def staging_column_defs(self) -> str:
+        """Column definitions for the staging table (and loader table types)."""
+        col_defs = [f"[{col}] {dtype}" for col, dtype in self.columns.items()]
+        if self.row_hash:
+            col_defs.append(f"[{self.row_hash_column}] BIGINT")
+        return ', '.join(col_defs)
+
+    @property
+    def raw_column_defs(self) -> str:
+        """Text column definitions for the data columns in the raw staging and errors tables."""
+        return ', '.join([
+            f"[{col}] {'NVARCHAR(MAX)' if 'MAX' in dtype.upper() else 'NVARCHAR(4000)'}"
+            for col, dtype in self.columns.items()
+        ])
+
+    @property
+    def load_column_defs(self) -> str:
+        """Column definitions for the load table (and loader table types)."""
+        if not self.validate:
+            return self.staging_column_defs
+        col_defs = self.raw_column_defs
+        if self.row_hash:
+            col_defs += f", [{self.row_hash_column}] BIGINT"
+        return col_defs
+
+
+# =============================================================================
+# RUN METRICS
+# =============================================================================
+# Timers and counters per stage (read, clean, staging_load, validate, merge,
+# snapshot, ...), kept per file and for the whole run. Stage seconds are busy
+# time, so overlapping stages (--stream) can add up to more than wall time.
+# Each finished file is logged and, with --metrics-file, appended as a JSON
+# line; the run totals follow as a last line, go to --prometheus-file in the
+# text exposition format, and are stored on the table's metadata row.
+#
+# Round trips are counted, not estimated: every execute, executemany, commit
+# and rollback on a pooled connection (or a cursor it handed out) counts once
+# for the innermost stage timed on that thread. Rows fetched after an execute,
+# and bcp's own session, are not counted.
+
+@dataclass
+class StageMetrics:
+    """Counters for one stage."""
+    rows: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    round_trips: int = 0
+    calls: int = 0
+    retries: int = 0
+
+    def add(self, other: 'StageMetrics'):
+        self.rows += other.rows
+        self.bytes += other.bytes
+        self.seconds += other.seconds
+        self.round_trips += other.round_trips
+        self.calls += other.calls
+        self.retries += other.retries
+
+    def as_dict(self) -> dict:
+        return {
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'seconds': round(self.seconds, 6),
+            'rows_per_sec': round(self.rows / self.seconds, 1) if self.seconds else None,
+            'round_trips': self.round_trips,
+            'calls': self.calls,
+            'retries': self.retries,
+        }
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far, or None where it cannot be read."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss)
+    return None
+
+
+class RunMetrics:
+    """
+    Stage metrics for the current file and the whole run.
+
+    Stages may be timed from several threads (stream mode). Work done in
+    worker processes (pipelined rebuild) is not seen here; the time the loader
+    waits for it is recorded as prepare_wait instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = threading.local()  # Per thread: stack of the StageMetrics being timed
+        self.metrics_file: Optional[str] = None
+        self.prometheus_file: Optional[str] = None
+        self.start_run()
+
+    def configure(self, config: Config):
+        self.metrics_file = config.metrics_file
+        self.prometheus_file = config.prometheus_file
+
+    def start_run(self):
+        self.run_started = datetime.now()
+        self._run_start = time.perf_counter()
+        self.run_stages: Dict[str, StageMetrics] = {}
+        self.file_outcomes: Dict[str, int] = {}
+        self.current_file: Optional[dict] = None
+
+    def start_file(self, file_path: Path, file_date: datetime):
+        try:
+            size = file_path.stat().st_size
+        except OSError:
+            size = None
+        with self._lock:
+            self.current_file = {
+                'file': file_path.name,
+                'file_date': file_date.strftime('%Y-%m-%d'),
+                'bytes': size,
+                'start': time.perf_counter(),
+                'stages': {},
+            }
+
+    @contextmanager
+    def timer(self, stage: str, rows: int = 0, size: int = 0):
+        """Time a block as one call of stage; the yielded StageMetrics can be updated inside."""
+        delta = StageMetrics(rows=rows, bytes=size, calls=1)
+        start = time.perf_counter()
+        with self.counting(stage, delta):
+            try:
+                yield delta
+            finally:
+                delta.seconds = time.perf_counter() - start
+
+    @contextmanager
+    def counting(self, stage: str, delta: Optional[StageMetrics] = None):
+        """Count the round trips made by this thread inside the block for stage, without timing it."""
+        delta = delta or StageMetrics()
+        stack = self._active.__dict__.setdefault('stack', [])
+        stack.append(delta)
+        try:
+            yield delta
+        finally:
+            stack.pop()
+            self.record(stage, delta)
+
+    def round_trip(self):
+        """Count one database round trip for the stage being timed on this thread, if any."""
+        stack = getattr(self._active, 'stack', None)
+        if stack:
+            stack[-1].round_trips += 1
+
+    def record(self, stage: str, delta: StageMetrics):
+        with self._lock:
+            self.run_stages.setdefault(stage, StageMetrics()).add(delta)
+            if self.current_file is not None:
+                self.current_file['stages'].setdefault(stage, StageMetrics()).add(delta)
+
+    def timed_chunks(self, stage: str, chunks):
+        """Yield from a chunk iterator, timing each read as a call of stage."""
+        chunks = iter(chunks)
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            if chunk is None:
+                return
+            self.record(stage, StageMetrics(rows=len(chunk), seconds=time.perf_counter() - start, calls=1))
+            yield chunk
+
+    def finish_file(self, outcome: str, rows: Optional[int] = None):
+        """Close the current file: log its stage breakdown and write its JSON line."""
+        with self._lock:
+            current, self.current_file = self.current_file, None
+            self.file_outcomes[outcome] = self.file_outcomes.get(outcome, 0) + 1
+        if current is None:
+            return
+
+        seconds = time.perf_counter() - current.pop('start')
+        stages = current.pop('stages')
+        if 'read' in stages and current['bytes']:
+            # The file was read, so its size counts as bytes read
+            with self._lock:
+                stages['read'].bytes += current['bytes']
+                self.run_stages['read'].bytes += current['bytes']
+        logger.info(
+            f"Stage times for {current['file']} ({seconds:.1f}s): "
+            + ', '.join(f"{name} {s.seconds:.2f}s" for name, s in stages.items())
+        )
+        self._write_line({
+            'type': 'file',
+            'run_started': self.run_started.isoformat(timespec='seconds'),
+            **current,
+            'outcome': outcome,
+            'rows': rows,
+            'seconds': round(seconds, 6),
+            'rows_per_sec': round(rows / seconds, 1) if rows and seconds else None,
+            'peak_rss_bytes': peak_rss_bytes(),
+            'stages': {name: s.as_dict() for name, s in stages.items()},
+        })
+
+    def summary(self) -> dict:
+        """Run totals so far."""
+        seconds = time.perf_counter() - self._run_start
+        rows = self.run_stages['staging_load'].rows if 'staging_load' in self.run_stages else 0
+        return {
+            'type': 'run',
+            'run_started': self.run_started.isoformat(timespec='seconds'),
+            'seconds': round(seconds, 6),
+            'files': sum(self.file_outcomes.values()),
+            'file_outcomes': dict(self.file_outcomes),
+            'rows': rows,
+            'rows_per_sec': round(rows / seconds, 1) if seconds else None,
+            'retries': sum(s.retries for s in self.run_stages.values()),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'stages': {name: s.as_dict() for name, s in self.run_stages.items()},
+        }
+
+    def finish_run(self, conn: Optional[pyodbc.Connection], config: Config):
+        """Emit the run totals: JSON line, Prometheus text file and metadata row."""
+        summary = self.summary()
+        logger.info(
+            f"Run metrics: {summary['files']} files, {summary['rows']:,} rows in {summary['seconds']:.1f}s; "
+            + ', '.join(f"{name} {s.seconds:.1f}s" for name, s in self.run_stages.items())
+            + (f"; {summary['retries']} retries" if summary['retries'] else '')
+        )
+        self._write_line(summary)
+        if self.prometheus_file:
+            self._write_prometheus(summary, config)
+        if conn is not None:
+            try:
+                with_retry(config, 'metadata', lambda: write_run_summary(conn, config, summary), conn)
+            except pyodbc.Error as e:
+                # The connection goes back to the pool, which rolls it back
+                logger.warning(f"Could not write run summary to {config.metadata_table}: {e}")
+
+    def _write_line(self, record: dict):
+        if not self.metrics_file:
+            return
+        try:
+            with open(self.metrics_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {self.metrics_file}: {e}")
+
+    def _write_prometheus(self, summary: dict, config: Config):
+        """Write the run totals for the node_exporter textfile collector (atomic rename)."""
+        labels = f'table="{config.main_table}"'
+        lines = [
+            '# HELP csv_upsert_run_seconds Wall time of the last run.',
+            '# TYPE csv_upsert_run_seconds gauge',
+            f'csv_upsert_run_seconds{{{labels}}} {summary["seconds"]}',
+            '# HELP csv_upsert_run_timestamp_seconds Start time of the last run.',
+            '# TYPE csv_upsert_run_timestamp_seconds gauge',
+            f'csv_upsert_run_timestamp_seconds{{{labels}}} {self.run_started.timestamp():.0f}',
+            '# HELP csv_upsert_files Files handled in the last run by outcome.',
+            '# TYPE csv_upsert_files gauge',
+        ]
+        lines += [f'csv_upsert_files{{{labels},outcome="{o}"}} {n}' for o, n in summary['file_outcomes'].items()]
+        if summary['peak_rss_bytes'] is not None:
+            lines += [
+                '# HELP csv_upsert_peak_rss_bytes Peak resident memory of the last run.',
+                '# TYPE csv_upsert_peak_rss_bytes gauge',
+                f'csv_upsert_peak_rss_bytes{{{labels}}} {summary["peak_rss_bytes"]}',
+            ]
+        for metric, key, help_text in (
+            ('csv_upsert_stage_seconds', 'seconds', 'Busy seconds per stage in the last run.'),
+            ('csv_upsert_stage_rows', 'rows', 'Rows per stage in the last run.'),
+            ('csv_upsert_stage_bytes', 'bytes', 'Bytes per stage in the last run.'),
+            ('csv_upsert_stage_round_trips', 'round_trips',
+             'Database calls (execute, executemany, commit, rollback) per stage in the last run.'),
+            ('csv_upsert_stage_retries', 'retries', 'Transient database errors retried per stage in the last run.'),
+        ):
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} gauge']
+            lines += [
+                f'{metric}{{{labels},stage="{stage}"}} {values[key]}'
+                for stage, values in summary['stages'].items()
+            ]
+
+        tmp_path = f"{self.prometheus_file}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+            os.replace(tmp_path, self.prometheus_file)
+        except OSError as e:
+            logger.warning(f"Could not write Prometheus metrics to {self.prometheus_file}: {e}")
+
+
+# Metrics for the current run, shared like the logger
+metrics = RunMetrics()
+
 
 # =============================================================================
 # DATA CLEANING FUNCTIONS
@@ -274,10 +710,315 @@ def parse_boolean(value, mapping: Dict[str, bool]) -> Optional[bool]:
     return None
 
 
-def clean_dataframe(df: pd.DataFrame, config: Config) -> pd.DataFrame:
+# =============================================================================
+# VECTORIZED CLEANING ENGINE
+# =============================================================================
+# Column-at-a-time equivalents of the parse_* functions above. Each returns an
+# object Series holding exactly what the row-by-row parser would return for
+# every cell (None for nulls), but does the work with pandas/NumPy operations.
+# Cells the fast path cannot decide are handed to the row-by-row parser, which
+# only ever sees the distinct leftover values.
+
+def _all_strings(series: pd.Series) -> bool:
+    """True if every non-null value in the Series is a str."""
+    return pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty')
+
+
+def _parse_distinct(values: pd.Series, parser) -> np.ndarray:
+    """Run a row-by-row parser once per distinct value and broadcast the results."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    parsed = np.empty(len(uniques), dtype=object)
+    parsed[:] = [parser(v) for v in uniques]
+    return parsed[codes]
+
+
+# The helpers below avoid the .str accessor on whole columns: it caches itself
+# on the Series, and the resulting reference cycle keeps the replaced column
+# alive until the next full garbage collection.
+
+def _strip_text(series: pd.Series) -> pd.Series:
+    """Non-null values as str(value).strip(); nulls are dropped."""
+    present = series[series.notna()]
+    if not _all_strings(present):
+        present = present.astype(str)
+    return present.map(str.strip)
+
+
+def _map_strings(series: pd.Series, method: str) -> pd.Series:
+    """Apply a str method to the string cells of a column, leaving other values untouched."""
+    func = getattr(str, method)
+    if not _all_strings(series):
+        return series.map(lambda x: func(x) if isinstance(x, str) else x)
+
+    # Map the distinct values, so repeated cells share one result string
+    # (read_csv shares them the same way; a per-cell map would not)
+    values = series.to_numpy(dtype=object)
+    codes, uniques = pd.factorize(values)
+    mapped = np.empty(len(uniques) + 1, dtype=object)  # Last slot for the -1 (null) code
+    mapped[:-1] = [func(v) for v in uniques]
+    out = mapped[codes]
+    missing = codes < 0
+    if missing.any():
+        out[missing] = values[missing]
+    return pd.Series(out, index=series.index, dtype=object)
+
+
+def _to_float(text: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert numeric strings to floats with Python float() semantics.
+
+    Returns (ok_mask, floats). The conversion always goes through float(), so
+    results are bit-for-bit identical to the row-by-row parsers. When some
+    cells don't parse, the rest are converted one at a time (callers pass
+    distinct values); to_numeric is not used, as some garbage strings
+    ('1e4009999000001pm12') crash its parser.
+    """
+    values = text.to_numpy(dtype=object)
+    try:
+        return np.ones(len(values), dtype=bool), values.astype(float)
+    except (ValueError, TypeError):
+        pass
+    ok = np.zeros(len(values), dtype=bool)
+    floats = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        try:
+            floats[i] = float(value)
+            ok[i] = True
+        except (ValueError, TypeError):
+            pass
+    return ok, floats
+
+
+def _plain_floats(text: np.ndarray) -> Optional[np.ndarray]:
+    """float() of every value if all of them are plain numbers, else None."""
+    try:
+        return text.astype(float)
+    except (ValueError, TypeError):
+        return None
+
+
+def _numeric_fast_path(raw: pd.Series, clean) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Float values for numeric strings, trying the raw text before any cleanup.
+
+    Most cells are already plain numbers, so only the ones float() rejects
+    go through the (slower) string cleanup callable. Returns (ok_mask, floats).
+    """
+    ok, floats = _to_float(raw)
+    retry = ~ok
+    if retry.any():
+        retry_ok, retry_floats = _to_float(clean(raw[retry]))
+        ok[retry] = retry_ok
+        floats[retry] = retry_floats
+    return ok, floats
+
+
+def _strip_number_formatting(text: pd.Series) -> pd.Series:
+    """The string cleanup parse_integer does before calling float()."""
+    return text.str.strip().str.replace(',', '', regex=False).str.replace(' ', '', regex=False)
+
+
+def _strip_currency_formatting(text: pd.Series) -> pd.Series:
+    """The string cleanup parse_decimal does before calling float()."""
+    cleaned = text.str.strip().str.replace(r'[$€£¥,\s]', '', regex=True)
+    negative = cleaned.str.startswith('(') & cleaned.str.endswith(')')
+    if negative.any():
+        cleaned = cleaned.where(~negative, '-' + cleaned.str[1:-1])
+    return cleaned
+
+
+def parse_date_series(series: pd.Series, formats: List[str], date_only: bool = False) -> pd.Series:
+    """Vectorized parse_date: try each format in order over the distinct values of a column."""
+    out = np.full(len(series), None, dtype=object)
+    present = series.notna().to_numpy()
+    if not present.any():
+        return pd.Series(out, index=series.index, dtype=object)
+
+    codes, uniques = pd.factorize(series[present])
+    text = _strip_text(pd.Series(uniques, dtype=object))
+    parsed = np.full(len(text), None, dtype=object)
+    pending = text[text != '']
+
+    # to_datetime builds its own tzinfo objects, so leave %z/%Z to strptime
+    if not any('%z' in fmt or '%Z' in fmt for fmt in formats):
+        for i, fmt in enumerate(formats):
+            if pending.empty:
+                break
+            result = pd.to_datetime(pending, format=fmt, errors='coerce')
+            hit = result.notna().to_numpy()
+            if i > 0 and hit.any():
+                # to_datetime rejects out-of-bounds years that strptime accepts, so
+                # a value matched by a later format must really fail the earlier ones
+                earlier = formats[:i]
+                hit[hit] = [parse_date(v, earlier) is None for v in pending[hit]]
+            matched = pd.DatetimeIndex(result[hit])
+            parsed[pending.index[hit]] = matched.date if date_only else matched.to_pydatetime()
+            pending = pending[~hit]
+
+    if not pending.empty:
+        leftovers = [parse_date(v, formats) for v in pending]
+        if date_only:
+            leftovers = [v.date() if v is not None else None for v in leftovers]
+        parsed[pending.index] = leftovers
+
+    out[present] = parsed[codes]
+    return pd.Series(out, index=series.index, dtype=object)
+
+
+def parse_integer_series(series: pd.Series) -> pd.Series:
+    """
+    Vectorized parse_integer.
+
+    A column of plain numbers (the usual case) converts in one pass; otherwise
+    the distinct values are parsed, so the string cleanup and the row-by-row
+    fallback only see each value once.
+    """
+    out = np.full(len(series), None, dtype=object)
+    present = series.notna().to_numpy()
+    if not present.any():
+        return pd.Series(out, index=series.index, dtype=object)
+    if not _all_strings(series):
+        out[present] = _parse_distinct(series[present], parse_integer)
+        return pd.Series(out, index=series.index, dtype=object)
+
+    text = series.to_numpy(dtype=object)[present]
+    floats = _plain_floats(text)
+    if floats is not None and (np.isfinite(floats) & (np.abs(floats) < 2.0 ** 63)).all():
+        out[present] = floats.astype(np.int64).astype(object)
+        return pd.Series(out, index=series.index, dtype=object)
+
+    codes, raw = pd.factorize(text)
+    raw = pd.Series(raw, dtype=object)
+    ok, floats = _numeric_fast_path(raw, _strip_number_formatting)
+    # int(float(x)) truncates toward zero, as does the int64 cast; anything
+    # non-finite or outside int64 is left to the row-by-row parser
+    ok &= np.isfinite(floats) & (np.abs(floats) < 2.0 ** 63)
+    values = np.full(len(raw), None, dtype=object)
+    values[ok] = floats[ok].astype(np.int64).astype(object)
+    if not ok.all():
+        values[~ok] = [parse_integer(v) for v in raw[~ok]]
+    out[present] = values[codes]
+    return pd.Series(out, index=series.index, dtype=object)
+
+
+def parse_decimal_series(series: pd.Series) -> pd.Series:
+    """
+    Vectorized parse_decimal, including currency symbols and (parenthesized) negatives.
+
+    Plain numbers convert in one pass, as in parse_integer_series.
+    """
+    out = np.full(len(series), None, dtype=object)
+    present = series.notna().to_numpy()
+    if not present.any():
+        return pd.Series(out, index=series.index, dtype=object)
+    if not _all_strings(series):
+        out[present] = _parse_distinct(series[present], parse_decimal)
+        return pd.Series(out, index=series.index, dtype=object)
+
+    text = series.to_numpy(dtype=object)[present]
+    floats = _plain_floats(text)
+    if floats is not None:
+        out[present] = floats.astype(object)
+        return pd.Series(out, index=series.index, dtype=object)
+
+    codes, raw = pd.factorize(text)
+    raw = pd.Series(raw, dtype=object)
+    ok, floats = _numeric_fast_path(raw, _strip_currency_formatting)
+    values = np.full(len(raw), None, dtype=object)
+    values[ok] = floats[ok].astype(object)
+    if not ok.all():
+        values[~ok] = [parse_decimal(v) for v in raw[~ok]]
+    out[present] = values[codes]
+    return pd.Series(out, index=series.index, dtype=object)
+
+
+def parse_boolean_series(series: pd.Series, mapping: Dict[str, bool]) -> pd.Series:
+    """Vectorized parse_boolean: exact key match first, then case-insensitive."""
+    out = np.full(len(series), None, dtype=object)
+    present = series.notna().to_numpy()
+    if not present.any():
+        return pd.Series(out, index=series.index, dtype=object)
+
+    # parse_boolean returns the first key (in mapping order) that matches ignoring case
+    lower_mapping: Dict[str, bool] = {}
+    for key, bool_val in mapping.items():
+        lower_mapping.setdefault(key.lower(), bool_val)
+
+    # Flag columns only hold a handful of distinct values, so map those
+    codes, uniques = pd.factorize(series[present])
+    text = _strip_text(pd.Series(uniques))
+    exact = text.map(mapping)
+    folded = text.str.lower().map(lower_mapping)
+    values = exact.where(exact.notna(), folded).where(text != '')
+    values = values.astype(object).where(values.notna(), None)
+    out[present] = values.to_numpy(dtype=object)[codes]
+    return pd.Series(out, index=series.index, dtype=object)
+
+
+def clean_dataframe(df: pd.DataFrame, config: Config, inplace: bool = False) -> pd.DataFrame:
     """
     Clean and transform a DataFrame according to configuration.
 
+    Vectorized equivalent of clean_dataframe_rowwise: every parsed cell holds
+    the same value the parse_* functions return, with None for nulls. All
+    columns come back as object dtype.
+
+    Works a column at a time. With inplace=True the columns of df itself are
+    replaced, so no second copy of the chunk is held while cleaning.
+    """
+    if not inplace:
+        df = df.copy()
+    existing_cols = set(df.columns)
+
+    # Replace configured null values (exact cell matches, before trimming)
+    for col in df.columns:
+        values = df[col].astype(object, copy=False)
+        df[col] = values.mask(values.isin(config.null_values) | values.isna(), None)
+
+    # Trim whitespace from string columns
+    trim_cols = df.columns if config.trim_columns is None else [
+        col for col in config.trim_columns if col in existing_cols
+    ]
+    for col in trim_cols:
+        df[col] = _map_strings(df[col], 'strip')
+
+    for col, formats in config.date_columns.items():
+        if col in existing_cols:
+            df[col] = parse_date_series(df[col], formats, date_only=True)
+
+    for col, formats in config.datetime_columns.items():
+        if col in existing_cols:
+            df[col] = parse_date_series(df[col], formats)
+
+    for col in config.integer_columns:
+        if col in existing_cols:
+            df[col] = parse_integer_series(df[col])
+
+    for col in config.decimal_columns:
+        if col in existing_cols:
+            df[col] = parse_decimal_series(df[col])
+
+    for col, mapping in config.boolean_columns.items():
+        if col in existing_cols:
+            df[col] = parse_boolean_series(df[col], mapping)
+
+    for col in config.uppercase_columns:
+        if col in existing_cols:
+            df[col] = _map_strings(df[col], 'upper')
+
+    for col in config.lowercase_columns:
+        if col in existing_cols:
+            df[col] = _map_strings(df[col], 'lower')
+
+    return df
+
+
+def clean_dataframe_rowwise(df: pd.DataFrame, config: Config) -> pd.DataFrame:
+    """
+    Row-by-row reference implementation of clean_dataframe.
+
+    Kept for benchmarking and for checking the vectorized engine against.
+
     Applies the following transformations:
     - Replace configured null values with None
     - Trim whitespace from string columns
@@ -367,6 +1108,245 @@ def get_connection(config: Config) -> pyodbc.Connection:
         raise
 
 
+# =============================================================================
+# CONNECTION POOL AND RETRIES
+# =============================================================================
+# Database steps are retried on transient errors (dropped connection, timeout,
+# deadlock) up to Config.retry_attempts times with exponential backoff. Each
+# retried step is whole transactions that are safe to repeat after a rollback:
+# the staging load truncates staging first, the MERGE is an upsert (a
+# partitioned MERGE resumes after its committed slices), the snapshot and
+# metadata updates are single transactions, and table setup is idempotent.
+# A commit whose acknowledgement is lost may still be repeated.
+
+# SQLSTATEs worth retrying, and the ones among them that mean the connection is gone
+TRANSIENT_SQLSTATES = {'08S01', '08001', '08003', '08004', '08007', 'HYT00', 'HYT01', '40001'}
+CONNECTION_LOST_SQLSTATES = {'08S01', '08003', '08007'}
+
+# SQL Server error numbers worth retrying: deadlock victim, database unavailable or failing over
+TRANSIENT_ERROR_NUMBERS = re.compile(r'\((1205|4060|40197|40501|40613|49918|49919|49920)\)')
+
+# Backoff before retry n (from 0): RETRY_BASE_SECONDS * 2**n, capped, with jitter
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 30.0
+
+# Pooled connections idle longer than this are health-checked before reuse
+POOL_HEALTH_CHECK_SECONDS = 60.0
+
+T = TypeVar('T')
+
+
+def error_sqlstate(error: Exception) -> Optional[str]:
+    """SQLSTATE of a pyodbc error (its first argument), or None."""
+    state = error.args[0] if error.args else None
+    return state if isinstance(state, str) and len(state) == 5 else None
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether a database error is worth retrying (network, timeout, deadlock, failover)."""
+    if not isinstance(error, pyodbc.Error):
+        return False
+    return error_sqlstate(error) in TRANSIENT_SQLSTATES or bool(TRANSIENT_ERROR_NUMBERS.search(str(error)))
+
+
+def retry_delay(attempt: int) -> float:
+    """Seconds to wait before retry number attempt (from 0)."""
+    return min(RETRY_BASE_SECONDS * 2 ** attempt, RETRY_MAX_SECONDS) * random.uniform(0.5, 1.0)
+
+
+def with_retry(config: Config, step: str, operation: Callable[[], T], conn=None) -> T:
+    """
+    Run operation(), retrying transient database errors with exponential backoff.
+
+    Before each retry conn (if given) is rolled back, or reconnected when the
+    error or a health check shows the connection is gone. Retries are counted
+    as the step's retries in the run metrics. Other errors, and the last
+    transient one, are raised.
+    """
+    attempt = 0
+    while True:
+        try:
+            return operation()
+        except pyodbc.Error as e:
+            if attempt >= config.retry_attempts or not is_transient_error(e):
+                raise
+            delay = retry_delay(attempt)
+            attempt += 1
+            logger.warning(f"Transient database error in {step}, retry {attempt}/{config.retry_attempts} "
+                           f"in {delay:.1f}s: {e}")
+            metrics.record(step, StageMetrics(retries=1))
+            lost = error_sqlstate(e) in CONNECTION_LOST_SQLSTATES
+        time.sleep(delay)
+        if isinstance(conn, PooledConnection):
+            conn.recover(lost)
+        elif conn is not None:
+            try:
+                conn.rollback()
+            except pyodbc.Error:
+                pass
+
+
+class CountingCursor:
+    """A cursor that counts its executes as round trips in the run metrics; otherwise the cursor it wraps."""
+
+    def __init__(self, raw):
+        object.__setattr__(self, 'raw', raw)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.raw, name, value)
+
+    def execute(self, *args):
+        metrics.round_trip()
+        self.raw.execute(*args)
+        return self
+
+    def executemany(self, *args):
+        metrics.round_trip()
+        self.raw.executemany(*args)
+
+
+class PooledConnection:
+    """
+    A connection borrowed from a ConnectionPool.
+
+    Behaves like the pyodbc connection it wraps. recover() replaces a lost
+    connection in place, so code holding this object keeps working after a
+    reconnect; close() hands it back to the pool.
+    """
+
+    def __init__(self, pool: 'ConnectionPool', raw):
+        self.pool = pool
+        self.raw = raw
+        self.last_used = time.monotonic()
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def cursor(self):
+        return CountingCursor(self.raw.cursor())
+
+    def execute(self, *args):
+        metrics.round_trip()
+        return self.raw.execute(*args)
+
+    def executemany(self, *args):
+        metrics.round_trip()
+        return self.raw.executemany(*args)
+
+    def commit(self):
+        metrics.round_trip()
+        self.raw.commit()
+
+    def rollback(self):
+        metrics.round_trip()
+        self.raw.rollback()
+
+    def close(self):
+        self.pool.release(self)
+
+    def is_healthy(self) -> bool:
+        """Round trip a trivial query."""
+        try:
+            cursor = self.raw.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            return True
+        except pyodbc.Error:
+            return False
+
+    def recover(self, lost: bool = False):
+        """Roll back after a failed step, reconnecting if the connection is gone."""
+        if not lost:
+            try:
+                self.raw.rollback()
+                lost = not self.is_healthy()
+            except pyodbc.Error:
+                lost = True
+        if lost:
+            logger.warning("Database connection lost, reconnecting")
+            self.discard()
+            self.raw = self.pool.open()
+            self.pool.reconnects += 1
+
+    def discard(self):
+        """Close the underlying connection, ignoring errors from a dead one."""
+        try:
+            self.raw.close()
+        except pyodbc.Error:
+            pass
+
+
+class ConnectionPool:
+    """
+    Connections to the configured database, reused across files.
+
+    The run's main connection and the partitioned MERGE workers are borrowed
+    from here, so parallel slices do not reconnect for every file. Opening a
+    connection retries transient errors, and connections idle longer than
+    POOL_HEALTH_CHECK_SECONDS are checked before reuse. connect can replace
+    get_connection, e.g. with a local stand-in.
+    """
+
+    def __init__(self, config: Config, connect: Optional[Callable[[], object]] = None):
+        self.config = config
+        self._connect = connect or (lambda: get_connection(config))
+        self._idle: List[PooledConnection] = []
+        self._lock = threading.Lock()
+        self.reconnects = 0
+
+    def open(self):
+        """Open a new underlying connection."""
+        return with_retry(self.config, 'connect', self._connect)
+
+    def acquire(self) -> PooledConnection:
+        """An idle connection that passes its health check, or a new one."""
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return PooledConnection(self, self.open())
+            if time.monotonic() - conn.last_used < POOL_HEALTH_CHECK_SECONDS or conn.is_healthy():
+                return conn
+            logger.info("Discarding pooled connection that failed its health check")
+            conn.discard()
+
+    def release(self, conn: PooledConnection):
+        """Take a connection back; one that cannot even roll back is closed instead."""
+        try:
+            conn.raw.rollback()
+        except pyodbc.Error:
+            conn.discard()
+            return
+        conn.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(conn)
+
+    def close(self):
+        """Close the idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.discard()
+
+
+def reset_connection(conn):
+    """Roll back after a failed file; a lost pooled connection is replaced so the next file can run."""
+    if isinstance(conn, PooledConnection):
+        conn.recover()
+    else:
+        conn.rollback()
+
+
+def borrow_connection(conn, config: Config):
+    """Another connection to the same database: from conn's pool if it has one."""
+    if isinstance(conn, PooledConnection):
+        return conn.pool.acquire()
+    return get_connection(config)
+
+
 def parse_date_from_filename(filename: str) -> Optional[datetime]:
     """Extract date from filename like PartnerFile_01132026.csv."""
     pattern = rf'{FILE_PREFIX}(\d{{8}})\.csv$'
@@ -380,12 +1360,192 @@ def parse_date_from_filename(filename: str) -> Optional[datetime]:
     return None
 
 
-def discover_files(config: Config, start_date: Optional[datetime] = None) -> List[Tuple[Path, datetime]]:
+# =============================================================================
+# FILE MANIFEST
+# =============================================================================
+# Optional JSON record (--manifest) of every file the script has loaded: size,
+# mtime, content hash, row count and outcome, plus the last listing of each
+# source folder so an unchanged folder is not re-globbed over the network.
+
+MANIFEST_VERSION = 1
+
+# Read size when hashing file content
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Daily runs check files loaded this many days before the first new file for
+# replacement (one stat per file, a hash only if size or mtime moved)
+MANIFEST_RECHECK_DAYS = 30
+
+
+def file_sha256(file_path: Path) -> str:
+    """SHA-256 of a file's content, read in HASH_CHUNK_SIZE blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FileManifest:
+    """
+    Persistent record of source files and folder listings for one target table.
+
+    Entries are keyed by file path. A file counts as unchanged while its size
+    and mtime match the entry; if either moved, the content hash decides, so a
+    file that was only touched or re-copied is not treated as replaced.
+    """
+
+    def __init__(self, path: Path, target: str):
+        self.path = path
+        self.target = target
+        self.directories: Dict[str, dict] = {}
+        self.files: Dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, path: Path, config: Config) -> 'FileManifest':
+        """Read the manifest at path, starting empty if it is missing or for another target."""
+        target = f"{config.server}/{config.database}/{config.main_table_fq}"
+        manifest = cls(path, target)
+        if not path.exists():
+            logger.info(f"No manifest at {path}, starting a new one")
+            return manifest
+
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read manifest {path}, starting a new one: {e}")
+            return manifest
+
+        if data.get('version') != MANIFEST_VERSION or data.get('target') != target:
+            logger.warning(f"Manifest {path} belongs to {data.get('target')}, not {target}; starting a new one")
+            return manifest
+
+        manifest.directories = data.get('directories', {})
+        manifest.files = data.get('files', {})
+        logger.info(f"Loaded manifest {path}: {len(manifest.files):,} files")
+        return manifest
+
+    def save(self):
+        """Write the manifest atomically (temp file + rename)."""
+        data = {
+            'version': MANIFEST_VERSION,
+            'target': self.target,
+            'directories': self.directories,
+            'files': self.files,
+        }
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save manifest {self.path}: {e}")
+
+    def list_directory(self, folder: Path, pattern: str) -> List[Path]:
+        """Files in folder matching pattern, re-globbed only when the folder mtime moved."""
+        key = str(folder)
+        mtime = folder.stat().st_mtime_ns
+        cached = self.directories.get(key)
+        if cached is not None and cached['mtime_ns'] == mtime:
+            logger.debug(f"Folder unchanged since last scan, using manifest listing: {folder}")
+            return [folder / name for name in cached['files']]
+
+        names = sorted(p.name for p in folder.glob(pattern))
+        self.directories[key] = {'mtime_ns': mtime, 'files': names}
+        return [folder / name for name in names]
+
+    def check(self, file_path: Path) -> str:
+        """Return 'new', 'unchanged' or 'replaced' for a file compared with its entry."""
+        entry = self.files.get(str(file_path))
+        if entry is None:
+            return 'new'
+
+        stat = file_path.stat()
+        if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return 'unchanged'
+
+        if entry['size'] == stat.st_size and entry['sha256'] == file_sha256(file_path):
+            # Touched or re-copied with the same content
+            entry['mtime_ns'] = stat.st_mtime_ns
+            return 'unchanged'
+        return 'replaced'
+
+    def is_loaded(self, file_path: Path) -> bool:
+        """True if the file was loaded and its content has not changed since."""
+        entry = self.files.get(str(file_path))
+        return entry is not None and entry['outcome'] == 'loaded' and self.check(file_path) == 'unchanged'
+
+    def record(self, file_path: Path, file_date: datetime, rows: Optional[int]):
+        """Record a load outcome (rows is None for a failed load) and save."""
+        key = str(file_path)
+        stat = file_path.stat()
+        entry = self.files.get(key)
+        if entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            sha256 = entry['sha256']
+        else:
+            sha256 = file_sha256(file_path)
+
+        self.files[key] = {
+            'file_date': file_date.strftime('%Y-%m-%d'),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': sha256,
+            'rows': rows,
+            'outcome': 'loaded' if rows is not None else 'failed',
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        self.save()
+
+    def clear_outcomes(self):
+        """Forget load outcomes (tables were truncated) but keep sizes and hashes."""
+        for entry in self.files.values():
+            entry['outcome'] = None
+            entry['rows'] = None
+
+
+def open_manifest(config: Config) -> Optional[FileManifest]:
+    """Load the manifest configured with --manifest, or None if it is disabled."""
+    if not config.manifest_path:
+        return None
+    return FileManifest.load(Path(config.manifest_path), config)
+
+
+def record_load(manifest: Optional[FileManifest], file_path: Path, file_date: datetime, rows: Optional[int]):
+    """Record a file's load outcome in the manifest, if one is in use."""
+    if manifest is None:
+        return
+    try:
+        manifest.record(file_path, file_date, rows)
+    except OSError as e:
+        logger.warning(f"Could not record {file_path.name} in manifest: {e}")
+
+
+def warn_replaced_files(manifest: FileManifest, files: List[Tuple[Path, datetime]]):
+    """Log loaded files whose content changed since they were loaded."""
+    for file_path, file_date in files:
+        entry = manifest.files.get(str(file_path))
+        if entry is None or entry['outcome'] != 'loaded':
+            continue
+        try:
+            if manifest.check(file_path) == 'replaced':
+                logger.warning(
+                    f"File replaced after it was loaded: {file_path.name}. "
+                    f"Rebuild from {file_date.strftime(DATE_FORMAT)} to pick up the new content."
+                )
+        except OSError as e:
+            logger.warning(f"Could not check {file_path.name} against manifest: {e}")
+
+
+def discover_files(config: Config, start_date: Optional[datetime] = None,
+                   manifest: Optional[FileManifest] = None) -> List[Tuple[Path, datetime]]:
     """
     Discover CSV files matching the pattern from both archive and recent folders.
 
     Returns list of (file_path, date) tuples sorted by date ascending.
     Files with the same date in both folders will use the recent folder version.
+    With a manifest, a folder whose mtime has not moved since the last scan is
+    not globbed again.
     """
     files_with_dates = {}  # Use dict to dedupe by date (recent takes precedence)
     pattern = f"{FILE_PREFIX}*.csv"
@@ -402,7 +1562,8 @@ def discover_files(config: Config, start_date: Optional[datetime] = None) -> Lis
             logger.warning(f"{folder_name.capitalize()} path does not exist: {path}")
             continue
 
-        for csv_file in path.glob(pattern):
+        csv_files = manifest.list_directory(path, pattern) if manifest is not None else path.glob(pattern)
+        for csv_file in csv_files:
             file_date = parse_date_from_filename(csv_file.name)
             if file_date:
                 if start_date is None or file_date >= start_date:
@@ -449,6 +1610,20 @@ def update_last_processed_date(conn: pyodbc.Connection, config: Config, date: da
     conn.commit()
 
 
+def write_run_summary(conn: pyodbc.Connection, config: Config, summary: dict):
+    """Store run totals on this table's metadata row (there is none until a file has been processed)."""
+    outcomes = summary['file_outcomes']
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        UPDATE {config.metadata_table_fq}
+        SET last_run_started = ?, last_run_seconds = ?, last_run_files = ?, last_run_failed = ?,
+            last_run_rows = ?, last_run_metrics = ?
+        WHERE table_name = ?
+    """, datetime.fromisoformat(summary['run_started']), summary['seconds'], summary['files'],
+        outcomes.get('failed', 0), summary['rows'], json.dumps(summary['stages']), config.main_table)
+    conn.commit()
+
+
 def ensure_tables_exist(conn: pyodbc.Connection, config: Config):
     """Create tables if they don't exist."""
     cursor = conn.cursor()
@@ -461,6 +1636,8 @@ def ensure_tables_exist(conn: pyodbc.Connection, config: Config):
 
     # Combine data and audit columns for MainTable
     main_col_defs = f"{data_col_defs}, {audit_col_defs}"
+    if config.row_hash:
+        main_col_defs += f", [{config.row_hash_column}] BIGINT"
     main_col_defs_with_pk = main_col_defs.replace(
         f"[{config.unique_key}] {config.columns[config.unique_key]}",
         f"[{config.unique_key}] {config.columns[config.unique_key]} PRIMARY KEY"
@@ -475,27 +1652,44 @@ def ensure_tables_exist(conn: pyodbc.Connection, config: Config):
     # Create Staging table (data columns only, no constraints for fast loading)
     cursor.execute(f"""
         IF OBJECT_ID('{config.schema}.{config.staging_table}', 'U') IS NULL
-        CREATE TABLE {config.staging_table_fq} ({data_col_defs})
+        CREATE TABLE {config.staging_table_fq} ({config.staging_column_defs})
     """)
 
+    # Tables created before row hashing was enabled get the hash column added
+    if config.row_hash:
+        for table in (config.main_table, config.staging_table):
+            cursor.execute(f"""
+                IF COL_LENGTH('{config.schema}.{table}', '{config.row_hash_column}') IS NULL
+                ALTER TABLE [{config.schema}].[{table}] ADD [{config.row_hash_column}] BIGINT
+            """)
+
     # Create index on staging table for faster MERGE
     cursor.execute(f"""
         IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_{config.staging_table}_{config.unique_key}')
         CREATE INDEX IX_{config.staging_table}_{config.unique_key} ON {config.staging_table_fq} ([{config.unique_key}])
     """)
 
-    # Create HistoryTable with snapshot_date and audit columns
-    history_col_defs = f"[snapshot_date] DATETIME NOT NULL, {data_col_defs}, {audit_col_defs}"
-    cursor.execute(f"""
-        IF OBJECT_ID('{config.schema}.{config.history_table}', 'U') IS NULL
-        CREATE TABLE {config.history_table_fq} ({history_col_defs})
-    """)
+    if config.validate:
+        ensure_validation_tables(cursor, config)
 
-    # Create index on history table for efficient queries
-    cursor.execute(f"""
-        IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_{config.schema}_{config.history_table}_snapshot_date')
-        CREATE INDEX IX_{config.schema}_{config.history_table}_snapshot_date ON {config.history_table_fq} (snapshot_date)
-    """)
+    if config.merge_slices > 1:
+        ensure_merge_progress_table(cursor, config)
+
+    if config.history_mode == 'delta':
+        ensure_delta_history_tables(cursor, config, data_col_defs, audit_col_defs)
+    else:
+        # Create HistoryTable with snapshot_date and audit columns
+        history_col_defs = f"[snapshot_date] DATETIME NOT NULL, {data_col_defs}, {audit_col_defs}"
+        cursor.execute(f"""
+            IF OBJECT_ID('{config.schema}.{config.history_table}', 'U') IS NULL
+            CREATE TABLE {config.history_table_fq} ({history_col_defs})
+        """)
+
+        # Create index on history table for efficient queries
+        cursor.execute(f"""
+            IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_{config.schema}_{config.history_table}_snapshot_date')
+            CREATE INDEX IX_{config.schema}_{config.history_table}_snapshot_date ON {config.history_table_fq} (snapshot_date)
+        """)
 
     # Create metadata table (supports multiple table configurations)
     cursor.execute(f"""
@@ -508,49 +1702,136 @@ def ensure_tables_exist(conn: pyodbc.Connection, config: Config):
         )
     """)
 
-    conn.commit()
-    logger.info("Tables verified/created successfully")
+    # Run summary columns, also added to metadata tables created before them
+    for col, dtype in RUN_SUMMARY_COLUMNS.items():
+        cursor.execute(f"""
+            IF COL_LENGTH('{config.schema}.{config.metadata_table}', '{col}') IS NULL
+            ALTER TABLE {config.metadata_table_fq} ADD [{col}] {dtype} NULL
+        """)
 
+    # Objects the staging loader needs (table types, procedures, ...)
+    get_staging_loader(config).ensure_objects(conn)
 
-def truncate_tables(conn: pyodbc.Connection, config: Config):
-    """Truncate MainTable, HistoryTable, and Staging for rebuild, and clear metadata for this table only."""
-    cursor = conn.cursor()
-    cursor.execute(f"TRUNCATE TABLE {config.main_table_fq}")
-    cursor.execute(f"TRUNCATE TABLE {config.history_table_fq}")
-    cursor.execute(f"TRUNCATE TABLE {config.staging_table_fq}")
-    # Only delete the metadata row for this specific table (not the entire table)
-    cursor.execute(f"DELETE FROM {config.metadata_table_fq} WHERE table_name = ?", config.main_table)
     conn.commit()
-    logger.info("Tables truncated for rebuild")
+    logger.info("Tables verified/created successfully")
 
 
-def truncate_staging(conn: pyodbc.Connection, config: Config):
-    """Truncate the staging table."""
-    cursor = conn.cursor()
-    cursor.execute(f"TRUNCATE TABLE {config.staging_table_fq}")
-    conn.commit()
+def ensure_delta_history_tables(cursor, config: Config, data_col_defs: str, audit_col_defs: str):
+    """
+    Create the row-version HistoryTable and its snapshot log for delta history mode.
 
-
-def bulk_insert_to_staging(conn: pyodbc.Connection, config: Config, df: pd.DataFrame, filename: str):
+    Each history row is one version of a key, valid from the snapshot where it
+    first appeared until (excluding) the snapshot where it changed or
+    disappeared; valid_to is NULL for the current version.
     """
-    Bulk insert DataFrame into staging table using fast_executemany.
+    history_col_defs = f"[valid_from] DATETIME NOT NULL, [valid_to] DATETIME NULL, {data_col_defs}, {audit_col_defs}"
+    cursor.execute(f"""
+        IF OBJECT_ID('{config.schema}.{config.history_table}', 'U') IS NULL
+        CREATE TABLE {config.history_table_fq} ({history_col_defs})
+    """)
 
-    This bypasses the 2,100 parameter limit by using pyodbc's fast_executemany
-    which sends data in batches efficiently.
+    # Current versions are looked up by key on every load
+    cursor.execute(f"""
+        IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_{config.schema}_{config.history_table}_key_valid_to')
+        CREATE INDEX IX_{config.schema}_{config.history_table}_key_valid_to
+            ON {config.history_table_fq} ([{config.unique_key}], valid_to)
+    """)
+    cursor.execute(f"""
+        IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_{config.schema}_{config.history_table}_valid_from')
+        CREATE INDEX IX_{config.schema}_{config.history_table}_valid_from ON {config.history_table_fq} (valid_from)
+    """)
+
+    # One row per loaded file, so as-of queries know which snapshot applies
+    cursor.execute(f"""
+        IF OBJECT_ID('{config.schema}.{config.history_log_table}', 'U') IS NULL
+        CREATE TABLE {config.history_log_table_fq} (
+            snapshot_date DATETIME NOT NULL PRIMARY KEY,
+            source_file VARCHAR(255) NULL,
+            row_count INT NOT NULL
+        )
+    """)
+
+
+def ensure_validation_tables(cursor, config: Config):
+    """Create the raw (text) staging table and the errors table for validation mode."""
+    raw_col_defs = config.load_column_defs
+    cursor.execute(f"""
+        IF OBJECT_ID('{config.schema}.{config.raw_staging_table}', 'U') IS NULL
+        CREATE TABLE {config.raw_staging_table_fq} ({raw_col_defs})
+    """)
+    if config.row_hash:
+        cursor.execute(f"""
+            IF COL_LENGTH('{config.schema}.{config.raw_staging_table}', '{config.row_hash_column}') IS NULL
+            ALTER TABLE {config.raw_staging_table_fq} ADD [{config.row_hash_column}] BIGINT
+        """)
+
+    cursor.execute(f"""
+        IF OBJECT_ID('{config.schema}.{config.errors_table}', 'U') IS NULL
+        CREATE TABLE {config.errors_table_fq} (
+            {config.raw_column_defs},
+            error_reason NVARCHAR(400) NOT NULL,
+            {'source_file VARCHAR(255) NULL,' if config.errors_source_file else ''}
+            error_dt DATETIME NOT NULL
+        )
+    """)
+
+
+def truncate_tables(conn: pyodbc.Connection, config: Config):
+    """Truncate MainTable, HistoryTable, and Staging for rebuild, and clear metadata for this table only."""
+    cursor = conn.cursor()
+    cursor.execute(f"TRUNCATE TABLE {config.main_table_fq}")
+    cursor.execute(f"TRUNCATE TABLE {config.history_table_fq}")
+    if config.history_mode == 'delta':
+        cursor.execute(f"TRUNCATE TABLE {config.history_log_table_fq}")
+    cursor.execute(f"TRUNCATE TABLE {config.staging_table_fq}")
+    for table in (config.merge_progress_table, config.raw_staging_table, config.errors_table):
+        cursor.execute(f"""
+            IF OBJECT_ID('{config.schema}.{table}', 'U') IS NOT NULL
+            TRUNCATE TABLE [{config.schema}].[{table}]
+        """)
+    # Only delete the metadata row for this specific table (not the entire table)
+    cursor.execute(f"DELETE FROM {config.metadata_table_fq} WHERE table_name = ?", config.main_table)
+    conn.commit()
+    logger.info("Tables truncated for rebuild")
+
+
+def truncate_staging(conn: pyodbc.Connection, config: Config):
+    """Truncate the staging table."""
+    with metrics.timer('truncate'):
+        cursor = conn.cursor()
+        cursor.execute(f"TRUNCATE TABLE {config.staging_table_fq}")
+        if config.validate:
+            cursor.execute(f"TRUNCATE TABLE {config.raw_staging_table_fq}")
+        conn.commit()
+
+
+def prepare_staging_frame(config: Config, df: pd.DataFrame, filename: str) -> pd.DataFrame:
     """
-    if df.empty:
-        return 0
+    Turn a raw CSV chunk into a staging-ready DataFrame.
+
+    Renames columns, adds the source file column, cleans the data and selects
+    the configured columns in order. Does not touch the database, so it can run
+    in a worker process.
 
+    The chunk is renamed and cleaned in place rather than copied, so it must
+    not be used by the caller afterwards.
+    """
     # Rename columns from CSV names to SQL names
     if config.column_mapping:
-        df = df.rename(columns=config.column_mapping)
+        df.columns = [config.column_mapping.get(col, col) for col in df.columns]
 
     # Add source file column if configured
     if config.source_file_column:
         df[config.source_file_column] = filename
 
+    # Raw values of the parsed columns, for the validation text
+    original = {}
+    if config.validate:
+        original = {col: df[col] for col in config.parsed_columns if col in df.columns}
+
     # Clean and transform the data
-    df = clean_dataframe(df, config)
+    with metrics.timer('clean', rows=len(df)):
+        df = clean_dataframe(df, config, inplace=True)
 
     columns = list(config.columns.keys())
 
@@ -561,52 +1842,473 @@ def bulk_insert_to_staging(conn: pyodbc.Connection, config: Config, df: pd.DataF
             df[col] = None
 
     # Select only the columns we need in the right order
-    df = df[columns]
+    if list(df.columns) != columns:
+        df = df.reindex(columns=columns)
 
-    # Replace NaN/NaT/Inf/empty strings with None for SQL Server compatibility
-    import math
-    def sanitize_value(val):
-        if val is None:
+    if config.row_hash:
+        df[config.row_hash_column] = compute_row_hashes(df, config)
+
+    if config.validate:
+        df = validation_text_frame(df, original, config)
+
+    return df
+
+
+def compute_row_hashes(df: pd.DataFrame, config: Config) -> np.ndarray:
+    """
+    64-bit content hash of each cleaned row, stored as BIGINT.
+
+    The source file column is left out so a row repeated unchanged in the next
+    day's file hashes the same. A hash that differs for identical content (e.g.
+    after a pandas upgrade) only costs an extra UPDATE, never a missed one.
+    """
+    hash_cols = [c for c in config.columns if c != config.source_file_column]
+    hashes = pd.util.hash_pandas_object(df[hash_cols], index=False).to_numpy()
+    return hashes.view(np.int64)
+
+
+def sql_text(val) -> Optional[str]:
+    """Text for a cleaned value that TRY_CAST turns back into the same SQL value."""
+    val = sanitize_value(val)
+    if val is None:
+        return None
+    if isinstance(val, bool):
+        return '1' if val else '0'
+    if isinstance(val, datetime):
+        # ISO 8601 with the T separator is read the same under every language setting
+        return val.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]
+    if isinstance(val, date):
+        return val.isoformat()
+    if isinstance(val, float):
+        # Positional notation: DECIMAL casts reject exponents
+        return np.format_float_positional(val, trim='-')
+    return str(val)
+
+
+def validation_text_frame(df: pd.DataFrame, original: Dict[str, pd.Series], config: Config) -> pd.DataFrame:
+    """
+    Text form of a cleaned staging frame for the raw staging table.
+
+    Parsed values are written so SQL Server casts them back unchanged. A value
+    the date/number/boolean parsers could not read is passed through as the
+    original (trimmed) text instead of NULL, and the cast in validate_staging
+    decides: it is kept if SQL Server can read it and quarantined with a
+    reason if not, rather than silently becoming NULL.
+
+    original maps the parsed columns to their raw values. Columns of df are
+    replaced in place.
+    """
+    null_values = set(config.null_values)
+
+    for col in config.columns:
+        text = df[col].map(sql_text)
+        if col in original:
+            raw = _map_strings(original[col].astype(object), 'strip')
+            unreadable = text.isna() & raw.notna() & ~raw.isin(null_values) & ~original[col].isin(null_values)
+            text = text.mask(unreadable & (raw != ''), raw)
+        df[col] = text
+    return df
+
+
+# =============================================================================
+# STAGING LOADERS
+# =============================================================================
+# Pluggable backends for getting staging-ready rows into the staging table
+# (config.load_table: the raw staging table when --validate is on).
+# Selected with --loader; all of them take the output of prepare_staging_frame.
+# Rows are generated lazily from the frame's columns; the executemany loader
+# passes them to the driver in sub-batches so the parameter buffers stay small.
+
+STAGING_SUB_BATCH_ROWS = 2000
+
+
+def sanitize_value(val):
+    """Replace NaN/NaT/Inf/empty strings with None for SQL Server compatibility."""
+    if val is None:
+        return None
+    if isinstance(val, str) and val.strip() == '':
+        return None
+    if isinstance(val, float):
+        if math.isnan(val) or math.isinf(val):
             return None
-        if isinstance(val, str) and val.strip() == '':
+    try:
+        if pd.isna(val):
             return None
+    except (ValueError, TypeError):
+        pass
+    return val
+
+
+def _sanitize_cell(val):
+    """sanitize_value with fast paths for the types a cleaned frame holds."""
+    kind = type(val)
+    if kind is str:
+        return val if val.strip() else None
+    if kind is float:
+        return val if math.isfinite(val) else None
+    if val is None or kind is int or kind is bool or kind is datetime or kind is date:
+        return val
+    return sanitize_value(val)
+
+
+def staging_rows(df: pd.DataFrame) -> Iterator[tuple]:
+    """
+    Sanitized row tuples for a staging-ready DataFrame, generated lazily.
+
+    Reads the frame column by column instead of making a row-major copy, so
+    only the tuples the consumer holds on to take extra memory.
+    """
+    columns = [map(_sanitize_cell, df.iloc[:, i].to_numpy(dtype=object)) for i in range(df.shape[1])]
+    return zip(*columns)
+
+
+def row_batches(rows: Iterator[tuple], size: int) -> Iterator[List[tuple]]:
+    """Split a row iterator into lists of at most size rows."""
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class StagingLoader(ABC):
+    """
+    Base class for staging table loaders.
+
+    ensure_objects() is called from ensure_tables_exist to create anything the
+    backend needs on the server; load() inserts one staging-ready DataFrame and
+    returns the number of rows written.
+    """
+    name = ''
+
+    def __init__(self, config: Config):
+        self.config = config
+
+    @property
+    def columns(self) -> List[str]:
+        return self.config.staging_columns
+
+    def ensure_objects(self, conn):
+        """Create any server-side objects the loader depends on."""
+
+    @abstractmethod
+    def load(self, conn, df: pd.DataFrame) -> int:
+        """Insert df into the staging table; returns the number of rows written."""
+
+
+class ExecutemanyLoader(StagingLoader):
+    """Parameterized INSERT through pyodbc's fast_executemany (the default)."""
+    name = 'executemany'
+
+    def load(self, conn, df: pd.DataFrame) -> int:
+        # Build INSERT statement for staging
+        col_list = ', '.join([f"[{c}]" for c in self.columns])
+        placeholders = ', '.join(['?' for _ in self.columns])
+        insert_sql = f"INSERT INTO {self.config.load_table_fq} ({col_list}) VALUES ({placeholders})"
+
+        cursor = conn.cursor()
+        cursor.fast_executemany = True  # Enable bulk insert mode
+        for batch in row_batches(staging_rows(df), STAGING_SUB_BATCH_ROWS):
+            cursor.executemany(insert_sql, batch)
+        conn.commit()  # Commit each batch to avoid transaction log bloat on large files
+
+        return len(df)
+
+
+class TvpLoader(StagingLoader):
+    """
+    Send each chunk as one table-valued parameter to a loader procedure.
+
+    The table type and procedure are named after the load table and created
+    on first use. Drop both if the column definitions change.
+    """
+    name = 'tvp'
+
+    @property
+    def type_name(self) -> str:
+        return f"{self.config.load_table}_Rows"
+
+    @property
+    def procedure_name(self) -> str:
+        return f"usp_Load_{self.config.load_table}"
+
+    def ensure_objects(self, conn):
+        config = self.config
+        cursor = conn.cursor()
+        col_list = ', '.join([f"[{c}]" for c in self.columns])
+
+        cursor.execute(f"""
+            IF TYPE_ID('{config.schema}.{self.type_name}') IS NULL
+            CREATE TYPE [{config.schema}].[{self.type_name}] AS TABLE ({config.load_column_defs})
+        """)
+        cursor.execute(f"""
+            IF OBJECT_ID('{config.schema}.{self.procedure_name}', 'P') IS NULL
+            EXEC('CREATE PROCEDURE [{config.schema}].[{self.procedure_name}]
+                      @rows [{config.schema}].[{self.type_name}] READONLY
+                  AS
+                  INSERT INTO {config.load_table_fq} ({col_list})
+                  SELECT {col_list} FROM @rows')
+        """)
+        conn.commit()
+
+    def load(self, conn, df: pd.DataFrame) -> int:
+        # The whole chunk goes in one call, so its rows are materialized here
+        rows = list(staging_rows(df))
+        cursor = conn.cursor()
+        cursor.execute(f"{{CALL [{self.config.schema}].[{self.procedure_name}] (?)}}", (rows,))
+        conn.commit()
+        return len(rows)
+
+
+class BcpLoader(StagingLoader):
+    """
+    Write each chunk to a character-format data file and load it with the bcp utility.
+
+    Fields and rows are separated by the ASCII unit/record separator characters,
+    so values need no quoting; a value containing either one is rejected.
+    bcp runs in its own session, outside the caller's connection.
+    """
+    name = 'bcp'
+
+    FIELD_TERMINATOR = '\x1f'
+    ROW_TERMINATOR = '\x1e'
+
+    def _field(self, val) -> str:
+        if val is None:
+            return ''
+        if isinstance(val, bool):
+            return '1' if val else '0'
+        if isinstance(val, datetime):
+            return val.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        if isinstance(val, date):
+            return val.isoformat()
         if isinstance(val, float):
-            if math.isnan(val) or math.isinf(val):
-                return None
+            # Positional notation: DECIMAL columns reject exponents in character mode
+            return np.format_float_positional(val, trim='-')
+        text = str(val)
+        if self.FIELD_TERMINATOR in text or self.ROW_TERMINATOR in text:
+            raise ValueError(f"Value contains a bcp terminator character: {text!r}")
+        return text
+
+    def load(self, conn, df: pd.DataFrame) -> int:
+        config = self.config
+
+        fd, data_file = tempfile.mkstemp(prefix=f"{config.load_table}_", suffix='.dat')
         try:
-            if pd.isna(val):
-                return None
-        except (ValueError, TypeError):
-            pass
-        return val
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as fh:
+                for row in staging_rows(df):
+                    fh.write(self.FIELD_TERMINATOR.join(self._field(v) for v in row))
+                    fh.write(self.ROW_TERMINATOR)
+
+            command = [
+                config.bcp_command, f"{config.database}.{config.schema}.{config.load_table}",
+                'in', data_file,
+                '-S', config.server, '-T',
+                '-c', '-C', '65001',
+                '-t', '0x1f', '-r', '0x1e',
+                '-b', str(config.batch_size),
+            ]
+            result = subprocess.run(command, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"bcp failed ({result.returncode}): {result.stdout.strip()} {result.stderr.strip()}")
+        finally:
+            os.remove(data_file)
+
+        return len(df)
+
+
+class SqliteLoader(StagingLoader):
+    """
+    Local stand-in that loads into a SQLite table of the same name.
 
-    rows = [tuple(sanitize_value(val) for val in row) for row in df.values.tolist()]
+    Takes a sqlite3 connection instead of a pyodbc one. Used to exercise the
+    loader interface and measure client-side throughput without SQL Server.
+    """
+    name = 'sqlite'
+
+    def ensure_objects(self, conn):
+        conn.execute(f"CREATE TABLE IF NOT EXISTS [{self.config.load_table}] ({self.config.load_column_defs})")
+        conn.commit()
+
+    def load(self, conn, df: pd.DataFrame) -> int:
+        # sqlite3 has no default adapters for date/datetime on newer Pythons
+        rows = (
+            tuple(v.isoformat(sep=' ') if isinstance(v, datetime) else v.isoformat() if isinstance(v, date) else v
+                  for v in row)
+            for row in staging_rows(df)
+        )
+        col_list = ', '.join([f"[{c}]" for c in self.columns])
+        placeholders = ', '.join(['?' for _ in self.columns])
+        conn.executemany(f"INSERT INTO [{self.config.load_table}] ({col_list}) VALUES ({placeholders})", rows)
+        conn.commit()
+        return len(df)
 
-    # Build INSERT statement for staging
-    col_list = ', '.join([f"[{c}]" for c in columns])
-    placeholders = ', '.join(['?' for _ in columns])
-    insert_sql = f"INSERT INTO {config.staging_table_fq} ({col_list}) VALUES ({placeholders})"
 
-    cursor = conn.cursor()
-    cursor.fast_executemany = True  # Enable bulk insert mode
-    cursor.executemany(insert_sql, rows)
-    conn.commit()  # Commit each batch to avoid transaction log bloat on large files
+STAGING_LOADERS: Dict[str, type] = {
+    loader.name: loader for loader in (ExecutemanyLoader, TvpLoader, BcpLoader, SqliteLoader)
+}
 
-    return len(rows)
+
+def get_staging_loader(config: Config) -> StagingLoader:
+    """Instantiate the staging loader selected in config.loader."""
+    try:
+        return STAGING_LOADERS[config.loader](config)
+    except KeyError:
+        raise ValueError(f"Unknown staging loader: {config.loader} (choose from {', '.join(STAGING_LOADERS)})") from None
 
 
-def merge_staging_to_target(conn: pyodbc.Connection, config: Config):
+def insert_staging_rows(conn: pyodbc.Connection, config: Config, df: pd.DataFrame) -> int:
+    """Insert a staging-ready DataFrame (see prepare_staging_frame) with the configured loader."""
+    if df.empty:
+        return 0
+    with metrics.timer('staging_load', rows=len(df)):
+        return get_staging_loader(config).load(conn, df)
+
+
+def bulk_insert_to_staging(conn: pyodbc.Connection, config: Config, df: pd.DataFrame, filename: str):
     """
-    Execute MERGE from staging table to target table.
+    Bulk insert DataFrame into staging table using fast_executemany.
 
-    This runs as a single SQL statement with no parameters,
-    avoiding the 2,100 parameter limit entirely.
+    This bypasses the 2,100 parameter limit by using pyodbc's fast_executemany
+    which sends data in batches efficiently.
+    """
+    if df.empty:
+        return 0
+
+    df = prepare_staging_frame(config, df, filename)
+    return insert_staging_rows(conn, config, df)
+
+
+# =============================================================================
+# VALIDATION AND QUARANTINE
+# =============================================================================
+# With --validate, files load into a text-typed raw staging table. The checks
+# below are generated from Config.columns and the unique key and run as one
+# set-based batch: rows with a missing key, a value that does not cast to its
+# column type or does not fit its length, or a repeated key are copied to the
+# errors table with a reason, and the remaining rows are cast into the typed
+# staging table for the MERGE and history snapshot.
+
+# Longest value quoted in an error reason
+ERROR_VALUE_LENGTH = 200
+
+_SIZED_TEXT_TYPE = re.compile(r'^\s*N?(?:VAR)?CHAR\s*\(\s*(\d+)\s*\)\s*$', re.IGNORECASE)
+
+
+def validation_checks(config: Config) -> List[Tuple[str, str]]:
+    """(failure condition, reason expression) pairs, in the order reasons are reported."""
+    key = config.unique_key
+    checks = [(f"[{key}] IS NULL", f"'Missing {key}'")]
+    for col, dtype in config.columns.items():
+        checks.append((
+            f"[{col}] IS NOT NULL AND TRY_CAST([{col}] AS {dtype}) IS NULL",
+            f"'Invalid {dtype} in {col}: ' + LEFT([{col}], {ERROR_VALUE_LENGTH})",
+        ))
+        sized = _SIZED_TEXT_TYPE.match(dtype)
+        if sized:
+            # Casts to shorter text types truncate silently instead of failing
+            checks.append((
+                f"LEN([{col}]) > {sized.group(1)}",
+                f"'Value too long for {dtype} in {col}: ' + LEFT([{col}], {ERROR_VALUE_LENGTH})",
+            ))
+    return checks
+
+
+def validate_staging(conn: pyodbc.Connection, config: Config, source_name: str) -> Tuple[int, int]:
+    """
+    Quarantine invalid and duplicate-key rows from the raw staging table and
+    cast the rest into the typed staging table.
+
+    For a repeated key one row is kept (which one is arbitrary, as with
+    ROW_NUMBER over no order) and the others go to the errors table. Returns
+    (invalid rows, duplicate rows).
     """
     cursor = conn.cursor()
+    key = config.unique_key
+    key_type = config.columns[key]
+    data_columns = list(config.columns.keys())
+    data_col_list = ', '.join([f"[{c}]" for c in data_columns])
+
+    checks = validation_checks(config)
+    reason = "CASE " + " ".join([f"WHEN {cond} THEN {expr}" for cond, expr in checks]) + " END"
+
+    # Typed values for staging; every remaining row passed the casts
+    cast_list = ', '.join([f"TRY_CAST([{c}] AS {dtype})" for c, dtype in config.columns.items()])
+    staging_col_list = data_col_list
+    if config.row_hash:
+        cast_list += f", [{config.row_hash_column}]"
+        staging_col_list += f", [{config.row_hash_column}]"
+
+    # A source_file data column already holds the file name
+    if config.errors_source_file:
+        error_col_list, error_source, error_params = f"{data_col_list}, error_reason, source_file", "?, ", [source_name]
+    else:
+        error_col_list, error_source, error_params = f"{data_col_list}, error_reason", "", []
+
+    with metrics.timer('validate'):
+        cursor.execute(f"""
+            SET NOCOUNT ON;
+            DECLARE @invalid INT, @duplicates INT;
+            IF OBJECT_ID('tempdb..#checked') IS NOT NULL DROP TABLE #checked;
+
+            SELECT *, CAST({reason} AS NVARCHAR(400)) AS error_reason
+            INTO #checked
+            FROM {config.raw_staging_table_fq};
+            SELECT @invalid = COUNT(*) FROM #checked WHERE error_reason IS NOT NULL;
+
+            -- Keys are compared as their SQL type, so '007' and '7' collide as INT
+            WITH ranked AS (
+                SELECT [{key}], error_reason,
+                       ROW_NUMBER() OVER (PARTITION BY TRY_CAST([{key}] AS {key_type}) ORDER BY (SELECT NULL)) AS row_num
+                FROM #checked
+                WHERE error_reason IS NULL
+            )
+            UPDATE ranked
+            SET error_reason = 'Duplicate {key}: ' + LEFT([{key}], {ERROR_VALUE_LENGTH})
+            WHERE row_num > 1;
+            SET @duplicates = @@ROWCOUNT;
+
+            INSERT INTO {config.errors_table_fq} ({error_col_list}, error_dt)
+            SELECT {data_col_list}, error_reason, {error_source}GETDATE()
+            FROM #checked
+            WHERE error_reason IS NOT NULL;
+
+            INSERT INTO {config.staging_table_fq} ({staging_col_list})
+            SELECT {cast_list}
+            FROM #checked
+            WHERE error_reason IS NULL;
+
+            DROP TABLE #checked;
+
+            SELECT @invalid, @duplicates;
+        """, *error_params)
+        invalid, duplicates = cursor.fetchone()
+        conn.commit()
+
+    if invalid or duplicates:
+        logger.warning(
+            f"Validation quarantined {invalid + duplicates:,} rows of {source_name} in {config.errors_table}: "
+            f"{invalid:,} invalid, {duplicates:,} duplicate {key}"
+        )
+    else:
+        logger.info(f"Validation passed: no rows quarantined from {source_name}")
+    return invalid, duplicates
+
+
+def execute_merge(cursor, config: Config, source: Optional[str] = None, params: tuple = (),
+                  label: str = 'MERGE') -> int:
+    """
+    Run the MERGE into the target from source without committing.
+
+    source is a table or parenthesised query (default: the whole staging
+    table) and params are its query parameters. Returns the rows inserted or
+    updated; in row-hash mode the inserted/updated/unchanged counts are logged
+    under label.
+    """
+    source = source or config.staging_table_fq
 
     # Data columns
     data_columns = list(config.columns.keys())
-    data_col_list = ', '.join([f"[{c}]" for c in data_columns])
 
     # Build UPDATE SET clause (exclude the unique key)
     update_data_cols = [c for c in data_columns if c != config.unique_key]
@@ -623,120 +2325,1105 @@ def merge_staging_to_target(conn: pyodbc.Connection, config: Config):
     insert_values = ', '.join([f'source.[{c}]' for c in data_columns])
     insert_values += f", GETDATE(), '{config.system_user}', GETDATE(), '{config.system_user}'"
 
+    if not config.row_hash:
+        merge_sql = f"""
+            MERGE INTO {config.main_table_fq} AS target
+            USING {source} AS source
+            ON target.[{config.unique_key}] = source.[{config.unique_key}]
+            WHEN MATCHED THEN
+                UPDATE SET {update_set}
+            WHEN NOT MATCHED THEN
+                INSERT ({insert_col_list}) VALUES ({insert_values});
+        """
+
+        cursor.execute(merge_sql, *params)
+        return cursor.rowcount
+
+    hash_col = config.row_hash_column
     merge_sql = f"""
+        SET NOCOUNT ON;
+        DECLARE @merge_actions TABLE (merge_action NVARCHAR(10));
+
         MERGE INTO {config.main_table_fq} AS target
-        USING {config.staging_table_fq} AS source
+        USING {source} AS source
         ON target.[{config.unique_key}] = source.[{config.unique_key}]
-        WHEN MATCHED THEN
-            UPDATE SET {update_set}
+        WHEN MATCHED AND (target.[{hash_col}] IS NULL OR target.[{hash_col}] <> source.[{hash_col}]) THEN
+            UPDATE SET {update_set}, target.[{hash_col}] = source.[{hash_col}]
         WHEN NOT MATCHED THEN
-            INSERT ({insert_col_list}) VALUES ({insert_values});
+            INSERT ({insert_col_list}, [{hash_col}]) VALUES ({insert_values}, source.[{hash_col}])
+        OUTPUT $action INTO @merge_actions;
+
+        SELECT
+            (SELECT COUNT(*) FROM @merge_actions WHERE merge_action = 'INSERT'),
+            (SELECT COUNT(*) FROM @merge_actions WHERE merge_action = 'UPDATE'),
+            (SELECT COUNT(*) FROM {source} AS staged);
+    """
+
+    # source appears twice (USING and the staged count)
+    cursor.execute(merge_sql, *params, *params)
+    inserted, updated, staged = cursor.fetchone()
+
+    unchanged = staged - inserted - updated
+    logger.info(f"{label}: {inserted:,} inserted, {updated:,} updated, {unchanged:,} unchanged")
+
+    return inserted + updated
+
+
+def merge_staging_to_target(conn: pyodbc.Connection, config: Config, source_name: Optional[str] = None,
+                            source_signature: str = '') -> int:
+    """
+    Execute MERGE from staging table to target table.
+
+    This runs as a single SQL statement with no parameters,
+    avoiding the 2,100 parameter limit entirely.
+
+    With config.row_hash, matched rows whose stored hash equals the staging
+    hash are left alone (no UPDATE, no modified_dt change), and the inserted,
+    updated and unchanged counts are logged.
+
+    With config.merge_slices > 1 the MERGE is split into slices instead (see
+    merge_staging_partitioned); source_name and source_signature identify the
+    file and its content for resuming.
+    """
+    if config.merge_slices > 1:
+        with metrics.timer('merge') as stage:
+            stage.rows = merge_staging_partitioned(conn, config, source_name or config.staging_table,
+                                                   source_signature)
+        return stage.rows
+
+    with metrics.timer('merge') as stage:
+        cursor = conn.cursor()
+        stage.rows = execute_merge(cursor, config)
+        conn.commit()
+
+    return stage.rows
+
+
+# =============================================================================
+# PARTITIONED MERGE
+# =============================================================================
+# With --merge-slices N the staging table is merged in up to N slices, each in
+# its own transaction, so no single MERGE holds locks and log space for the
+# whole file. Slices are key ranges of equal row counts (NTILE over the key)
+# or hash buckets of the key, and can be spread over several connections.
+#
+# Each slice commits together with a row in the merge progress table. If a
+# file fails part way, loading it again skips the slices already merged, as
+# long as the file's size and modification time are unchanged (a corrected
+# file re-delivered under the same name starts over) and the new staging data
+# plans the same slices.
+#
+# Parallel connections merge disjoint keys, but a slice big enough to escalate
+# to a table lock will block the others; keep slices well below the lock
+# escalation threshold or disable escalation on the main table.
+
+
+@dataclass
+class MergeSlice:
+    """One slice of the staging table: a key range (low exclusive, high inclusive) or a hash bucket."""
+    number: int
+    low: object = None
+    high: object = None
+
+    def condition(self, config: Config, slice_count: int) -> Tuple[str, tuple]:
+        """WHERE clause selecting this slice's staging rows, with its parameters."""
+        key = f"[{config.unique_key}]"
+        if config.merge_partition == 'hash':
+            return f"(CHECKSUM({key}) & 2147483647) % {slice_count} = {self.number - 1}", ()
+
+        if self.number == 1:
+            # NULL keys go with the first slice, so they fail the MERGE as they would unsliced
+            if self.high is None:
+                return "1 = 1", ()
+            return f"({key} <= ? OR {key} IS NULL)", (self.high,)
+        if self.high is None:
+            return f"{key} > ?", (self.low,)
+        return f"{key} > ? AND {key} <= ?", (self.low, self.high)
+
+
+def plan_merge_slices(conn: pyodbc.Connection, config: Config) -> List[MergeSlice]:
+    """Split the staging table into config.merge_slices slices."""
+    if config.merge_partition == 'hash':
+        return [MergeSlice(number) for number in range(1, config.merge_slices + 1)]
+
+    # Upper key of each NTILE bucket; the last slice is left open-ended
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT MAX(k) FROM (
+            SELECT [{config.unique_key}] AS k, NTILE(?) OVER (ORDER BY [{config.unique_key}]) AS tile
+            FROM {config.staging_table_fq}
+            WHERE [{config.unique_key}] IS NOT NULL
+        ) AS tiles
+        GROUP BY tile
+        ORDER BY tile
+    """, config.merge_slices)
+    highs = [row[0] for row in cursor.fetchall()]
+
+    slices = []
+    low = None
+    for number, high in enumerate(highs, start=1):
+        slices.append(MergeSlice(number, low, high if number < len(highs) else None))
+        low = high
+    return slices or [MergeSlice(1)]
+
+
+def ensure_merge_progress_table(cursor, config: Config):
+    """Create the table recording merged slices of partially merged files."""
+    key_type = config.columns[config.unique_key]
+    cursor.execute(f"""
+        IF OBJECT_ID('{config.schema}.{config.merge_progress_table}', 'U') IS NULL
+        CREATE TABLE {config.merge_progress_table_fq} (
+            source_file VARCHAR(255) NOT NULL,
+            partition_method VARCHAR(10) NOT NULL,
+            slice_count INT NOT NULL,
+            slice_number INT NOT NULL,
+            low_key {key_type} NULL,
+            high_key {key_type} NULL,
+            completed_dt DATETIME NOT NULL,
+            PRIMARY KEY (source_file, slice_number)
+        )
+    """)
+    # Added after the table was first released
+    cursor.execute(f"""
+        IF COL_LENGTH('{config.schema}.{config.merge_progress_table}', 'source_signature') IS NULL
+        ALTER TABLE {config.merge_progress_table_fq} ADD source_signature VARCHAR(64) NULL
+    """)
+
+
+def merge_source_signature(file_path: Path) -> str:
+    """Size and modification time of a file, identifying its content in the merge progress table."""
+    stat = file_path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def completed_merge_slices(conn: pyodbc.Connection, config: Config, source_name: str, source_signature: str,
+                           slices: List[MergeSlice]) -> set:
+    """Numbers of the planned slices already merged for this content of source_name by an earlier attempt."""
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT slice_number, low_key, high_key
+        FROM {config.merge_progress_table_fq}
+        WHERE source_file = ? AND ISNULL(source_signature, '') = ? AND partition_method = ? AND slice_count = ?
+    """, source_name, source_signature, config.merge_partition, len(slices))
+    recorded = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+    return {s.number for s in slices if recorded.get(s.number) == (s.low, s.high)}
+
+
+def merge_slice(conn: pyodbc.Connection, config: Config, merge_part: MergeSlice, slice_count: int,
+                source_name: str, source_signature: str) -> int:
+    """MERGE one slice and record it in the progress table, in one transaction."""
+    where, params = merge_part.condition(config, slice_count)
+    source = f"(SELECT * FROM {config.staging_table_fq} WHERE {where})"
+
+    # Slices may run on other threads, outside the merge timer
+    with metrics.counting('merge'):
+        cursor = conn.cursor()
+        try:
+            rows = execute_merge(cursor, config, source, params,
+                                 label=f"MERGE slice {merge_part.number}/{slice_count}")
+            cursor.execute(f"""
+                INSERT INTO {config.merge_progress_table_fq}
+                    (source_file, source_signature, partition_method, slice_count, slice_number, low_key, high_key,
+                     completed_dt)
+                VALUES (?, ?, ?, ?, ?, ?, ?, GETDATE())
+            """, source_name, source_signature, config.merge_partition, slice_count, merge_part.number,
+                merge_part.low, merge_part.high)
+            conn.commit()
+        except pyodbc.Error:
+            conn.rollback()
+            raise
+    return rows
+
+
+def merge_staging_partitioned(conn: pyodbc.Connection, config: Config, source_name: str,
+                              source_signature: str = '') -> int:
+    """
+    MERGE staging into the target slice by slice, resuming after merged slices.
+
+    Slices run on this connection, or on config.merge_connections connections
+    of their own in parallel. Returns the rows inserted or updated.
     """
+    slices = plan_merge_slices(conn, config)
+    slice_count = len(slices)
+
+    # Leftovers from an attempt on other content, or that planned different
+    # slices, no longer apply
+    done = completed_merge_slices(conn, config, source_name, source_signature, slices)
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        DELETE FROM {config.merge_progress_table_fq}
+        WHERE source_file = ?
+          AND NOT (ISNULL(source_signature, '') = ? AND partition_method = ? AND slice_count = ?)
+    """, source_name, source_signature, config.merge_partition, slice_count)
+    conn.commit()
+
+    pending = [s for s in slices if s.number not in done]
+    if done:
+        logger.info(f"Resuming partitioned MERGE of {source_name}: {len(done)}/{slice_count} slices already merged")
+    logger.info(
+        f"Partitioned MERGE: {len(pending)} {config.merge_partition} slices "
+        f"on {min(config.merge_connections, max(len(pending), 1))} connection(s)"
+    )
 
-    cursor.execute(merge_sql)
-    rows_affected = cursor.rowcount
+    progress_lock = threading.Lock()
+    started = time.perf_counter()
+    merged_count = len(done)
+
+    def run_slice(slice_conn: pyodbc.Connection, merge_part: MergeSlice) -> int:
+        nonlocal merged_count
+        slice_start = time.perf_counter()
+        rows = merge_slice(slice_conn, config, merge_part, slice_count, source_name, source_signature)
+        with progress_lock:
+            merged_count += 1
+            elapsed = time.perf_counter() - started
+            eta = elapsed / (merged_count - len(done)) * (slice_count - merged_count)
+            logger.info(
+                f"  MERGE slice {merge_part.number}/{slice_count}: {rows:,} rows in "
+                f"{time.perf_counter() - slice_start:.1f}s ({merged_count}/{slice_count} done, ETA {eta:.0f}s)"
+            )
+        return rows
+
+    if config.merge_connections > 1 and len(pending) > 1:
+        todo: queue.Queue = queue.Queue()
+        for merge_part in pending:
+            todo.put(merge_part)
+        stop = threading.Event()
+
+        def worker() -> int:
+            worker_conn = borrow_connection(conn, config)
+            try:
+                rows = 0
+                while not stop.is_set():
+                    try:
+                        merge_part = todo.get_nowait()
+                    except queue.Empty:
+                        break
+                    try:
+                        rows += run_slice(worker_conn, merge_part)
+                    except Exception:
+                        stop.set()
+                        raise
+                return rows
+            finally:
+                worker_conn.close()
+
+        workers = min(config.merge_connections, len(pending))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(worker) for _ in range(workers)]
+        total_rows = sum(future.result() for future in futures)
+    else:
+        total_rows = sum(run_slice(conn, merge_part) for merge_part in pending)
+
+    # Whole file merged: a later load of the same file starts from scratch
+    cursor.execute(f"DELETE FROM {config.merge_progress_table_fq} WHERE source_file = ?", source_name)
     conn.commit()
 
-    return rows_affected
+    logger.info(f"Partitioned MERGE complete: {total_rows:,} rows in {time.perf_counter() - started:.1f}s")
+    return total_rows
+
+
+def read_csv_chunks(config: Config, file_path: Path):
+    """Open a partner CSV as an iterator of raw string chunks of the configured columns."""
+    wanted = set(config.columns)
+
+    # Read all as strings - clean_dataframe handles type conversion and null values
+    reader = pd.read_csv(
+        file_path,
+        chunksize=config.batch_size,
+        usecols=lambda name: config.column_mapping.get(name, name) in wanted,  # Skip unused columns
+        dtype=str,
+        keep_default_na=False,  # Don't auto-convert NA values, let clean_dataframe handle it
+        na_filter=False  # Read everything as-is
+    )
+    return metrics.timed_chunks('read', reader)
+
+
+def prepare_file(config: Config, file_path: Path) -> List[pd.DataFrame]:
+    """
+    Read and clean a whole CSV file into staging-ready chunks.
+
+    Used by the pipelined rebuild, where it runs in a worker process ahead of
+    the database work. Exceptions propagate to the caller via the future.
+    """
+    return list(prepared_chunks(config, file_path, open_file_cache(config)))
+
+
+# =============================================================================
+# CLEANED FILE CACHE
+# =============================================================================
+# Optional (--cache-dir) local Parquet copy of each file as prepare_staging_frame
+# left it. An entry is keyed by the file's content hash, its name (it fills the
+# source file column) and a hash of every setting that affects cleaning, so
+# changing a cleaning rule, the column list or pandas itself simply stops
+# matching the old entries, which then age out. The least recently used entries
+# are evicted once the cache is over config.cache_max_mb.
+
+CACHE_VERSION = 1
+
+# Config fields whose values change what prepare_staging_frame produces
+CLEANING_CONFIG_FIELDS = (
+    'columns', 'column_mapping', 'source_file_column', 'null_values', 'trim_columns',
+    'date_columns', 'datetime_columns', 'integer_columns', 'decimal_columns', 'boolean_columns',
+    'uppercase_columns', 'lowercase_columns', 'row_hash', 'row_hash_column', 'validate',
+)
+
+
+def cleaning_config_hash(config: Config) -> str:
+    """SHA-256 of the cleaning rules, the cache format version and the pandas version."""
+    rules = {name: getattr(config, name) for name in CLEANING_CONFIG_FIELDS}
+    rules['cache_version'] = CACHE_VERSION
+    rules['pandas'] = pd.__version__
+    text = json.dumps(rules, sort_keys=True, default=lambda v: sorted(v) if isinstance(v, (set, frozenset)) else str(v))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def cache_schema(config: Config) -> 'pa.Schema':
+    """Arrow schema of a staging-ready frame, from the cleaning rules."""
+    fields = []
+    for col in config.columns:
+        if config.validate:
+            arrow_type = pa.string()
+        elif col in config.date_columns:
+            arrow_type = pa.date32()
+        elif col in config.datetime_columns:
+            arrow_type = pa.timestamp('us')
+        elif col in config.integer_columns:
+            arrow_type = pa.int64()
+        elif col in config.decimal_columns:
+            arrow_type = pa.float64()
+        elif col in config.boolean_columns:
+            arrow_type = pa.bool_()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(col, arrow_type))
+    if config.row_hash:
+        fields.append(pa.field(config.row_hash_column, pa.int64()))
+    return pa.schema(fields)
+
+
+class CacheWriter:
+    """Writes one cache entry chunk by chunk to a temp file; commit() publishes it."""
+
+    def __init__(self, cache: 'CleanedFileCache', file_path: Path, entry_path: Path):
+        self.cache = cache
+        self.file_path = file_path
+        self.entry_path = entry_path
+        self.tmp_path = entry_path.with_name(f"{entry_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        self.writer = None
+        self.failed = False
+
+    def write(self, df: pd.DataFrame):
+        """Append a staging-ready chunk as a row group. A chunk Arrow cannot store disables the entry."""
+        if self.failed:
+            return
+        try:
+            with metrics.timer('cache_write', rows=len(df)):
+                table = pa.Table.from_pandas(df, schema=self.cache.schema, preserve_index=False)
+                if self.writer is None:
+                    self.writer = pq.ParquetWriter(self.tmp_path, self.cache.schema)
+                self.writer.write_table(table)
+        except (pa.ArrowException, OSError, ValueError, TypeError) as e:
+            logger.warning(f"Not caching {self.file_path.name}: {e}")
+            self.abort()
+            self.failed = True
+
+    def commit(self):
+        """Publish the entry and evict old ones if the cache is over its size limit."""
+        if self.failed or self.writer is None:
+            self.abort()
+            return
+        try:
+            self.writer.close()
+            self.writer = None
+            os.replace(self.tmp_path, self.entry_path)
+        except OSError as e:
+            logger.warning(f"Could not save cache entry for {self.file_path.name}: {e}")
+            self.abort()
+            return
+        logger.info(f"Cached cleaned {self.file_path.name} ({self.entry_path.stat().st_size / 2**20:,.1f} MB)")
+        self.cache.evict()
+
+    def abort(self):
+        """Drop a partly written entry."""
+        if self.writer is not None:
+            try:
+                self.writer.close()
+            except (pa.ArrowException, OSError):
+                pass
+            self.writer = None
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
 
+class CleanedFileCache:
+    """
+    Directory of cleaned files in Parquet, one row group per chunk.
 
-def process_file(conn: pyodbc.Connection, config: Config, file_path: Path, file_date: datetime) -> bool:
+    Source content hashes are remembered in small per-file stamp files (size,
+    mtime, hash) so an unchanged file on the share is not re-read to be hashed.
+    Entries are touched on every hit, so their mtime orders the eviction.
+    """
+
+    def __init__(self, directory: Path, config: Config):
+        self.directory = directory
+        self.config = config
+        self.max_bytes = config.cache_max_mb * 2**20
+        self.rules_hash = cleaning_config_hash(config)
+        self.schema = cache_schema(config)
+        self.stamp_directory = directory / 'sources'
+        self.stamp_directory.mkdir(parents=True, exist_ok=True)
+        self._keys: Dict[str, str] = {}
+
+    def _stamp_path(self, file_path: Path) -> Path:
+        return self.stamp_directory / f"{hashlib.sha1(str(file_path).encode('utf-8')).hexdigest()}.json"
+
+    def source_hash(self, file_path: Path) -> str:
+        """Content hash of a source file, reusing the stamp while its size and mtime match."""
+        stat = file_path.stat()
+        stamp_path = self._stamp_path(file_path)
+        try:
+            with open(stamp_path, encoding='utf-8') as f:
+                stamp = json.load(f)
+            if stamp['size'] == stat.st_size and stamp['mtime_ns'] == stat.st_mtime_ns:
+                return stamp['sha256']
+        except (OSError, ValueError, KeyError):
+            pass
+
+        sha256 = file_sha256(file_path)
+        tmp_path = stamp_path.with_name(f"{stamp_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'path': str(file_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                           'sha256': sha256}, f)
+            os.replace(tmp_path, stamp_path)
+        except OSError as e:
+            logger.warning(f"Could not save cache stamp for {file_path.name}: {e}")
+        return sha256
+
+    def entry_path(self, file_path: Path) -> Path:
+        """Cache entry for a source file under the current cleaning rules."""
+        key = self._keys.get(str(file_path))
+        if key is None:
+            parts = f"{self.rules_hash}/{self.source_hash(file_path)}/{file_path.name}"
+            key = hashlib.sha256(parts.encode('utf-8')).hexdigest()[:32]
+            self._keys[str(file_path)] = key
+        return self.directory / f"{file_path.stem}.{key}.parquet"
+
+    def contains(self, file_path: Path) -> bool:
+        return self.entry_path(file_path).exists()
+
+    def read(self, file_path: Path) -> Optional[Iterator[pd.DataFrame]]:
+        """Staging-ready chunks from the cache, or None on a miss."""
+        entry_path = self.entry_path(file_path)
+        try:
+            parquet_file = pq.ParquetFile(entry_path)
+            os.utime(entry_path)  # Most recently used
+        except (OSError, pa.ArrowException):
+            return None
+        logger.info(f"Loading {file_path.name} from the cleaned file cache")
+        return metrics.timed_chunks('cache_read', self._frames(parquet_file))
+
+    def _frames(self, parquet_file) -> Iterator[pd.DataFrame]:
+        # to_pylist gives back the Python objects prepare_staging_frame produced
+        # (int, float, date, datetime, bool, str, None); the row hash stays int64
+        for batch in parquet_file.iter_batches(batch_size=self.config.batch_size):
+            data = {}
+            for name, column in zip(batch.schema.names, batch.columns):
+                if self.config.row_hash and name == self.config.row_hash_column:
+                    data[name] = column.to_numpy()
+                else:
+                    # An object Series, so pandas keeps the values as they are
+                    # (a plain array would have datetimes re-inferred to Timestamps)
+                    values = np.empty(len(column), dtype=object)
+                    values[:] = column.to_pylist()
+                    data[name] = pd.Series(values, dtype=object)
+            yield pd.DataFrame(data)
+
+    def writer(self, file_path: Path) -> CacheWriter:
+        return CacheWriter(self, file_path, self.entry_path(file_path))
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for path in self.directory.glob('*.parquet'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # Evicted by another worker
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            logger.info(f"Evicted {path.name} from the cleaned file cache")
+
+
+def open_file_cache(config: Config) -> Optional[CleanedFileCache]:
+    """The cleaned file cache configured with --cache-dir, or None if it is disabled or unavailable."""
+    if not config.cache_dir:
+        return None
+    if pa is None:
+        logger.warning("pyarrow is not installed; cleaned file cache disabled")
+        return None
+    if any('%z' in fmt or '%Z' in fmt for formats in config.datetime_columns.values() for fmt in formats):
+        # Parquet timestamps would not give back the original tzinfo objects
+        logger.warning("Time zone aware datetime columns are not cached; cleaned file cache disabled")
+        return None
+    try:
+        return CleanedFileCache(Path(config.cache_dir), config)
+    except OSError as e:
+        logger.warning(f"Could not open cleaned file cache {config.cache_dir}: {e}")
+        return None
+
+
+def cache_entry_writer(cache: Optional[CleanedFileCache], file_path: Path) -> Optional[CacheWriter]:
+    """A writer for a file's cache entry, or None if there is no cache or it cannot be keyed."""
+    if cache is None:
+        return None
+    try:
+        return cache.writer(file_path)
+    except OSError as e:
+        logger.warning(f"Not caching {file_path.name}: {e}")
+        return None
+
+
+def prepared_chunks(config: Config, file_path: Path,
+                    cache: Optional[CleanedFileCache] = None) -> Iterator[pd.DataFrame]:
+    """
+    Staging-ready chunks of a file: from the cache on a hit, otherwise read and
+    cleaned from the CSV (and written to the cache if there is one).
+    """
+    if cache is not None:
+        try:
+            cached = cache.read(file_path)
+        except OSError as e:
+            logger.warning(f"Cleaned file cache lookup failed for {file_path.name}: {e}")
+            cached = None
+        if cached is not None:
+            yield from cached
+            return
+
+    writer = cache_entry_writer(cache, file_path)
+    try:
+        for chunk in read_csv_chunks(config, file_path):
+            frame = prepare_staging_frame(config, chunk, file_path.name)
+            if writer is not None:
+                writer.write(frame)
+            yield frame
+        if writer is not None:
+            writer.commit()
+            writer = None
+    finally:
+        if writer is not None:
+            writer.abort()
+
+
+# =============================================================================
+# STREAMING LOAD PIPELINE
+# =============================================================================
+# reader thread -> raw queue -> cleaner thread -> clean queue -> loader (caller)
+# Both queues are bounded, so a slow stage blocks the ones feeding it instead of
+# letting chunks pile up in memory. The loader stays on the calling thread since
+# it owns the database connection.
+
+_END_OF_FILE = object()
+
+
+@dataclass
+class StageStats:
+    """Busy/idle seconds for one pipeline stage."""
+    name: str
+    busy: float = 0.0
+    idle: float = 0.0
+    chunks: int = 0
+
+
+@dataclass
+class _StageFailure:
+    """An exception raised in an upstream stage, passed down to be re-raised by the loader."""
+    error: BaseException
+
+
+def _put(q: queue.Queue, item, stop: threading.Event, stats: StageStats):
+    """Put with backpressure; gives up if the pipeline is being torn down."""
+    start = time.perf_counter()
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            break
+        except queue.Full:
+            continue
+    stats.idle += time.perf_counter() - start
+
+
+def _get(q: queue.Queue, stop: threading.Event, stats: StageStats):
+    """Blocking get that returns _END_OF_FILE if the pipeline is being torn down."""
+    start = time.perf_counter()
+    item = _END_OF_FILE
+    while not stop.is_set():
+        try:
+            item = q.get(timeout=0.1)
+            break
+        except queue.Empty:
+            continue
+    stats.idle += time.perf_counter() - start
+    return item
+
+
+def _read_stage(config: Config, file_path: Path, out_q: queue.Queue, stop: threading.Event, stats: StageStats):
+    """Reader thread: pull raw chunks off the (network) file."""
+    try:
+        chunks = iter(read_csv_chunks(config, file_path))
+        while not stop.is_set():
+            start = time.perf_counter()
+            chunk = next(chunks, _END_OF_FILE)
+            stats.busy += time.perf_counter() - start
+            if chunk is _END_OF_FILE:
+                break
+            stats.chunks += 1
+            _put(out_q, chunk, stop, stats)
+    except Exception as e:
+        _put(out_q, _StageFailure(e), stop, stats)
+        return
+    _put(out_q, _END_OF_FILE, stop, stats)
+
+
+def _clean_stage(config: Config, filename: str, in_q: queue.Queue, out_q: queue.Queue,
+                 stop: threading.Event, stats: StageStats, writer: Optional[CacheWriter] = None):
+    """Cleaner thread: turn raw chunks into staging-ready frames (and write them to the cache)."""
+    try:
+        while True:
+            item = _get(in_q, stop, stats)
+            if item is _END_OF_FILE and writer is not None and not stop.is_set():
+                # The whole file was read (a teardown also ends in _END_OF_FILE)
+                writer.commit()
+                writer = None
+            if item is _END_OF_FILE or isinstance(item, _StageFailure):
+                _put(out_q, item, stop, stats)
+                return
+            start = time.perf_counter()
+            try:
+                item = prepare_staging_frame(config, item, filename)
+                if writer is not None:
+                    writer.write(item)
+            except Exception as e:
+                item = _StageFailure(e)
+            stats.busy += time.perf_counter() - start
+            if isinstance(item, _StageFailure):
+                _put(out_q, item, stop, stats)
+                return
+            stats.chunks += 1
+            _put(out_q, item, stop, stats)
+    finally:
+        if writer is not None:
+            writer.abort()
+
+
+def log_stage_stats(filename: str, stages: List[StageStats]):
+    """Log per-stage busy/idle time and name the stage that limited throughput."""
+    summary = ', '.join(f"{s.name} busy {s.busy:.2f}s / idle {s.idle:.2f}s ({s.chunks} chunks)" for s in stages)
+    bottleneck = max(stages, key=lambda s: s.busy)
+    logger.info(f"Pipeline stages for {filename}: {summary}; bottleneck: {bottleneck.name}")
+
+
+def stream_file_to_staging(conn: pyodbc.Connection, config: Config, file_path: Path,
+                           cache: Optional[CleanedFileCache] = None) -> int:
+    """
+    Load a CSV into staging through a reader -> cleaner -> loader pipeline.
+
+    The network read, cleaning and ODBC inserts for consecutive chunks overlap.
+    An exception in any stage stops the others and is re-raised here unchanged,
+    so process_file's error handling applies as in the serial path. With a
+    cache, the cleaner thread also writes the file's cache entry.
+
+    Returns the number of rows inserted.
+    """
+    stop = threading.Event()
+    raw_q: queue.Queue = queue.Queue(maxsize=max(config.queue_size, 1))
+    clean_q: queue.Queue = queue.Queue(maxsize=max(config.queue_size, 1))
+    read_stats, clean_stats, load_stats = StageStats('read'), StageStats('clean'), StageStats('load')
+
+    threads = [
+        threading.Thread(target=_read_stage, args=(config, file_path, raw_q, stop, read_stats),
+                         name='csv-reader', daemon=True),
+        threading.Thread(target=_clean_stage,
+                         args=(config, file_path.name, raw_q, clean_q, stop, clean_stats,
+                               cache_entry_writer(cache, file_path)),
+                         name='csv-cleaner', daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    total_rows = 0
+    try:
+        while True:
+            item = _get(clean_q, stop, load_stats)
+            if item is _END_OF_FILE:
+                break
+            if isinstance(item, _StageFailure):
+                raise item.error
+            start = time.perf_counter()
+            total_rows += insert_staging_rows(conn, config, item)
+            load_stats.busy += time.perf_counter() - start
+            load_stats.chunks += 1
+            if load_stats.chunks % 10 == 0:
+                logger.info(f"  Loaded {total_rows:,} rows to staging...")
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        log_stage_stats(file_path.name, [read_stats, clean_stats, load_stats])
+
+    return total_rows
+
+
+def process_file(conn: pyodbc.Connection, config: Config, file_path: Path, file_date: datetime,
+                 prepared: Optional[Future] = None) -> Optional[int]:
     """
     Process a single CSV file using staging table approach.
 
     Flow:
     1. Truncate staging table
     2. Bulk insert CSV data into staging (using fast_executemany)
+       (with config.validate: into raw staging, then validate_staging
+       quarantines bad rows and casts the rest into staging)
     3. MERGE from staging to target table
     4. Truncate staging table
 
-    Returns True if successful, False otherwise.
+    If prepared is given, it is a future from prepare_file and its chunks are
+    loaded as-is instead of reading the CSV here. Otherwise a file held in the
+    cleaned file cache (--cache-dir) is loaded from there.
+
+    Returns the number of rows loaded if successful, None otherwise.
     """
     logger.info(f"Processing file: {file_path.name} (date: {file_date.strftime('%Y-%m-%d')})")
 
     try:
-        # Step 1: Clear staging table
-        truncate_staging(conn, config)
-
-        # Step 2: Read CSV in chunks and bulk insert to staging
-        # Read all as strings - clean_dataframe handles type conversion and null values
-        chunks = pd.read_csv(
-            file_path,
-            chunksize=config.batch_size,
-            dtype=str,
-            keep_default_na=False,  # Don't auto-convert NA values, let clean_dataframe handle it
-            na_filter=False  # Read everything as-is
-        )
-
-        total_rows = 0
-        for i, chunk in enumerate(chunks):
-            rows_inserted = bulk_insert_to_staging(conn, config, chunk, file_path.name)
-            total_rows += rows_inserted
-            if (i + 1) % 10 == 0:
-                logger.info(f"  Loaded {total_rows:,} rows to staging...")
-
-        logger.info(f"Loaded {total_rows:,} rows to staging table")
+        cache = open_file_cache(config) if prepared is None else None
+        if prepared is not None:
+            with metrics.timer('prepare_wait'):
+                prepared_frames = prepared.result()
+
+        def load_staging() -> int:
+            # Steps 1-2b are retried as one: staging is cleared and reloaded
+            # Step 1: Clear staging table
+            truncate_staging(conn, config)
+
+            # Step 2: Read CSV in chunks and bulk insert to staging
+            if prepared is None and config.stream and not (cache is not None and cache.contains(file_path)):
+                total_rows = stream_file_to_staging(conn, config, file_path, cache)
+            else:
+                chunks = prepared_frames if prepared is not None else prepared_chunks(config, file_path, cache)
+                total_rows = 0
+                try:
+                    for i, chunk in enumerate(chunks):
+                        rows_inserted = insert_staging_rows(conn, config, chunk)
+                        total_rows += rows_inserted
+                        if (i + 1) % 10 == 0:
+                            logger.info(f"  Loaded {total_rows:,} rows to staging...")
+                finally:
+                    if prepared is None:
+                        chunks.close()
+
+            logger.info(f"Loaded {total_rows:,} rows to staging table")
+
+            # Step 2b: Quarantine rows that would fail the MERGE
+            if config.validate:
+                validate_staging(conn, config, file_path.name)
+            return total_rows
+
+        total_rows = with_retry(config, 'staging_load', load_staging, conn)
 
         # Step 3: MERGE from staging to target
         logger.info("Executing MERGE from staging to target...")
-        merge_staging_to_target(conn, config)
+        signature = merge_source_signature(file_path)
+        with_retry(config, 'merge', lambda: merge_staging_to_target(conn, config, file_path.name, signature), conn)
         logger.info(f"MERGE complete for {file_path.name}")
 
         # Note: staging table is NOT truncated here - it's needed for snapshot_to_history
         # It will be truncated at the start of the next file processing
 
         logger.info(f"Completed processing {total_rows:,} rows from {file_path.name}")
-        return True
+        return total_rows
 
     except FileNotFoundError:
         logger.error(f"File not found: {file_path}")
-        return False
+        return None
     except pd.errors.EmptyDataError:
         logger.warning(f"Empty file: {file_path}")
-        return False
+        return None
     except pd.errors.ParserError as e:
         logger.error(f"CSV parsing error for {file_path}: {e}")
-        return False
+        return None
     except pyodbc.Error as e:
         logger.error(f"Database error processing {file_path}: {e}")
-        conn.rollback()
-        return False
+        reset_connection(conn)
+        return None
     except Exception as e:
         logger.error(f"Unexpected error processing {file_path}: {e}")
-        return False
+        return None
 
 
-def snapshot_to_history(conn: pyodbc.Connection, config: Config, snapshot_date: datetime, use_file_date: bool = False):
-    """Copy the CSV data (from staging) directly to HistoryTable."""
-    cursor = conn.cursor()
+def snapshot_to_history(conn: pyodbc.Connection, config: Config, snapshot_date: datetime, use_file_date: bool = False,
+                        source_file: Optional[str] = None):
+    """
+    Copy the CSV data (from staging) directly to HistoryTable.
+
+    Recording a snapshot date again (a run that stopped before recording the
+    date, or a retry whose commit acknowledgement was lost) replaces the
+    full-mode snapshot rather than duplicating it; source_file is the loaded
+    file's name.
+    """
+    if config.history_mode == 'delta':
+        with metrics.timer('snapshot'):
+            snapshot_delta_to_history(conn, config, snapshot_date, use_file_date, source_file)
+        return
 
-    # Data columns from staging
+    with metrics.timer('snapshot') as stage:
+        cursor = conn.cursor()
+
+        # Data columns from staging
+        data_columns = list(config.columns.keys())
+        data_col_list = ', '.join([f"[{c}]" for c in data_columns])
+
+        # All columns for insert (data + audit)
+        audit_columns = list(config.audit_columns.keys())
+        all_columns = data_columns + audit_columns
+        insert_col_list = ', '.join([f"[{c}]" for c in all_columns])
+
+        # Same transaction as the insert, so a re-run date is replaced
+        cursor.execute(f"DELETE FROM {config.history_table_fq} WHERE snapshot_date = ?", snapshot_date)
+
+        if use_file_date:
+            # Rebuild mode: use file date for audit columns
+            cursor.execute(f"""
+                INSERT INTO {config.history_table_fq} (snapshot_date, {insert_col_list})
+                SELECT ?, {data_col_list}, ?, '{config.system_user}', ?, '{config.system_user}'
+                FROM {config.staging_table_fq}
+            """, snapshot_date, snapshot_date, snapshot_date)
+        else:
+            # Daily mode: use current time for audit columns
+            cursor.execute(f"""
+                INSERT INTO {config.history_table_fq} (snapshot_date, {insert_col_list})
+                SELECT ?, {data_col_list}, GETDATE(), '{config.system_user}', GETDATE(), '{config.system_user}'
+                FROM {config.staging_table_fq}
+            """, snapshot_date)
+
+        row_count = stage.rows = cursor.rowcount
+        conn.commit()
+        logger.info(f"Snapshot saved to history: {row_count:,} rows for {snapshot_date.strftime('%Y-%m-%d')}")
+
+
+def snapshot_delta_to_history(conn: pyodbc.Connection, config: Config, snapshot_date: datetime,
+                              use_file_date: bool = False, source_file: Optional[str] = None):
+    """
+    Record the staging snapshot in delta history mode.
+
+    Only keys that are new, changed or gone since the previous snapshot are
+    written: changed and disappeared keys have their current version closed at
+    snapshot_date, and new or changed keys get a new version starting there.
+    The source file column is not compared (it differs every day) - as-of
+    queries take it from the snapshot log instead. Snapshots must be recorded
+    in ascending date order, as daily and rebuild runs do.
+
+    The versions and the snapshot log row are committed together, so a date
+    that is already in the log was recorded completely and is skipped.
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT 1 FROM {config.history_log_table_fq} WHERE snapshot_date = ?", snapshot_date)
+    if cursor.fetchone() is not None:
+        logger.info(f"Delta snapshot for {snapshot_date.strftime('%Y-%m-%d')} already recorded, skipping")
+        return
     data_columns = list(config.columns.keys())
-    data_col_list = ', '.join([f"[{c}]" for c in data_columns])
+    insert_col_list = ', '.join([f"[{c}]" for c in data_columns + list(config.audit_columns.keys())])
+    compare_cols = [c for c in data_columns if c not in (config.unique_key, config.source_file_column)]
+    key = config.unique_key
+
+    # Rebuild mode: use file date for audit columns; daily mode: current time
+    audit_dt = '?' if use_file_date else 'GETDATE()'
+    audit_params = [snapshot_date] if use_file_date else []
+
+    # Null-safe "row differs" test: INTERSECT treats NULLs as equal
+    if compare_cols:
+        source_cols = ', '.join([f"s.[{c}]" for c in compare_cols])
+        history_cols = ', '.join([f"h.[{c}]" for c in compare_cols])
+        changed = f"NOT EXISTS (SELECT {source_cols} INTERSECT SELECT {history_cols})"
+    else:
+        changed = "1 = 0"
 
-    # All columns for insert (data + audit)
-    audit_columns = list(config.audit_columns.keys())
-    all_columns = data_columns + audit_columns
-    insert_col_list = ', '.join([f"[{c}]" for c in all_columns])
+    # Close versions whose content changed
+    cursor.execute(f"""
+        UPDATE h
+        SET h.[valid_to] = ?, h.[modified_dt] = {audit_dt}, h.[modified_by] = '{config.system_user}'
+        FROM {config.history_table_fq} AS h
+        JOIN {config.staging_table_fq} AS s ON s.[{key}] = h.[{key}]
+        WHERE h.[valid_to] IS NULL AND {changed}
+    """, snapshot_date, *audit_params)
+    changed_count = cursor.rowcount
+
+    # Close versions whose key is no longer in the file
+    cursor.execute(f"""
+        UPDATE h
+        SET h.[valid_to] = ?, h.[modified_dt] = {audit_dt}, h.[modified_by] = '{config.system_user}'
+        FROM {config.history_table_fq} AS h
+        WHERE h.[valid_to] IS NULL
+          AND NOT EXISTS (SELECT 1 FROM {config.staging_table_fq} AS s WHERE s.[{key}] = h.[{key}])
+    """, snapshot_date, *audit_params)
+    removed_count = cursor.rowcount
+
+    # Open a version for every key without a current one (new keys and the ones just closed)
+    cursor.execute(f"""
+        INSERT INTO {config.history_table_fq} (valid_from, valid_to, {insert_col_list})
+        SELECT ?, NULL, {', '.join([f's.[{c}]' for c in data_columns])},
+               {audit_dt}, '{config.system_user}', {audit_dt}, '{config.system_user}'
+        FROM {config.staging_table_fq} AS s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {config.history_table_fq} AS h
+            WHERE h.[{key}] = s.[{key}] AND h.[valid_to] IS NULL
+        )
+    """, snapshot_date, *audit_params, *audit_params)
+    inserted_count = cursor.rowcount
 
-    if use_file_date:
-        # Rebuild mode: use file date for audit columns
-        cursor.execute(f"""
-            INSERT INTO {config.history_table_fq} (snapshot_date, {insert_col_list})
-            SELECT ?, {data_col_list}, ?, '{config.system_user}', ?, '{config.system_user}'
-            FROM {config.staging_table_fq}
-        """, snapshot_date, snapshot_date, snapshot_date)
+    # Staging only has the source file column when it is one of the configured columns
+    if config.source_file_column in config.columns:
+        source_file_expr, source_file_params = f"MAX([{config.source_file_column}])", []
     else:
-        # Daily mode: use current time for audit columns
+        source_file_expr, source_file_params = "?", [source_file]
+    cursor.execute(f"""
+        INSERT INTO {config.history_log_table_fq} (snapshot_date, source_file, row_count)
+        SELECT ?, {source_file_expr}, COUNT(*) FROM {config.staging_table_fq}
+    """, snapshot_date, *source_file_params)
+    conn.commit()
+
+    logger.info(
+        f"Delta snapshot saved to history for {snapshot_date.strftime('%Y-%m-%d')}: "
+        f"{inserted_count - changed_count:,} new, {changed_count:,} changed, {removed_count:,} removed"
+    )
+
+
+def get_history_snapshot(conn: pyodbc.Connection, config: Config, as_of: datetime) -> pd.DataFrame:
+    """
+    Return the history snapshot in effect on a date, in either history mode.
+
+    Resolves the latest snapshot on or before as_of and returns its rows as
+    snapshot_date plus the data columns, ordered by the unique key. Full and
+    delta history modes return identical results for the same loaded files.
+    """
+    cursor = conn.cursor()
+    data_columns = list(config.columns.keys())
+    result_columns = ['snapshot_date'] + data_columns
+    key = config.unique_key
+
+    if config.history_mode != 'delta':
+        data_col_list = ', '.join([f"[{c}]" for c in data_columns])
         cursor.execute(f"""
-            INSERT INTO {config.history_table_fq} (snapshot_date, {insert_col_list})
-            SELECT ?, {data_col_list}, GETDATE(), '{config.system_user}', GETDATE(), '{config.system_user}'
-            FROM {config.staging_table_fq}
-        """, snapshot_date)
+            SELECT snapshot_date, {data_col_list}
+            FROM {config.history_table_fq}
+            WHERE snapshot_date = (
+                SELECT MAX(snapshot_date) FROM {config.history_table_fq} WHERE snapshot_date <= ?
+            )
+            ORDER BY [{key}]
+        """, as_of)
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=result_columns)
 
-    row_count = cursor.rowcount
-    conn.commit()
-    logger.info(f"Snapshot saved to history: {row_count:,} rows for {snapshot_date.strftime('%Y-%m-%d')}")
+    cursor.execute(f"""
+        SELECT TOP 1 snapshot_date, source_file
+        FROM {config.history_log_table_fq}
+        WHERE snapshot_date <= ?
+        ORDER BY snapshot_date DESC
+    """, as_of)
+    row = cursor.fetchone()
+    if row is None:
+        return pd.DataFrame(columns=result_columns)
+    snapshot_date, source_file = row[0], row[1]
+
+    # The source file column is the snapshot's file for every row, as in full mode
+    select_cols = ', '.join([
+        f"? AS [{c}]" if c == config.source_file_column else f"[{c}]"
+        for c in data_columns
+    ])
+    params = [source_file] if config.source_file_column in config.columns else []
+    cursor.execute(f"""
+        SELECT {select_cols}
+        FROM {config.history_table_fq}
+        WHERE valid_from <= ? AND (valid_to IS NULL OR valid_to > ?)
+        ORDER BY [{key}]
+    """, *params, snapshot_date, snapshot_date)
+    snapshot = pd.DataFrame.from_records(cursor.fetchall(), columns=data_columns)
+    snapshot.insert(0, 'snapshot_date', snapshot_date)
+    return snapshot
+
+
+def rebuild_file(conn: pyodbc.Connection, config: Config, file_path: Path, file_date: datetime,
+                 prepared: Optional[Future] = None, manifest: Optional[FileManifest] = None) -> bool:
+    """Load, merge and snapshot one file in rebuild mode. Returns True if it was processed."""
+    metrics.start_file(file_path, file_date)
+    outcome, rows = 'failed', None
+    try:
+        rows = process_file(conn, config, file_path, file_date, prepared)
+        if rows is not None:
+            with_retry(config, 'snapshot',
+                       lambda: snapshot_to_history(conn, config, file_date, use_file_date=True,
+                                                   source_file=file_path.name), conn)
+            record_load(manifest, file_path, file_date, rows)
+            with_retry(config, 'metadata', lambda: update_last_processed_date(conn, config, file_date), conn)
+            outcome = 'loaded'
+            return True
+        record_load(manifest, file_path, file_date, None)
+        logger.warning(f"Skipping file due to processing errors: {file_path.name}")
+    except pyodbc.Error as e:
+        logger.error(f"Database error after processing {file_path.name}: {e}")
+        reset_connection(conn)
+    except Exception as e:
+        logger.error(f"Unexpected error after processing {file_path.name}: {e}")
+    finally:
+        metrics.finish_file(outcome, rows)
+    return False
+
+
+def rebuild_files_pipelined(conn: pyodbc.Connection, config: Config, files: List[Tuple[Path, datetime]],
+                            manifest: Optional[FileManifest] = None) -> int:
+    """
+    Rebuild with CSV parsing and cleaning done ahead of time in a process pool.
+
+    config.workers processes read and clean up to config.prefetch files ahead
+    of the one being loaded, so memory holds at most prefetch + 1 cleaned files.
+    Staging load, MERGE and history snapshot still run on this connection one
+    file at a time in file-date order, exactly as in the sequential rebuild.
+
+    Returns the number of files processed.
+    """
+    logger.info(f"Pipelined rebuild: {config.workers} workers, prefetch {config.prefetch} files")
+
+    processed_count = 0
+    remaining = iter(files)
+    in_flight: deque = deque()
+
+    with ProcessPoolExecutor(max_workers=config.workers) as pool:
+        def submit_next():
+            next_file = next(remaining, None)
+            if next_file is not None:
+                file_path, file_date = next_file
+                in_flight.append((file_path, file_date, pool.submit(prepare_file, config, file_path)))
+
+        for _ in range(max(config.prefetch, 1)):
+            submit_next()
+
+        while in_flight:
+            file_path, file_date, future = in_flight.popleft()
+            submit_next()
+            if rebuild_file(conn, config, file_path, file_date, prepared=future, manifest=manifest):
+                processed_count += 1
+
+    return processed_count
 
 
 def run_rebuild(config: Config):
@@ -752,47 +3439,53 @@ def run_rebuild(config: Config):
         sys.exit(1)
 
     logger.info(f"Starting REBUILD from {start_date.strftime('%Y-%m-%d')}")
+    metrics.start_run()
 
-    conn = get_connection(config)
+    pool = ConnectionPool(config)
+    conn = pool.acquire()
     try:
-        ensure_tables_exist(conn, config)
-        truncate_tables(conn, config)
-
-        files = discover_files(config, start_date)
+        with_retry(config, 'setup', lambda: ensure_tables_exist(conn, config), conn)
+        with_retry(config, 'setup', lambda: truncate_tables(conn, config), conn)
+
+        manifest = open_manifest(config)
+        files = discover_files(config, start_date, manifest)
+        if manifest is not None:
+            # Tables were truncated, so every file is reloaded; report the ones
+            # whose content changed since the previous load, then start afresh
+            warn_replaced_files(manifest, files)
+            manifest.clear_outcomes()
+            manifest.save()
         if not files:
             logger.warning("No files found to process")
             return
 
-        processed_count = 0
-        for file_path, file_date in files:
-            try:
-                if process_file(conn, config, file_path, file_date):
-                    snapshot_to_history(conn, config, file_date, use_file_date=True)
-                    update_last_processed_date(conn, config, file_date)
+        if config.workers > 1:
+            processed_count = rebuild_files_pipelined(conn, config, files, manifest)
+        else:
+            processed_count = 0
+            for file_path, file_date in files:
+                if rebuild_file(conn, config, file_path, file_date, manifest=manifest):
                     processed_count += 1
-                else:
-                    logger.warning(f"Skipping file due to processing errors: {file_path.name}")
-            except pyodbc.Error as e:
-                logger.error(f"Database error after processing {file_path.name}: {e}")
-                conn.rollback()
-            except Exception as e:
-                logger.error(f"Unexpected error after processing {file_path.name}: {e}")
 
         logger.info(f"Rebuild complete. Processed {processed_count}/{len(files)} files.")
 
     finally:
+        metrics.finish_run(conn, config)
         conn.close()
+        pool.close()
 
 
 def run_daily(config: Config):
     """Run daily incremental upsert."""
     logger.info("Starting DAILY incremental upsert")
+    metrics.start_run()
 
-    conn = get_connection(config)
+    pool = ConnectionPool(config)
+    conn = pool.acquire()
     try:
-        ensure_tables_exist(conn, config)
+        with_retry(config, 'setup', lambda: ensure_tables_exist(conn, config), conn)
 
-        last_processed = get_last_processed_date(conn, config)
+        last_processed = with_retry(config, 'setup', lambda: get_last_processed_date(conn, config), conn)
         if last_processed:
             logger.info(f"Last processed date: {last_processed.strftime('%Y-%m-%d')}")
             start_date = last_processed + timedelta(days=1)
@@ -800,7 +3493,18 @@ def run_daily(config: Config):
             logger.info("No previous processing found, processing all available files")
             start_date = None
 
-        files = discover_files(config, start_date)
+        manifest = open_manifest(config)
+        if manifest is not None and start_date is not None:
+            # One discovery covers the new files and the recently loaded ones
+            # that are checked for replacement
+            recheck_from = start_date - timedelta(days=MANIFEST_RECHECK_DAYS)
+            candidates = discover_files(config, recheck_from, manifest)
+            warn_replaced_files(manifest, [f for f in candidates if f[1] < start_date])
+            files = [f for f in candidates if f[1] >= start_date]
+        else:
+            files = discover_files(config, start_date, manifest)
+        if manifest is not None:
+            manifest.save()
         if not files:
             logger.info("No new files to process")
             return
@@ -808,23 +3512,65 @@ def run_daily(config: Config):
         # In daily mode, process files in order
         processed_count = 0
         for file_path, file_date in files:
+            metrics.start_file(file_path, file_date)
+            outcome, rows = 'failed', None
             try:
-                if process_file(conn, config, file_path, file_date):
-                    snapshot_to_history(conn, config, file_date)
-                    update_last_processed_date(conn, config, file_date)
+                if manifest is not None and manifest.is_loaded(file_path):
+                    # Loaded and snapshotted by an earlier run that stopped
+                    # before recording the date; loading it again would only
+                    # redo the same merge and snapshot
+                    logger.info(f"Already loaded with identical content, skipping: {file_path.name}")
+                    with_retry(config, 'metadata', lambda: update_last_processed_date(conn, config, file_date), conn)
                     processed_count += 1
+                    outcome = 'skipped'
+                    continue
+
+                rows = process_file(conn, config, file_path, file_date)
+                if rows is not None:
+                    with_retry(config, 'snapshot',
+                               lambda: snapshot_to_history(conn, config, file_date, source_file=file_path.name), conn)
+                    record_load(manifest, file_path, file_date, rows)
+                    with_retry(config, 'metadata', lambda: update_last_processed_date(conn, config, file_date), conn)
+                    processed_count += 1
+                    outcome = 'loaded'
                 else:
+                    record_load(manifest, file_path, file_date, None)
                     logger.warning(f"Skipping file due to processing errors: {file_path.name}, continuing to next")
             except pyodbc.Error as e:
                 logger.error(f"Database error after processing {file_path.name}: {e}")
-                conn.rollback()
+                reset_connection(conn)
             except Exception as e:
                 logger.error(f"Unexpected error after processing {file_path.name}: {e}")
+            finally:
+                metrics.finish_file(outcome, rows)
 
         logger.info(f"Daily run complete. Processed {processed_count}/{len(files)} new files.")
 
     finally:
+        metrics.finish_run(conn, config)
         conn.close()
+        pool.close()
+
+
+# Command-line options named differently from the Config field they set
+CONFIG_FILE_OPTIONS = {'bcp_command': 'bcp_path', 'manifest_path': 'manifest'}
+
+
+def load_config_file(path: str) -> Dict[str, object]:
+    """
+    Read Config field values from a JSON object, e.g. one feed's table definition.
+
+    Any Config field may be given, including the column definitions and
+    cleaning rules that have no command-line option.
+    """
+    with open(path, encoding='utf-8') as f:
+        values = json.load(f)
+    if not isinstance(values, dict):
+        raise ValueError(f"{path}: expected a JSON object of Config fields")
+    unknown = sorted(set(values) - {f.name for f in fields(Config)})
+    if unknown:
+        raise ValueError(f"{path}: unknown Config fields: {', '.join(unknown)}")
+    return values
 
 
 def main():
@@ -841,38 +3587,141 @@ Examples:
   python csv_sql_upsert.py --server SQLSERVER --database MyDB \\
       --archive-path "\\\\server\\share\\archive" --recent-path "\\\\server\\share\\recent" \\
       --rebuild --start-date 01012026
+
+  # Full rebuild, reading and cleaning files in 4 worker processes
+  python csv_sql_upsert.py --server SQLSERVER --database MyDB \\
+      --archive-path "\\\\server\\share\\archive" --recent-path "\\\\server\\share\\recent" \\
+      --rebuild --start-date 01012026 --workers 4 --prefetch 4
+
+  # Daily run that skips files already loaded with identical content
+  python csv_sql_upsert.py --server SQLSERVER --database MyDB \\
+      --archive-path "\\\\server\\share\\archive" --recent-path "\\\\server\\share\\recent" \\
+      --manifest upsert_manifest.json
+
+  # Full rebuild that reuses cleaned files cached by earlier runs
+  python csv_sql_upsert.py --server SQLSERVER --database MyDB \\
+      --archive-path "\\\\server\\share\\archive" --recent-path "\\\\server\\share\\recent" \\
+      --rebuild --start-date 01012026 --cache-dir D:\\upsert_cache
+
+  # Daily run of a feed whose tables, columns and cleaning rules are in a file
+  python csv_sql_upsert.py --config-file feeds\\acme.json
         """
     )
 
-    parser.add_argument('--server', required=True, help='SQL Server hostname')
-    parser.add_argument('--database', required=True, help='Database name')
-    parser.add_argument('--archive-path', required=True, help='UNC path to archive CSV files')
-    parser.add_argument('--recent-path', required=True, help='UNC path to recent CSV files')
+    # Values from --config-file become the option defaults, so options given
+    # on the command line still win
+    config_parser = argparse.ArgumentParser(add_help=False)
+    config_parser.add_argument('--config-file')
+    config_file = config_parser.parse_known_args()[0].config_file
+    try:
+        file_values = load_config_file(config_file) if config_file else {}
+    except (OSError, ValueError) as e:
+        parser.error(f"Could not read config file: {e}")
+
+    parser.add_argument('--server', required='server' not in file_values, help='SQL Server hostname')
+    parser.add_argument('--database', required='database' not in file_values, help='Database name')
+    parser.add_argument('--archive-path', required='archive_path' not in file_values, help='UNC path to archive CSV files')
+    parser.add_argument('--recent-path', required='recent_path' not in file_values, help='UNC path to recent CSV files')
     parser.add_argument('--schema', default='dbo', help='Database schema (default: dbo)')
     parser.add_argument('--main-table', default='MainTable', help='Main table name (default: MainTable)')
     parser.add_argument('--history-table', default='HistoryTable', help='History table name (default: HistoryTable)')
     parser.add_argument('--batch-size', type=int, default=10000, help='Batch size for processing (default: 10000)')
     parser.add_argument('--rebuild', action='store_true', help='Rebuild mode: truncate tables and process from start date')
     parser.add_argument('--start-date', help='Start date for rebuild (format: MMDDYYYY)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Rebuild mode: worker processes that read and clean files ahead of the load (default: 1, sequential)')
+    parser.add_argument('--prefetch', type=int, default=2,
+                        help='Rebuild mode: max files prepared ahead of the one being loaded (default: 2)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Overlap CSV reading, cleaning and staging inserts within each file')
+    parser.add_argument('--queue-size', type=int, default=4,
+                        help='Stream mode: max chunks buffered between pipeline stages (default: 4)')
+    parser.add_argument('--loader', default='executemany', choices=['executemany', 'tvp', 'bcp'],
+                        help='Staging load backend (default: executemany)')
+    parser.add_argument('--bcp-path', default='bcp', help='bcp executable for --loader bcp (default: bcp on PATH)')
+    parser.add_argument('--row-hash', action='store_true',
+                        help='Store a content hash per row and only UPDATE rows whose content changed')
+    parser.add_argument('--history-mode', default='full', choices=['full', 'delta'],
+                        help='HistoryTable storage: full copy per file, or delta row versions (default: full)')
+    parser.add_argument('--validate', action='store_true',
+                        help='Quarantine rows with invalid values or duplicate keys in the errors table '
+                             'instead of failing the MERGE')
+    parser.add_argument('--merge-slices', type=int, default=1,
+                        help='Split each MERGE into this many slices, one transaction each (default: 1, single MERGE)')
+    parser.add_argument('--merge-partition', default='range', choices=['range', 'hash'],
+                        help='How to slice staging for --merge-slices: key ranges or key hash buckets (default: range)')
+    parser.add_argument('--merge-connections', type=int, default=1,
+                        help='Connections merging slices in parallel (default: 1)')
+    parser.add_argument('--metrics-file',
+                        help='Append per-file and per-run stage metrics to this file as JSON lines')
+    parser.add_argument('--prometheus-file',
+                        help='Write run metrics in Prometheus text format (e.g. for the node_exporter textfile collector)')
+    parser.add_argument('--manifest',
+                        help='JSON file manifest: skip files already loaded with identical content and '
+                             'avoid rescanning unchanged folders (default: disabled)')
+    parser.add_argument('--cache-dir',
+                        help='Keep a local Parquet copy of each cleaned file here and load rebuilds from it '
+                             '(requires pyarrow; default: disabled)')
+    parser.add_argument('--cache-max-mb', type=int, default=4096,
+                        help='Cleaned file cache size limit; least recently used files are evicted (default: 4096)')
+    parser.add_argument('--retry-attempts', type=int, default=2,
+                        help='Retries of a database step after a transient error, with exponential backoff (default: 2)')
+    parser.add_argument('--config-file',
+                        help='JSON object of Config field values, e.g. a feed\'s tables, columns and cleaning rules')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
+    parser.set_defaults(**{CONFIG_FILE_OPTIONS.get(name, name): value for name, value in file_values.items()})
 
     args = parser.parse_args()
 
+    # argparse checks choices and types of command-line values only, not of
+    # the defaults taken from the config file
+    file_dests = {CONFIG_FILE_OPTIONS.get(name, name) for name in file_values}
+    for action in parser._actions:
+        if action.dest not in file_dests:
+            continue
+        value = getattr(args, action.dest)
+        if action.choices is not None and value not in action.choices:
+            choices = ', '.join(repr(choice) for choice in action.choices)
+            parser.error(f"{config_file}: invalid {action.option_strings[0]} value {value!r} (choose from {choices})")
+        if action.type is int and (isinstance(value, bool) or not isinstance(value, int)):
+            parser.error(f"{config_file}: {action.option_strings[0]} must be an integer, got {value!r}")
+
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
 
-    config = Config(
-        server=args.server,
-        database=args.database,
-        archive_path=args.archive_path,
-        recent_path=args.recent_path,
-        schema=args.schema,
-        main_table=args.main_table,
-        history_table=args.history_table,
-        batch_size=args.batch_size,
-        rebuild=args.rebuild,
-        start_date=args.start_date
-    )
+    # Fields without a command-line option come straight from the config file
+    config = Config(**{
+        **file_values,
+        'server': args.server,
+        'database': args.database,
+        'archive_path': args.archive_path,
+        'recent_path': args.recent_path,
+        'schema': args.schema,
+        'main_table': args.main_table,
+        'history_table': args.history_table,
+        'batch_size': args.batch_size,
+        'rebuild': args.rebuild,
+        'start_date': args.start_date,
+        'workers': args.workers,
+        'prefetch': args.prefetch,
+        'stream': args.stream,
+        'queue_size': args.queue_size,
+        'loader': args.loader,
+        'bcp_command': args.bcp_path,
+        'row_hash': args.row_hash,
+        'history_mode': args.history_mode,
+        'validate': args.validate,
+        'merge_slices': args.merge_slices,
+        'merge_partition': args.merge_partition,
+        'merge_connections': args.merge_connections,
+        'metrics_file': args.metrics_file,
+        'prometheus_file': args.prometheus_file,
+        'manifest_path': args.manifest,
+        'cache_dir': args.cache_dir,
+        'cache_max_mb': args.cache_max_mb,
+        'retry_attempts': args.retry_attempts,
+    })
+    metrics.configure(config)
 
     if config.rebuild:
         run_rebuild(config)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Ground ambulance transport charges for batches of claims.
+
+Prices each claim with the rate tables indexed by ambulance_rates.py:
+
+    Total = Base Rate + (Mileage Rate x Loaded Miles) + Supplies
+
+- Base rate: the claim's service level and emergency flag pick the HCPCS
+  code (BLS A0429/A0428, ALS1 A0427/A0426, ALS2 A0433, SCT A0434); the
+  emergency flag also picks the rate type (911 or IFT).
+- Mileage rate: A0425 for the same pickup ZIP and rate type. Claims with no
+  loaded miles don't need one.
+- Supplies: an optional claim column, 0 when absent or blank; any other
+  value that isn't a number leaves the claim unpriced.
+
+Everything runs on NumPy arrays over the whole batch; text columns are
+parsed once per distinct value. Claims that can't be priced (bad ZIP or
+service level, no base or mileage rate for the ZIP, bad miles or supplies) are returned
+separately with the reason, not priced as 0.
+
+Claims come as a DataFrame, an Arrow table, or a CSV/Parquet file on the
+command line, with the columns named in CLAIM_COLUMNS.
+
+Usage:
+    python transport_charges.py claims.csv --output priced.csv --unmatched unmatched.csv
+    python transport_charges.py claims.parquet --output priced.parquet
+"""
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import ambulance_rates
+
+try:
+    import pyarrow as pa  # Optional: Arrow table input, Parquet files
+except ImportError:
+    pa = None
+
+# Claim columns: pickup ZIP, service level (see SERVICE_LEVELS), emergency
+# flag (true/false, Y/N, 1/0, 911/IFT), loaded miles and, optionally, supplies
+CLAIM_COLUMNS = {
+    "zip": "pickup_zip",
+    "service_level": "service_level",
+    "emergency": "emergency",
+    "loaded_miles": "loaded_miles",
+    "supplies": "supplies",
+}
+
+# Service level (upper case) -> (emergency HCPCS code, non-emergency HCPCS code)
+SERVICE_LEVELS = {
+    "BLS": ("A0429", "A0428"),
+    "ALS1": ("A0427", "A0426"),
+    "ALS": ("A0427", "A0426"),
+    "ALS2": ("A0433", "A0433"),
+    "SCT": ("A0434", "A0434"),
+    "CCT": ("A0434", "A0434"),
+}
+MILEAGE_CODE = "A0425"
+
+# Emergency flag spellings (lower case): 1 emergency, 0 not
+EMERGENCY_VALUES = {"true": 1, "t": 1, "y": 1, "yes": 1, "1": 1, "911": 1, "emergency": 1,
+                    "false": 0, "f": 0, "n": 0, "no": 0, "0": 0, "ift": 0, "non-emergency": 0}
+
+# Reasons a claim is not priced, in the order they are checked
+UNMATCHED_REASONS = ["invalid ZIP", "unknown service level", "unknown emergency flag", "invalid loaded miles",
+                     "invalid supplies", "no base rate", "no mileage rate"]
+
+
+@dataclass
+class PricedClaims:
+    """Claims that were priced, and the ones that weren't with their reason."""
+    priced: pd.DataFrame
+    unmatched: pd.DataFrame
+
+    def summary(self) -> str:
+        lines = [f"Priced {len(self.priced):,} claims, total {self.priced['total'].sum():,.2f}; "
+                 f"{len(self.unmatched):,} unmatched"]
+        for reason, count in self.unmatched["reason"].value_counts(sort=False).items():
+            if count:
+                lines.append(f"  {reason}: {count:,}")
+        return "\n".join(lines)
+
+
+def round_cents(amounts: np.ndarray) -> np.ndarray:
+    """Round to cents, halves up, as billed. 102.21 x 17.5 = 1788.675 is stored as 1788.67499...,
+    which np.round would take down; the small nudge absorbs that representation error."""
+    return np.floor(amounts * 100 + 0.5 + 1e-6) / 100
+
+
+def text_lookup(values: pd.Series, table: dict, missing: int) -> np.ndarray:
+    """table[str(value).strip().lower()] per value, looked up once per distinct value; missing if absent."""
+    codes, uniques = pd.factorize(values)
+    keys = pd.Series(uniques, dtype=object).astype(str).str.strip().str.lower()
+    mapped = [table.get(key, missing) for key in keys]
+    return np.array(mapped + [missing], dtype=np.int64)[codes]
+
+
+def emergency_flags(values: pd.Series) -> np.ndarray:
+    """1 for emergency, 0 for not, -1 for unreadable (including missing values of nullable dtypes).
+
+    Numeric columns (a CSV of 911 and 0 reads as integers) use the numeric spellings: 1 or 911, and 0.
+    """
+    if pd.api.types.is_bool_dtype(values.dtype) or pd.api.types.is_numeric_dtype(values.dtype):
+        numbers = values.to_numpy(dtype=float, na_value=np.nan)
+        return np.where((numbers == 1) | (numbers == 911), 1, np.where(numbers == 0, 0, -1))
+    return text_lookup(values, EMERGENCY_VALUES, -1)
+
+
+def supply_amounts(values: pd.Series) -> np.ndarray:
+    """Supplies per claim: 0 when missing or blank, NaN when not a number."""
+    amounts = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    blank = values.isna().to_numpy()
+    if not pd.api.types.is_numeric_dtype(values.dtype):
+        codes, uniques = pd.factorize(values)
+        blank_uniques = (pd.Series(uniques, dtype=object).astype(str).str.strip() == "").to_numpy()
+        blank |= np.append(blank_uniques, True)[codes]
+    return np.where(blank, 0.0, amounts)
+
+
+def price_claims(claims, index: ambulance_rates.RateIndex = None) -> PricedClaims:
+    """Price a batch of claims (DataFrame or Arrow table) against the rate index."""
+    if pa is not None and isinstance(claims, pa.Table):
+        claims = claims.to_pandas()
+    index = index or ambulance_rates.load_index()
+    count = len(claims)
+
+    zips = ambulance_rates.zip_values(claims[CLAIM_COLUMNS["zip"]])
+    emergency = emergency_flags(claims[CLAIM_COLUMNS["emergency"]])
+    miles = pd.to_numeric(claims[CLAIM_COLUMNS["loaded_miles"]], errors="coerce").to_numpy(dtype=float)
+    supplies_column = CLAIM_COLUMNS["supplies"]
+    if supplies_column in claims.columns:
+        supplies = supply_amounts(claims[supplies_column])
+    else:
+        supplies = np.zeros(count)
+
+    # Service level -> row of (emergency code, non-emergency code)
+    level_names = list(SERVICE_LEVELS)
+    levels = text_lookup(claims[CLAIM_COLUMNS["service_level"]],
+                         {name.lower(): i for i, name in enumerate(level_names)}, -1)
+    level_codes = np.array([[index.code_index.get(code, -1) for code in SERVICE_LEVELS[name]]
+                            for name in level_names] + [[-1, -1]], dtype=np.int64)
+    base_codes = level_codes[levels, np.where(emergency == 1, 0, 1)]
+    rate_types = np.where(emergency == 1, ambulance_rates.RATE_TYPE_CODES.index("911"),
+                          np.where(emergency == 0, ambulance_rates.RATE_TYPE_CODES.index("IFT"), -1))
+
+    base_ids, _ = index.find(zips, base_codes, rate_types)
+    mileage_code = index.code_index.get(MILEAGE_CODE, -1)
+    mileage_ids, _ = index.find(zips, np.full(count, mileage_code, dtype=np.int64), rate_types)
+
+    rates = np.append(index.records["rate"].to_numpy(dtype=float), np.nan)
+    base_rate = rates[base_ids]
+    mileage_rate = np.where(miles > 0, rates[mileage_ids], 0.0)
+    mileage_charge = round_cents(mileage_rate * miles)
+    total = round_cents(base_rate + mileage_charge + supplies)
+
+    # First failing check per claim; the last reason slot (len) means priced
+    checks = [zips < 0, levels < 0, emergency < 0, ~(miles >= 0), ~np.isfinite(supplies), base_ids < 0,
+              (miles > 0) & (mileage_ids < 0)]
+    reason = np.select(checks, np.arange(len(checks)), default=len(checks))
+    priced = reason == len(checks)
+
+    result = claims[priced].copy()
+    result["hcpcs"] = pd.Categorical.from_codes(base_codes[priced], categories=index.codes)
+    result["rate_type"] = pd.Categorical.from_codes(rate_types[priced], categories=ambulance_rates.RATE_TYPE_CODES)
+    result["base_rate"] = base_rate[priced]
+    result["mileage_rate"] = mileage_rate[priced]
+    result["mileage_charge"] = mileage_charge[priced]
+    result["supplies_charge"] = supplies[priced]
+    result["total"] = total[priced]
+    result["base_record_id"] = base_ids[priced]
+    result["mileage_record_id"] = np.where(miles > 0, mileage_ids, -1)[priced]
+
+    unmatched = claims[~priced].copy()
+    unmatched["reason"] = pd.Categorical.from_codes(reason[~priced], categories=UNMATCHED_REASONS)
+    return PricedClaims(result, unmatched)
+
+
+def read_claims(path: Path) -> pd.DataFrame:
+    if path.suffix.lower() == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_csv(path, dtype={CLAIM_COLUMNS["zip"]: str})
+
+
+def write_frame(frame: pd.DataFrame, path: Path):
+    if path.suffix.lower() == ".parquet":
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Price ground ambulance claims against the California rate tables",
+        epilog="example: python transport_charges.py claims.csv --output priced.csv --unmatched unmatched.csv",
+    )
+    parser.add_argument("claims", type=Path,
+                        help=f"CSV or Parquet file with columns {', '.join(CLAIM_COLUMNS.values())} "
+                             f"({CLAIM_COLUMNS['supplies']} optional)")
+    parser.add_argument("--output", type=Path, help="Write the priced claims here (CSV or Parquet)")
+    parser.add_argument("--unmatched", type=Path, help="Write the unmatched claims and reasons here")
+    parser.add_argument("--rebuild-index", action="store_true", help="Rebuild the rate index from the CSVs")
+    args = parser.parse_args()
+    if pa is None and any(path is not None and path.suffix.lower() == ".parquet"
+                          for path in (args.claims, args.output, args.unmatched)):
+        parser.error("Parquet files require pyarrow")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    result = price_claims(read_claims(args.claims), ambulance_rates.load_index(rebuild=args.rebuild_index))
+    print(result.summary())
+    if args.output:
+        write_frame(result.priced, args.output)
+    if args.unmatched:
+        write_frame(result.unmatched, args.unmatched)